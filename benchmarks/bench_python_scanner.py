@@ -0,0 +1,115 @@
+"""
+Python import 扫描基准测试：比较 ast 模式与 fast 模式的 parse_imports 耗时
+
+用法：
+    python -m benchmarks.bench_python_scanner [--lines 1000 10000 100000] [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from tools.parsers.python_parser import PythonParser
+
+_HEADER = '''"""自动生成的基准测试模块
+
+import fake_module_in_docstring
+"""
+import os
+import sys
+from typing import TYPE_CHECKING, Dict, List
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+if TYPE_CHECKING:
+    from collections import OrderedDict
+'''
+
+_BLOCK = '''
+
+class Generated{index}:
+    """类 {index} 的文档字符串，包含 'from fake import thing' 文本"""
+
+    def method(self, value: int) -> Dict[str, int]:
+        text = "import not_a_module; from nowhere import nothing"
+        result = {{"value": value, "index": {index}}}
+        for i in range(value):
+            result[str(i)] = i * {index}
+        return result
+
+
+def helper_{index}(items: List[int]) -> int:
+    from json import dumps  # 函数内导入
+    return len(dumps(items)) + {index}
+'''
+
+
+def generate_source(lines: int) -> str:
+    """生成大约指定行数的 Python 源码"""
+    parts = [_HEADER]
+    block_lines = _BLOCK.count("\n")
+    for index in range(max(1, (lines - _HEADER.count("\n")) // block_lines)):
+        parts.append(_BLOCK.format(index=index))
+    return "".join(parts)
+
+
+def _best_time(parser: PythonParser, path: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser.parse_imports(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(line_counts: List[int], repeat: int = 5) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for lines in line_counts:
+            path = os.path.join(temp_dir, f"generated_{lines}.py")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generate_source(lines))
+
+            ast_parser = PythonParser(temp_dir, scan_mode="ast")
+            fast_parser = PythonParser(temp_dir, scan_mode="fast")
+
+            ast_imports = {(i.type, i.module, i.level) for i in ast_parser.parse_imports(path)}
+            fast_imports = {(i.type, i.module, i.level) for i in fast_parser.parse_imports(path)}
+
+            ast_time = _best_time(ast_parser, path, repeat)
+            fast_time = _best_time(fast_parser, path, repeat)
+            results.append({
+                "lines": lines,
+                "ast_ms": round(ast_time * 1000, 3),
+                "fast_ms": round(fast_time * 1000, 3),
+                "speedup": round(ast_time / fast_time, 2) if fast_time else None,
+                "same_imports": ast_imports == fast_imports
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Python import 扫描基准测试")
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 10000, 100000], help="生成文件的行数")
+    parser.add_argument("--repeat", type=int, default=5, help="每种模式重复次数（取最快一次）")
+    parser.add_argument("--json", default=None, help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = run(args.lines, args.repeat)
+
+    print(f"{'lines':>8} {'ast (ms)':>10} {'fast (ms)':>10} {'speedup':>8} {'same':>5}")
+    for row in results:
+        print(f"{row['lines']:>8} {row['ast_ms']:>10} {row['fast_ms']:>10} {row['speedup']:>8} {str(row['same_imports']):>5}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
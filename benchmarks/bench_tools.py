@@ -0,0 +1,218 @@
+"""
+工具级基准测试：在合成的 Python / Java 仓库上测量各工具函数的延迟、吞吐量和峰值内存
+
+每个工具先在清空缓存后运行一次（冷启动），再重复运行若干次（热缓存），
+峰值内存通过 tracemalloc 单独再运行一次测得，不影响计时
+
+用法：
+    python -m benchmarks.bench_tools [--languages python java] [--depth 3] [--fanout 3]
+        [--modules 5] [--imports 4] [--lines 100] [--repeat 5] [--json out.json] [--baseline old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic_repo import GENERATORS, RepoSpec, SyntheticRepo
+from tools.directory_analyzer import clear_listing_cache, find_entry_files, list_directory
+from tools.file_analyzer import analyze_file_imports, get_dependency_tree, get_file_content
+from tools.line_index import get_line_index_cache
+from tools.parsers.cache import get_analysis_cache
+from tools.parsers.java_index import invalidate_java_class_index
+from tools.parsers.project_root import invalidate_project_roots
+from tools.parsers.unresolved import get_unresolved_cache
+
+# 对比基线时，耗时增加超过该比例视为回退
+REGRESSION_THRESHOLD = 0.2
+
+
+def reset_caches():
+    """清空所有进程内缓存，使下一次调用为冷启动"""
+    get_analysis_cache().clear()
+    get_unresolved_cache().clear()
+    invalidate_project_roots()
+    invalidate_java_class_index()
+    clear_listing_cache()
+    get_line_index_cache().clear()
+
+
+def _workloads(repo: SyntheticRepo, depth: int) -> Dict[str, Callable[[], int]]:
+    """每个工作负载执行一轮调用，返回本轮处理的条目数（用于计算吞吐量）"""
+    sample = repo.files[::max(1, len(repo.files) // 50)]
+
+    def analyze_all() -> int:
+        for path in repo.files:
+            analyze_file_imports(path)
+        return len(repo.files)
+
+    def dependency_tree() -> int:
+        return get_dependency_tree(repo.entry_file, max_depth=depth + 2)["total_files"]
+
+    def directory_listing() -> int:
+        return list_directory(repo.root, max_depth=depth + 5)["summary"]["total_files"]
+
+    def entry_files() -> int:
+        return find_entry_files(repo.root)["total"] or 1
+
+    def file_content() -> int:
+        for path in sample:
+            get_file_content(path)
+        return len(sample)
+
+    return {
+        "analyze_file_imports": analyze_all,
+        "get_dependency_tree": dependency_tree,
+        "list_directory": directory_listing,
+        "find_entry_files": entry_files,
+        "get_file_content": file_content
+    }
+
+
+def _measure(workload: Callable[[], int], repeat: int) -> Dict:
+    reset_caches()
+    start = time.perf_counter()
+    items = workload()
+    cold = time.perf_counter() - start
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        timings.append(time.perf_counter() - start)
+
+    reset_caches()
+    tracemalloc.start()
+    try:
+        workload()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    median = statistics.median(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return {
+        "items": items,
+        "cold_ms": round(cold * 1000, 3),
+        "median_ms": round(median * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "throughput_per_s": round(items / median, 1) if median else None,
+        "peak_kb": round(peak / 1024, 1)
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(languages: List[str], spec: RepoSpec, repeat: int = 5) -> Dict:
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for language in languages:
+            repo = GENERATORS[language](temp_dir, spec)
+            for tool, workload in _workloads(repo, spec.depth).items():
+                row = {"language": language, "tool": tool, "files": len(repo.files)}
+                row.update(_measure(workload, repeat))
+                results.append(row)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "spec": vars(spec),
+            "repeat": repeat
+        },
+        "results": results
+    }
+
+
+def compare(current: Dict, baseline: Dict) -> List[Dict]:
+    """与基线结果比较热缓存中位数耗时，返回每个工具的变化比例"""
+    previous = {(row["language"], row["tool"]): row for row in baseline.get("results", [])}
+    changes = []
+    for row in current["results"]:
+        old = previous.get((row["language"], row["tool"]))
+        if old is None or not old.get("median_ms"):
+            continue
+        change = (row["median_ms"] - old["median_ms"]) / old["median_ms"]
+        changes.append({
+            "language": row["language"],
+            "tool": row["tool"],
+            "baseline_ms": old["median_ms"],
+            "current_ms": row["median_ms"],
+            "change": round(change, 3),
+            "regression": change > REGRESSION_THRESHOLD
+        })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件分析工具基准测试")
+    parser.add_argument("--languages", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS),
+                        help="生成的仓库语言")
+    parser.add_argument("--depth", type=int, default=3, help="包目录嵌套层数")
+    parser.add_argument("--fanout", type=int, default=3, help="每个包的子包数量")
+    parser.add_argument("--modules", type=int, default=5, help="每个包中的模块数量")
+    parser.add_argument("--imports", type=int, default=4, help="每个模块导入的项目内模块数量")
+    parser.add_argument("--lines", type=int, default=100, help="每个模块的大致行数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=5, help="热缓存重复次数")
+    parser.add_argument("--json", default=None, help="将结果写入 JSON 文件")
+    parser.add_argument("--baseline", default=None, help="与之前保存的 JSON 结果比较")
+    args = parser.parse_args()
+
+    spec = RepoSpec(
+        depth=args.depth,
+        fanout=args.fanout,
+        modules_per_package=args.modules,
+        imports_per_module=args.imports,
+        lines_per_module=args.lines,
+        seed=args.seed
+    )
+    report = run(args.languages, spec, args.repeat)
+
+    print(f"{'language':>8} {'tool':>22} {'items':>6} {'cold (ms)':>10} {'median':>10} "
+          f"{'p95':>10} {'items/s':>10} {'peak KB':>9}")
+    for row in report["results"]:
+        print(f"{row['language']:>8} {row['tool']:>22} {row['items']:>6} {row['cold_ms']:>10} "
+              f"{row['median_ms']:>10} {row['p95_ms']:>10} {row['throughput_per_s']:>10} {row['peak_kb']:>9}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+        print()
+        for row in report["comparison"]:
+            flag = "  <-- 回退" if row["regression"] else ""
+            print(f"{row['language']:>8} {row['tool']:>22} {row['baseline_ms']:>10} -> "
+                  f"{row['current_ms']:>10} ({row['change']:+.1%}){flag}")
+        regressions = [row for row in report["comparison"] if row["regression"]]
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+合成仓库生成器：按规模、目录深度和扇出生成可复现的 Python / Java 项目，供基准测试使用
+
+同样的参数和随机种子总是生成完全相同的仓库
+"""
+import os
+import random
+from dataclasses import dataclass, field
+from typing import List
+
+_PYTHON_EXTERNAL = ["os", "sys", "json", "re", "typing", "collections", "numpy", "requests"]
+_JAVA_EXTERNAL = ["java.util.List", "java.util.Map", "java.io.File", "org.slf4j.Logger"]
+
+
+@dataclass
+class RepoSpec:
+    """
+    合成仓库的规模参数
+
+    Args:
+        depth: 包目录的嵌套层数
+        fanout: 每个包下的子包数量
+        modules_per_package: 每个包中的模块（类）数量
+        imports_per_module: 每个模块导入的项目内模块数量
+        lines_per_module: 每个模块的大致行数
+        seed: 随机种子
+    """
+    depth: int = 3
+    fanout: int = 3
+    modules_per_package: int = 5
+    imports_per_module: int = 4
+    lines_per_module: int = 100
+    seed: int = 0
+
+    @property
+    def package_count(self) -> int:
+        return sum(self.fanout ** level for level in range(self.depth))
+
+    @property
+    def module_count(self) -> int:
+        return self.package_count * self.modules_per_package
+
+
+@dataclass
+class SyntheticRepo:
+    """生成结果：项目根目录、入口文件和所有源文件"""
+    language: str
+    root: str
+    entry_file: str
+    files: List[str] = field(default_factory=list)
+
+
+def _package_paths(spec: RepoSpec) -> List[List[str]]:
+    """所有包的路径（名称列表），按广度优先顺序排列"""
+    packages = [["core"]]
+    frontier = [["core"]]
+    for _ in range(spec.depth - 1):
+        next_frontier = []
+        for parent in frontier:
+            for index in range(spec.fanout):
+                child = parent + [f"pkg{index}"]
+                packages.append(child)
+                next_frontier.append(child)
+        frontier = next_frontier
+    return packages
+
+
+def _padding(lines: int, comment: str) -> str:
+    return "".join(f"{comment} 填充行 {index}，用于模拟真实文件大小\n" for index in range(max(lines, 0)))
+
+
+def generate_python_repo(root: str, spec: RepoSpec) -> SyntheticRepo:
+    """
+    生成 Python 项目：core 包下按深度和扇出嵌套子包，core/__main__.py 导入顶层模块
+    （入口放在包内，与其他模块检测到相同的项目根目录）
+    """
+    rng = random.Random(spec.seed)
+    project = os.path.join(root, "python_project")
+    modules = []  # (模块名, 文件路径)
+
+    for package in _package_paths(spec):
+        package_dir = os.path.join(project, *package)
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, "__init__.py"), "w", encoding="utf-8") as f:
+            f.write('"""合成包"""\n')
+        for index in range(spec.modules_per_package):
+            modules.append((".".join(package + [f"module{index}"]), os.path.join(package_dir, f"module{index}.py")))
+
+    for position, (name, path) in enumerate(modules):
+        # 只导入排在后面的模块，避免生成过多的循环依赖
+        candidates = [module for module, _ in modules[position + 1:]]
+        local = rng.sample(candidates, min(spec.imports_per_module, len(candidates)))
+        lines = [f"import {module}" for module in rng.sample(_PYTHON_EXTERNAL, 3)]
+        lines += [f"import {module}" for module in local]
+        lines += [
+            "",
+            "",
+            f"def run_{position}(value):",
+            f"    return value + {position}",
+            ""
+        ]
+        body = "\n".join(lines)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body + _padding(spec.lines_per_module - len(lines), "#"))
+
+    entry_file = os.path.join(project, "core", "__main__.py")
+    with open(entry_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(f"import {module}" for module, _ in modules[:spec.modules_per_package]) + "\n")
+
+    return SyntheticRepo("python", project, entry_file, [path for _, path in modules] + [entry_file])
+
+
+def generate_java_repo(root: str, spec: RepoSpec) -> SyntheticRepo:
+    """生成 Maven 结构的 Java 项目：src/main/java/com/bench/... 下按深度和扇出嵌套包"""
+    rng = random.Random(spec.seed)
+    project = os.path.join(root, "java_project")
+    source_root = os.path.join(project, "src", "main", "java")
+    os.makedirs(source_root, exist_ok=True)
+    with open(os.path.join(project, "pom.xml"), "w", encoding="utf-8") as f:
+        f.write("<project><artifactId>bench</artifactId></project>\n")
+
+    classes = []  # (全限定类名, 文件路径)
+    for package in _package_paths(spec):
+        package_dir = os.path.join(source_root, "com", "bench", *package)
+        os.makedirs(package_dir, exist_ok=True)
+        for index in range(spec.modules_per_package):
+            qualified = ".".join(["com", "bench"] + package + [f"Class{index}"])
+            classes.append((qualified, os.path.join(package_dir, f"Class{index}.java")))
+
+    for position, (qualified, path) in enumerate(classes):
+        package, class_name = qualified.rsplit(".", 1)
+        candidates = [name for name, _ in classes[position + 1:]]
+        local = rng.sample(candidates, min(spec.imports_per_module, len(candidates)))
+        lines = [f"package {package};", ""]
+        lines += [f"import {name};" for name in rng.sample(_JAVA_EXTERNAL, 2)]
+        lines += [f"import {name};" for name in local]
+        lines += [
+            "",
+            f"public class {class_name} {{",
+            f"    public int run(int value) {{ return value + {position}; }}",
+            "}",
+            ""
+        ]
+        body = "\n".join(lines)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body + _padding(spec.lines_per_module - len(lines), "//"))
+
+    entry_dir = os.path.join(source_root, "com", "bench")
+    entry_file = os.path.join(entry_dir, "Main.java")
+    with open(entry_file, "w", encoding="utf-8") as f:
+        f.write("package com.bench;\n\n")
+        f.write("".join(f"import {name};\n" for name, _ in classes[:spec.modules_per_package]))
+        f.write("\npublic class Main {}\n")
+
+    return SyntheticRepo("java", project, entry_file, [path for _, path in classes] + [entry_file])
+
+
+GENERATORS = {
+    "python": generate_python_repo,
+    "java": generate_java_repo
+}
@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Coroutine, Dict, List, Optional
+
+# 发起当前工具调用的事件循环，工作线程中的工具通过它向客户端推送进度
+_event_loop: contextvars.ContextVar = contextvars.ContextVar("tool_event_loop", default=None)
+
+
+def submit_to_loop(coro: Coroutine):
+    """
+    在工具函数（工作线程）中把协程提交回发起调用的事件循环执行，不等待结果
+    不是通过 ToolExecutor 调用时直接丢弃
+    """
+    loop = _event_loop.get()
+    if loop is None:
+        coro.close()
+        return None
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+class _ToolStats:
+    """单个工具的排队与执行统计"""
+
+    def __init__(self, limit: Optional[int], light: bool = False):
+        self.limit = limit
+        self.light = light  # 是否在轻量工具的独立线程池中执行
+        self.waiting = 0  # 等待并发许可的调用数（队列深度）
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        finished = self.completed + self.failed
+        return {
+            "limit": self.limit,
+            "pool": "light" if self.light else "default",
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_ms": round(self.total_wait_seconds * 1000 / finished, 3) if finished else 0.0,
+            "avg_run_ms": round(self.total_run_seconds * 1000 / finished, 3) if finished else 0.0
+        }
+
+
+class ToolExecutor:
+    """
+    在有界线程池中执行同步的工具函数，避免阻塞 uvicorn 事件循环
+    每个工具可以设置独立的并发上限；read_file 等轻量工具（light=True）使用独立的小线程池，
+    耗时的工具即使占满了主线程池也不会让它们排队
+    """
+
+    def __init__(self, max_workers: int = 8, light_workers: int = 4):
+        self.max_workers = max_workers
+        self.light_workers = light_workers
+        self._pools: Dict[bool, ThreadPoolExecutor] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _ToolStats] = {}
+        self._result_hooks: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers: int, light_workers: Optional[int] = None):
+        """调整线程池大小（需在服务开始处理请求前调用）"""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False)
+            self._pools.clear()
+            self.max_workers = max_workers
+            if light_workers is not None:
+                self.light_workers = light_workers
+
+    def _get_pool(self, light: bool = False) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(light)
+            if pool is None:
+                pool = self._pools[light] = ThreadPoolExecutor(
+                    max_workers=self.light_workers if light else self.max_workers,
+                    thread_name_prefix="mcp-light" if light else "mcp-tool"
+                )
+            return pool
+
+    def add_result_hook(self, hook: Callable):
+        """注册在工作线程中处理工具返回值的回调（如估算结果大小），不占用事件循环"""
+        self._result_hooks.append(hook)
+
+    def _call(self, func: Callable, args, kwargs):
+        result = func(*args, **kwargs)
+        for hook in self._result_hooks:
+            hook(result)
+        return result
+
+    def _register(self, name: str, limit: Optional[int], light: bool = False):
+        self._stats[name] = _ToolStats(limit, light)
+
+    def _get_semaphore(self, name: str) -> Optional[asyncio.Semaphore]:
+        limit = self._stats[name].limit
+        if not limit:
+            return None
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(limit)
+            self._semaphores[name] = semaphore
+        return semaphore
+
+    async def run(self, name: str, func: Callable, *args, **kwargs):
+        """在线程池中执行 func，受该工具的并发上限约束"""
+        if name not in self._stats:
+            self._register(name, None)
+        stats = self._stats[name]
+        semaphore = self._get_semaphore(name)
+
+        queued_at = time.perf_counter()
+        stats.waiting += 1
+        stats.max_queue_depth = max(stats.max_queue_depth, stats.waiting)
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+
+        started_at = time.perf_counter()
+        stats.total_wait_seconds += started_at - queued_at
+        stats.running += 1
+        try:
+            # 复制上下文，使 contextvars 在工作线程中依然可见
+            loop = asyncio.get_running_loop()
+            _event_loop.set(loop)
+            context = contextvars.copy_context()
+            call = functools.partial(context.run, self._call, func, args, kwargs)
+            result = await loop.run_in_executor(self._get_pool(stats.light), call)
+            stats.completed += 1
+            return result
+        except BaseException:
+            stats.failed += 1
+            raise
+        finally:
+            stats.running -= 1
+            stats.total_run_seconds += time.perf_counter() - started_at
+            if semaphore is not None:
+                semaphore.release()
+
+    def offload(self, limit: Optional[int] = None, light: bool = False):
+        """
+        装饰器：把同步工具函数包装为在线程池中执行的异步函数
+        保留原函数的签名和文档，FastMCP 据此生成工具描述
+
+        Args:
+            limit: 该工具的最大并发数（None 表示只受线程池大小限制）
+            light: 是否为轻量工具，在独立的线程池中执行，不与耗时工具争抢线程
+        """
+
+        def decorator(func: Callable) -> Callable:
+            name = func.__name__
+            self._register(name, limit, light)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await self.run(name, func, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict:
+        """返回线程池与各工具的排队/执行统计"""
+        return {
+            "max_workers": self.max_workers,
+            "light_workers": self.light_workers,
+            "tools": {name: stats.to_dict() for name, stats in self._stats.items()}
+        }
@@ -0,0 +1,274 @@
+import functools
+import inspect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from tools.usage import current_usage, start_usage
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 采集器返回的样本：(指标名, 类型, 说明, 标签, 值)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def estimate_size(value) -> int:
+    """
+    估算结果序列化为 JSON 后的字节数：累加字符串长度和标量的文本长度，不实际序列化
+    非 ASCII 字符串按 UTF-8 编码计算
+    """
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            total += len(item) + 2 if item.isascii() else len(item.encode("utf-8", "replace")) + 2
+        elif isinstance(item, dict):
+            total += 2 + len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            total += 2 + len(item)
+            stack.extend(item)
+        elif item is None or isinstance(item, bool):
+            total += 5
+        else:
+            total += len(str(item))
+    return total
+
+
+class _ToolMetrics:
+    """单个工具的调用计数、延迟直方图、返回字节数和访问文件数"""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = {}  # 状态 -> 次数
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.response_bytes = 0
+        self.files_touched = 0
+        self.in_flight = 0
+
+
+class MetricsRegistry:
+    """
+    MCP 工具的指标注册表
+    instrument() 装饰每个工具记录调用情况，render() 输出 Prometheus 文本格式
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, _ToolMetrics] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _tool(self, name: str) -> _ToolMetrics:
+        metrics = self._tools.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._tools.setdefault(name, _ToolMetrics())
+        return metrics
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """注册在输出时才计算的指标（如缓存命中率、队列深度）"""
+        self._collectors.append(collector)
+
+    def observe(self, name: str, status: str, seconds: float, response_bytes: int, files_touched: int):
+        metrics = self._tool(name)
+        with self._lock:
+            metrics.calls[status] = metrics.calls.get(status, 0) + 1
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    metrics.bucket_counts[index] += 1
+                    break
+            metrics.latency_sum += seconds
+            metrics.latency_count += 1
+            metrics.response_bytes += response_bytes
+            metrics.files_touched += files_touched
+
+    @staticmethod
+    def _status_of(result) -> str:
+        if isinstance(result, dict) and result.get("status") == "error":
+            return "error"
+        return "success"
+
+    @staticmethod
+    def measure_response(result):
+        """
+        在工作线程中估算返回结果的大小（注册为 ToolExecutor 的结果回调），
+        避免在事件循环中遍历大结果阻塞其他连接
+        """
+        usage = current_usage()
+        if usage is not None:
+            usage.response_bytes = estimate_size(result)
+
+    @staticmethod
+    def _size_of(result, usage) -> int:
+        if usage.response_bytes is not None:
+            return usage.response_bytes
+        # 未经线程池执行的工具（结果都很小）直接在当前线程估算
+        return estimate_size(result)
+
+    def instrument(self):
+        """
+        装饰器：记录工具的调用次数（按结果状态）、耗时、返回字节数和访问的文件数
+        需放在 @mcp.tool() 与 @executor.offload() 之间，同步和异步函数均可
+        """
+
+        def decorator(func: Callable) -> Callable:
+            name = func.__name__
+            self._tool(name)
+
+            def finish(metrics: _ToolMetrics, started_at: float, usage, result, status: Optional[str]):
+                with self._lock:
+                    metrics.in_flight -= 1
+                self.observe(
+                    name,
+                    status or self._status_of(result),
+                    time.perf_counter() - started_at,
+                    self._size_of(result, usage) if status is None else 0,
+                    usage.files_touched
+                )
+
+            def begin():
+                metrics = self._tool(name)
+                with self._lock:
+                    metrics.in_flight += 1
+                return metrics, time.perf_counter(), start_usage()
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    metrics, started_at, usage = begin()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except BaseException:
+                        finish(metrics, started_at, usage, None, "exception")
+                        raise
+                    finish(metrics, started_at, usage, result, None)
+                    return result
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    metrics, started_at, usage = begin()
+                    try:
+                        result = func(*args, **kwargs)
+                    except BaseException:
+                        finish(metrics, started_at, usage, None, "exception")
+                        raise
+                    finish(metrics, started_at, usage, result, None)
+                    return result
+
+            return wrapper
+
+        return decorator
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式（text/plain; version=0.0.4）"""
+        lines = []
+
+        def header(metric: str, kind: str, text: str):
+            lines.append(f"# HELP {metric} {text}")
+            lines.append(f"# TYPE {metric} {kind}")
+
+        with self._lock:
+            tools = sorted(self._tools.items())
+
+            header("mcp_tool_calls_total", "counter", "工具调用次数（按结果状态）")
+            for name, metrics in tools:
+                for status, count in sorted(metrics.calls.items()):
+                    lines.append(f"mcp_tool_calls_total{_labels({'tool': name, 'status': status})} {count}")
+
+            header("mcp_tool_latency_seconds", "histogram", "工具调用耗时")
+            for name, metrics in tools:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, metrics.bucket_counts):
+                    cumulative += count
+                    labels = _labels({"tool": name, "le": _format_value(bound)})
+                    lines.append(f"mcp_tool_latency_seconds_bucket{labels} {cumulative}")
+                labels = _labels({"tool": name, "le": "+Inf"})
+                lines.append(f"mcp_tool_latency_seconds_bucket{labels} {metrics.latency_count}")
+                lines.append(f"mcp_tool_latency_seconds_sum{_labels({'tool': name})} {metrics.latency_sum!r}")
+                lines.append(f"mcp_tool_latency_seconds_count{_labels({'tool': name})} {metrics.latency_count}")
+
+            header("mcp_tool_response_bytes_total", "counter", "工具返回结果的字节数（按 JSON 估算）")
+            for name, metrics in tools:
+                lines.append(f"mcp_tool_response_bytes_total{_labels({'tool': name})} {metrics.response_bytes}")
+
+            header("mcp_tool_files_touched_total", "counter", "工具读取、解析或列出的文件数")
+            for name, metrics in tools:
+                lines.append(f"mcp_tool_files_touched_total{_labels({'tool': name})} {metrics.files_touched}")
+
+            header("mcp_tool_in_flight", "gauge", "正在执行的工具调用数")
+            for name, metrics in tools:
+                lines.append(f"mcp_tool_in_flight{_labels({'tool': name})} {metrics.in_flight}")
+
+        # 同一指标的样本必须连续输出，先按指标名分组
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in self._collectors:
+            for metric, kind, text, labels, value in collector():
+                family = families.setdefault(metric, (kind, text, []))
+                family[2].append(f"{metric}{_labels(labels)} {_format_value(value)}")
+        for metric, (kind, text, samples) in families.items():
+            header(metric, kind, text)
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+
+def cache_collector(get_stats: Callable[[], Dict]) -> Callable[[], Iterable[Sample]]:
+    """
+    把 get_cache_stats() 的结果转换为缓存命中、未命中、条目数和命中率指标
+    嵌套的统计（如按语言区分的项目根目录缓存）以 "外层_内层" 作为 cache 标签
+    """
+
+    def flatten(prefix: str, stats: Dict):
+        if "hits" in stats:
+            yield prefix, stats
+            return
+        for name, value in stats.items():
+            if isinstance(value, dict):
+                yield from flatten(f"{prefix}_{name}", value)
+
+    def collect() -> Iterable[Sample]:
+        for name, stats in get_stats().items():
+            if not isinstance(stats, dict):
+                continue
+            for cache, values in flatten(name, stats):
+                labels = {"cache": cache}
+                hits, misses = values.get("hits", 0), values.get("misses", 0)
+                yield "mcp_cache_hits_total", "counter", "缓存命中次数", labels, hits
+                yield "mcp_cache_misses_total", "counter", "缓存未命中次数", labels, misses
+                yield "mcp_cache_hit_ratio", "gauge", "缓存命中率", labels, hits / (hits + misses) if hits + misses else 0.0
+                if "entries" in values:
+                    yield "mcp_cache_entries", "gauge", "缓存条目数", labels, values["entries"]
+
+    return collect
+
+
+def executor_collector(get_stats: Callable[[], Dict]) -> Callable[[], Iterable[Sample]]:
+    """把 ToolExecutor.stats() 的结果转换为各工具的排队深度和执行中数量"""
+
+    def collect() -> Iterable[Sample]:
+        for tool, values in sorted(get_stats()["tools"].items()):
+            labels = {"tool": tool}
+            yield "mcp_executor_queue_depth", "gauge", "等待线程池执行的调用数", labels, values["queue_depth"]
+            yield "mcp_executor_running", "gauge", "线程池中正在执行的调用数", labels, values["running"]
+
+    return collect
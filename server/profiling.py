@@ -0,0 +1,142 @@
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from tools.usage import serial_execution
+
+# 可选的排序字段：cumulative 按包含子调用的总耗时，tottime 按函数自身耗时，calls 按调用次数
+SORT_KEYS = {"cumulative": 3, "tottime": 2, "calls": 1}
+
+
+class ToolProfiler:
+    """
+    按调用开启的 cProfile 性能剖析
+    调用时传入 profile=True，或按 sample_rate 随机抽样；结果按 profile_id 保存（LRU），
+    并在工具返回值中附带 profile_id，之后通过 summary() 查看耗时最多的函数
+
+    cProfile 只记录当前线程，因此剖析期间工具在本线程中串行执行（不分发到线程池/进程池），
+    ast.parse、文件系统访问等耗时都会计入；剖析调用的总耗时因此可能高于平时
+    """
+
+    def __init__(self, sample_rate: float = 0.0, max_profiles: int = 50):
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, sample_rate: Optional[float] = None, max_profiles: Optional[int] = None):
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        if max_profiles is not None:
+            self.max_profiles = max(max_profiles, 1)
+
+    def _store(self, tool: str, arguments: Dict, profiler: cProfile.Profile, seconds: float) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        entry = {
+            "profile_id": profile_id,
+            "tool": tool,
+            "arguments": {key: repr(value)[:200] for key, value in arguments.items()},
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_ms": round(seconds * 1000, 3),
+            "stats": pstats.Stats(profiler).stats
+        }
+        with self._lock:
+            self._profiles[profile_id] = entry
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def profiled(self):
+        """
+        装饰器：为同步工具函数增加 profile 参数，需放在 @executor.offload() 之下，
+        使剖析在实际执行工具的工作线程中进行
+        """
+
+        def decorator(func: Callable) -> Callable:
+            name = func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                requested = bool(kwargs.pop("profile", False))
+                if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+                    return func(*args, **kwargs)
+
+                profiler = cProfile.Profile()
+                started_at = time.perf_counter()
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # 已有其他剖析器在运行，本次调用不剖析
+                    return func(*args, **kwargs)
+                try:
+                    with serial_execution():
+                        result = func(*args, **kwargs)
+                finally:
+                    profiler.disable()
+                arguments = inspect.signature(func).bind_partial(*args, **kwargs).arguments
+                profile_id = self._store(name, arguments, profiler, time.perf_counter() - started_at)
+                if isinstance(result, dict):
+                    result = {**result, "profile_id": profile_id}
+                return result
+
+            # 在工具签名中加入 profile 参数，FastMCP 据此生成参数描述
+            signature = inspect.signature(func)
+            parameters = list(signature.parameters.values())
+            parameters.append(inspect.Parameter(
+                "profile", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=bool
+            ))
+            wrapper.__signature__ = signature.replace(parameters=parameters)
+            return wrapper
+
+        return decorator
+
+    def list_profiles(self) -> List[Dict]:
+        """已保存的剖析结果（不含明细），最新的在前"""
+        with self._lock:
+            entries = list(self._profiles.values())
+        return [
+            {key: entry[key] for key in ("profile_id", "tool", "arguments", "created_at", "duration_ms")}
+            for entry in reversed(entries)
+        ]
+
+    def summary(self, profile_id: str, limit: int = 30, sort: str = "cumulative") -> Dict:
+        """
+        剖析结果摘要：按 sort 排序的前 limit 个函数
+
+        Returns:
+            每个函数的调用次数、自身耗时、累计耗时（毫秒）和位置
+        """
+        if sort not in SORT_KEYS:
+            return {"error": f"不支持的排序方式: {sort}。可选: {sorted(SORT_KEYS)}", "status": "error"}
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        if entry is None:
+            return {"error": f"剖析结果不存在或已被淘汰: {profile_id}", "status": "error"}
+
+        rows = sorted(entry["stats"].items(), key=lambda item: item[1][SORT_KEYS[sort]], reverse=True)
+        functions = []
+        for (filename, line, function), (primitive_calls, calls, tottime, cumtime, _) in rows[:limit]:
+            functions.append({
+                "function": function,
+                "location": f"{os.path.basename(filename)}:{line}" if line else "built-in",
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3)
+            })
+
+        return {
+            **{key: entry[key] for key in ("profile_id", "tool", "arguments", "created_at", "duration_ms")},
+            "total_functions": len(rows),
+            "sort": sort,
+            "functions": functions,
+            "status": "success"
+        }
@@ -1,17 +1,32 @@
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 from starlette.applications import Starlette
 from mcp.server.sse import SseServerTransport
 from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 from starlette.routing import Mount, Route
 from mcp.server import Server
 import uvicorn
+import json
+import os
 
 # 导入文件分析工具
 from tools.file_analyzer import (
     get_file_content,
     analyze_file_imports,
-    get_dependency_tree
+    get_dependency_tree,
+    analyze_project as analyze_project_files,
+    find_dependents as find_file_dependents,
+    find_symbol as find_symbol_definitions,
+    get_cache_stats
 )
+from tools.batch_reader import read_files as read_file_batch
+from tools.parsers.cache import configure_analysis_cache
+from tools.code_search import configure_search_index, default_index_dir, search_code as search_project_code
+from tools.parsers.python_parser import SCAN_MODES, SCAN_MODE_ENV
+from tools.invalidation import watch_project as start_watching, unwatch_project, get_watch_status
+from server.executor import ToolExecutor, submit_to_loop
+from server.metrics import MetricsRegistry, cache_collector, executor_collector
+from server.profiling import ToolProfiler
 
 # 导入目录分析工具（新增）
 from tools.directory_analyzer import (
@@ -22,42 +37,135 @@ from tools.directory_analyzer import (
 
 mcp = FastMCP("Multi-language File Analyzer")
 
+# 工具函数都是阻塞的文件系统操作，统一放到有界线程池中执行；
+# 耗时的工具设置并发上限，read_file / read_files 使用独立的轻量线程池，不会排在耗时工具之后
+executor = ToolExecutor(max_workers=8, light_workers=4)
+
+# 每个工具的调用次数、耗时、返回字节数和访问文件数，通过 /metrics 以 Prometheus 格式暴露
+metrics = MetricsRegistry()
+metrics.add_collector(cache_collector(get_cache_stats))
+metrics.add_collector(executor_collector(executor.stats))
+executor.add_result_hook(metrics.measure_response)
+
+# 按调用（profile=True）或按抽样比例开启的 cProfile 剖析，结果通过 get_profile 查看
+profiler = ToolProfiler()
+
+# read_file 单次返回内容的默认上限
+DEFAULT_READ_MAX_BYTES = 1_000_000
+# read_files 所有文件合计返回内容的默认上限
+DEFAULT_BATCH_MAX_BYTES = 4_000_000
+
 
 # ========== 文件操作工具 ==========
 
 @mcp.tool()
-def read_file(filepath: str) -> dict:
+@metrics.instrument()
+@executor.offload(light=True)
+@profiler.profiled()
+def read_file(
+        filepath: str,
+        start_line: int = None,
+        end_line: int = None,
+        start_byte: int = None,
+        end_byte: int = None,
+        max_bytes: int = DEFAULT_READ_MAX_BYTES,
+        cursor: str = None,
+        if_none_match: str = None
+) -> dict:
     """
-    读取单个文件的完整内容（支持多种语言）
+    读取文件内容（支持多种语言），可按行或字节范围分页读取
 
     支持的语言：Python (.py), Java (.java)
 
     Args:
         filepath: 文件路径
+        start_line: 起始行（从 1 开始，可选）
+        end_line: 结束行（包含，可选）
+        start_byte: 起始字节偏移（可选，不能与行范围同时使用）
+        end_byte: 结束字节偏移（不包含，可选）
+        max_bytes: 单次最多返回的字节数，超出时截断并返回 next_cursor
+        cursor: 上一次返回的 next_cursor，用于继续读取后续内容
+        if_none_match: 之前返回的 content_hash，文件未变化时只返回 not_modified=True，不含内容（带 cursor 的续读忽略此参数）
+
+    Returns:
+        文件内容、所在范围和元数据（size、mtime_ns 和整个文件的 content_hash；部分读取时只有传入 if_none_match 或哈希已缓存才有 content_hash，否则为 None）；
+        内容未读完时 next_cursor 不为空
+    """
+    return get_file_content(
+        filepath,
+        start_line=start_line,
+        end_line=end_line,
+        start_byte=start_byte,
+        end_byte=end_byte,
+        max_bytes=max_bytes,
+        cursor=cursor,
+        if_none_match=if_none_match
+    )
+
+
+@mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=4, light=True)
+@profiler.profiled()
+def read_files(
+        paths: list[str],
+        max_bytes_per_file: int = DEFAULT_READ_MAX_BYTES,
+        max_total_bytes: int = DEFAULT_BATCH_MAX_BYTES,
+        max_files: int = 100
+) -> dict:
+    """
+    一次读取多个文件（如一个模块及其所有本地导入），并发读取，代替多次调用 read_file
+
+    Args:
+        paths: 文件路径列表，支持通配符（如 "src/**/*.py"），重复的路径只读取一次
+        max_bytes_per_file: 单个文件最多返回的字节数，超出时截断并返回 next_cursor
+        max_total_bytes: 所有文件合计最多返回的字节数，按列表顺序分配，用完后的文件标记为 skipped
+        max_files: 最多读取的文件数（通配符展开后）
 
     Returns:
-        文件内容和元数据
+        按请求顺序排列的每个文件的内容或错误（单个文件出错不影响其他文件），以及总字节数
     """
-    return get_file_content(filepath)
+    return read_file_batch(paths, max_bytes_per_file, max_total_bytes, max_files)
 
 
 @mcp.tool()
-def analyze_imports(filepath: str, project_root: str = None) -> dict:
+@metrics.instrument()
+@executor.offload(limit=4)
+@profiler.profiled()
+def analyze_imports(
+        filepath: str,
+        project_root: str = None,
+        output_format: str = "full",
+        relative_paths: bool = False
+) -> dict:
     """
     分析文件的导入依赖（自动识别语言）
 
     Args:
         filepath: 文件路径
         project_root: 项目根目录（可选，自动检测）
+        output_format: "full" 完整的导入详情；"compact" 路径和模块名放入 strings 表，导入记录只引用下标
+        relative_paths: 紧凑格式中项目内的路径是否输出为相对于项目根目录的路径
 
     Returns:
         依赖分析结果
     """
-    return analyze_file_imports(filepath, project_root)
+    return analyze_file_imports(filepath, project_root, output_format, relative_paths)
 
 
 @mcp.tool()
-def get_deps_tree(filepath: str, max_depth: int = 2, project_root: str = None) -> dict:
+@metrics.instrument()
+@executor.offload(limit=2)
+@profiler.profiled()
+def get_deps_tree(
+        filepath: str,
+        max_depth: int = 2,
+        project_root: str = None,
+        output_format: str = "tree",
+        workers: int = 0,
+        max_files: int = None,
+        relative_paths: bool = False
+) -> dict:
     """
     获取多语言项目的依赖树结构
 
@@ -65,21 +173,265 @@ def get_deps_tree(filepath: str, max_depth: int = 2, project_root: str = None) -
         filepath: 起始文件
         max_depth: 最大深度
         project_root: 项目根目录
+        output_format: "tree" 嵌套依赖树；"graph" 扁平的 {nodes, edges}，适合大型依赖图；
+            "compact" 路径和模块名放入 strings 表，文件、边和循环只引用下标，体积最小
+        workers: 并行分析的工作者数量（0 表示按 CPU 核数自动选择，1 表示串行）
+        max_files: 最多分析的文件数（可选）
+        relative_paths: 紧凑格式中项目内的路径是否输出为相对于项目根目录的路径
+
+    Returns:
+        完整依赖树（或依赖图），以及检测到的循环依赖
+    """
+    return get_dependency_tree(
+        filepath, max_depth, project_root, output_format,
+        workers=workers or None,
+        max_files=max_files,
+        relative_paths=relative_paths
+    )
+
+
+@mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=1)
+@profiler.profiled()
+def analyze_project(
+        dirpath: str,
+        project_root: str = None,
+        workers: int = 0,
+        max_files: int = None,
+        exclude_patterns: str = None,
+        stream_partial: bool = False,
+        ctx: Context = None
+) -> dict:
+    """
+    一次分析整个项目中所有支持语言的源文件，返回项目级导入图
+    代替对每个文件分别调用 analyze_imports
+
+    Args:
+        dirpath: 项目目录
+        project_root: 项目根目录（可选，自动检测）
+        workers: 并行分析的工作者数量（0 表示 CPU 核数，1 表示串行）
+        max_files: 最多分析的文件数
+        exclude_patterns: 额外排除的名称或通配符，如 "venv,*.egg-info"（逗号分隔）
+        stream_partial: 为 True 时每完成一批文件就以日志消息推送该批的导入信息
+
+    Returns:
+        files（相对路径、语言、外部导入）、edges（文件下标对）、cycles 和统计信息
+    """
+    excludes = None
+    if exclude_patterns:
+        excludes = [pattern.strip() for pattern in exclude_patterns.split(',')]
+
+    progress = None
+    if ctx is not None:
+        def progress(done: int, total: int, partial: list):
+            submit_to_loop(ctx.report_progress(done, total))
+            if stream_partial:
+                submit_to_loop(ctx.info(json.dumps(
+                    {"done": done, "total": total, "files": partial}, ensure_ascii=False
+                )))
+
+    return analyze_project_files(
+        dirpath, project_root,
+        workers=workers or None,
+        max_files=max_files,
+        exclude_patterns=excludes,
+        progress=progress
+    )
+
+
+@mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=2)
+@profiler.profiled()
+def find_dependents(
+        filepath: str,
+        max_depth: int = 3,
+        dirpath: str = None,
+        project_root: str = None
+) -> dict:
+    """
+    查找哪些文件（传递地）导入了指定文件，用于评估修改一个文件的影响范围
+    从项目导入索引的反向边直接回答，首次查询时会先建立整个项目的索引
+
+    Args:
+        filepath: 目标文件
+        max_depth: 最大反向深度（1 表示只返回直接导入者，0 表示不限）
+        dirpath: 项目目录（可选，默认自动检测）
+        project_root: 项目根目录（可选，自动检测）
+
+    Returns:
+        dependents（相对路径、深度、经由的文件）和索引状态
+    """
+    return find_file_dependents(filepath, max_depth or None, dirpath, project_root)
+
+
+@mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=2)
+@profiler.profiled()
+def find_symbol(
+        dirpath: str,
+        name: str,
+        kind: str = None,
+        match: str = "exact",
+        case_sensitive: bool = True,
+        limit: int = 50
+) -> dict:
+    """
+    在项目中查找类、函数、方法的定义位置，代替逐个浏览目录和读取文件
+    首次查询时建立项目符号索引，之后只重新解析变化过的文件
+
+    Args:
+        dirpath: 项目目录
+        name: 符号名称，可带外层类名（如 "PythonParser.parse_imports"）
+        kind: 只返回该类型的符号："class"、"function"、"method"、"interface"、"enum"、"record"、"constructor" 等
+        match: "exact" 完全匹配，"prefix" 前缀匹配，"contains" 包含匹配
+        case_sensitive: 是否区分大小写
+        limit: 最多返回的结果数（0 表示不限）
+
+    Returns:
+        matches（名称、限定名称、类型、相对路径、起止行号）和索引状态
+    """
+    return find_symbol_definitions(dirpath, name, kind or None, match, case_sensitive, limit or None)
+
+
+@mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=4)
+@profiler.profiled()
+def search_code(
+        dirpath: str,
+        pattern: str,
+        fixed_string: bool = False,
+        case_sensitive: bool = True,
+        include: str = None,
+        context_lines: int = 0,
+        max_results: int = 100
+) -> dict:
+    """
+    在项目中按正则表达式搜索代码，返回匹配的文件、行号和上下文，代替逐个读取文件查找
+    基于三元组索引先筛选候选文件（首次搜索时建立索引并保存到磁盘，之后增量更新）
+
+    Args:
+        dirpath: 项目目录
+        pattern: 正则表达式（Python re 语法）
+        fixed_string: 为 True 时把 pattern 当作普通字符串匹配
+        case_sensitive: 是否区分大小写
+        include: 只搜索匹配该通配符的文件（如 "*.py"、"src/main/*"）
+        context_lines: 每个匹配前后附带的行数（最多 10）
+        max_results: 最多返回的匹配行数（0 表示不限）
+
+    Returns:
+        matches（相对路径、行号、列号、行内容、上下文）、候选文件数、线性扫描的大文件数和索引状态
+    """
+    return search_project_code(
+        dirpath, pattern, fixed_string, case_sensitive, include, context_lines, max_results or None
+    )
+
+
+@mcp.tool()
+@metrics.instrument()
+def cache_stats() -> dict:
+    """
+    查看导入分析缓存和行索引缓存的统计信息，用于评估和调整缓存大小
+
+    Returns:
+        缓存条目数、命中/未命中/淘汰次数和命中率
+    """
+    return get_cache_stats()
+
+
+@mcp.tool()
+@metrics.instrument()
+def executor_stats() -> dict:
+    """
+    查看工具执行线程池的统计信息
+
+    Returns:
+        各工具的并发上限、排队深度、执行中/已完成/失败次数和平均等待/执行耗时
+    """
+    return {**executor.stats(), "status": "success"}
+
+
+@mcp.tool()
+@metrics.instrument()
+def get_profile(profile_id: str = None, limit: int = 30, sort: str = "cumulative") -> dict:
+    """
+    查看工具调用的性能剖析结果（调用分析类工具时传入 profile=True 即可生成）
+
+    Args:
+        profile_id: 工具返回的 profile_id（为空时列出已保存的剖析结果）
+        limit: 返回耗时最多的前几个函数
+        sort: 排序方式，"cumulative" 累计耗时，"tottime" 自身耗时，"calls" 调用次数
+
+    Returns:
+        各函数的调用次数、自身耗时和累计耗时
+    """
+    if not profile_id:
+        return {"profiles": profiler.list_profiles(), "sample_rate": profiler.sample_rate, "status": "success"}
+    return profiler.summary(profile_id, limit, sort)
+
+
+@mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=2)
+def watch_project(dirpath: str, interval: float = 1.0) -> dict:
+    """
+    监听项目目录的文件变化，变化时只失效受影响的缓存条目
+    被监听目录下的目录列表和依赖图会在调用之间复用
+
+    Args:
+        dirpath: 项目根目录
+        interval: 轮询间隔（秒），仅在 inotify 不可用时生效
+
+    Returns:
+        监听的根目录和使用的后端（inotify 或 polling）
+    """
+    return start_watching(dirpath, interval=interval)
+
+
+@mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=2)
+def unwatch(dirpath: str) -> dict:
+    """
+    停止监听项目目录
+
+    Args:
+        dirpath: 项目根目录
 
     Returns:
-        完整依赖树
+        是否停止了一个正在运行的监听
     """
-    return get_dependency_tree(filepath, max_depth, project_root)
+    return unwatch_project(dirpath)
+
+
+@mcp.tool()
+@metrics.instrument()
+def watch_status() -> dict:
+    """
+    查看当前正在监听的目录
+
+    Returns:
+        各监听目录的后端和已处理的事件数
+    """
+    return get_watch_status()
 
 
 # ========== 目录操作工具（新增）==========
 
 @mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=4)
+@profiler.profiled()
 def browse_directory(
         dirpath: str,
         max_depth: int = 1,
         file_extensions: str = None,
-        show_hidden: bool = False
+        show_hidden: bool = False,
+        exclude_patterns: str = None,
+        respect_gitignore: bool = False
 ) -> dict:
     """
     浏览目录结构，查看文件和子目录
@@ -89,6 +441,8 @@ def browse_directory(
         max_depth: 递归深度（1=仅当前层，2=包含子目录一层）
         file_extensions: 仅显示特定类型文件，如 ".py,.java"（逗号分隔）
         show_hidden: 是否显示隐藏文件
+        exclude_patterns: 额外排除的名称或通配符，如 "venv,*.egg-info"（逗号分隔）
+        respect_gitignore: 是否应用目录下 .gitignore 中的规则
 
     Returns:
         目录结构信息
@@ -97,15 +451,24 @@ def browse_directory(
     if file_extensions:
         extensions = [ext.strip() for ext in file_extensions.split(',')]
 
+    excludes = None
+    if exclude_patterns:
+        excludes = [pattern.strip() for pattern in exclude_patterns.split(',')]
+
     return list_directory(
         dirpath=dirpath,
         max_depth=max_depth,
         include_extensions=extensions,
-        show_hidden=show_hidden
+        exclude_patterns=excludes,
+        show_hidden=show_hidden,
+        respect_gitignore=respect_gitignore
     )
 
 
 @mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=4)
+@profiler.profiled()
 def explore_project(dirpath: str, language: str = "all") -> dict:
     """
     智能探索项目结构（自动过滤常见无关文件）
@@ -121,6 +484,9 @@ def explore_project(dirpath: str, language: str = "all") -> dict:
 
 
 @mcp.tool()
+@metrics.instrument()
+@executor.offload(limit=2)
+@profiler.profiled()
 def find_main_files(dirpath: str) -> dict:
     """
     查找项目的入口文件
@@ -139,6 +505,9 @@ def find_main_files(dirpath: str) -> dict:
 def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
     sse = SseServerTransport("/messages/")
 
+    async def handle_metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
     async def handle_sse(request: Request) -> None:
         print("收到SSE请求")
         try:
@@ -160,6 +529,7 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
         debug=debug,
         routes=[
             Route("/sse", endpoint=handle_sse),
+            Route("/metrics", endpoint=handle_metrics),
             Mount("/messages/", app=sse.handle_post_message),
         ],
     )
@@ -173,8 +543,33 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='运行多语言文件分析MCP服务器')
     parser.add_argument('--host', default='0.0.0.0', help='绑定的主机地址')
     parser.add_argument('--port', type=int, default=8081, help='监听的端口号')
+    parser.add_argument('--cache-size', type=int, default=4096, help='导入分析缓存的最大条目数（0 表示禁用内存缓存）')
+    parser.add_argument('--cache-db', default=None, help='导入分析缓存的 SQLite 文件路径（可选，重启后仍可复用）')
+    parser.add_argument('--python-scan-mode', choices=SCAN_MODES, default='ast',
+                        help='Python import 扫描模式：ast 完整语法树，fast 快速扫描（歧义时回退到 ast）')
+    parser.add_argument('--index-dir', default=None,
+                        help='代码搜索索引的保存目录（默认 ~/.cache/mcp-file-analyzer/trigram，"none" 表示不保存到磁盘）')
+    parser.add_argument('--workers', type=int, default=8, help='执行工具函数的线程池大小')
+    parser.add_argument('--light-workers', type=int, default=4,
+                        help='read_file / read_files 等轻量工具独立线程池的大小')
+    parser.add_argument('--profile-rate', type=float, default=0.0,
+                        help='随机剖析工具调用的比例（0~1，默认 0 表示只剖析传入 profile=True 的调用）')
+    parser.add_argument('--watch', action='append', default=[], metavar='DIR',
+                        help='启动时监听的项目目录，文件变化时增量失效缓存（可重复指定）')
     args = parser.parse_args()
 
+    executor.configure(max_workers=args.workers, light_workers=args.light_workers)
+    profiler.configure(sample_rate=args.profile_rate)
+    os.environ[SCAN_MODE_ENV] = args.python_scan_mode
+
+    configure_analysis_cache(max_entries=args.cache_size, db_path=args.cache_db)
+    if args.index_dir is None:
+        configure_search_index(default_index_dir())
+    elif args.index_dir.lower() != "none":
+        configure_search_index(args.index_dir)
+    for watch_dir in args.watch:
+        print(f"监听目录: {start_watching(watch_dir)}")
+
     starlette_app = create_starlette_app(mcp_server, debug=True)
 
     print("=" * 50)
@@ -183,12 +578,23 @@ if __name__ == "__main__":
     print("已注册的工具:")
     print("  📄 文件操作:")
     print("     - read_file: 读取文件内容")
+    print("     - read_files: 并发批量读取多个文件（按总字节预算截断）")
     print("     - analyze_imports: 分析文件依赖")
     print("     - get_deps_tree: 获取依赖树")
+    print("     - analyze_project: 一次分析整个项目的导入关系")
+    print("     - find_dependents: 查找导入了指定文件的文件")
+    print("     - find_symbol: 查找类、函数、方法的定义位置")
+    print("     - search_code: 基于三元组索引的正则代码搜索")
+    print("     - cache_stats: 查看分析缓存统计")
+    print("     - executor_stats: 查看工具线程池统计")
+    print("     - get_profile: 查看工具调用的性能剖析结果（调用时传入 profile=True）")
+    print("     - watch_project / unwatch / watch_status: 监听文件变化并增量失效缓存")
     print("  📁 目录操作:")
     print("     - browse_directory: 浏览目录结构")
     print("     - explore_project: 智能探索项目")
     print("     - find_main_files: 查找入口文件")
+    print("  📊 监控:")
+    print("     - GET /metrics: Prometheus 格式的工具调用与缓存指标")
     print("=" * 50)
 
     uvicorn.run(starlette_app, host=args.host, port=args.port)
\ No newline at end of file
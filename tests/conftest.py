@@ -0,0 +1,24 @@
+import time
+
+import pytest
+
+
+class FakeClock:
+    """替换 time.monotonic：测试中手动推进时间，不必真的等待缓存过期"""
+
+    def __init__(self):
+        self._real = time.monotonic
+        self.offset = 0.0
+
+    def __call__(self) -> float:
+        return self._real() + self.offset
+
+    def advance(self, seconds: float):
+        self.offset += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(time, "monotonic", fake)
+    return fake
@@ -0,0 +1,157 @@
+import os
+
+import pytest
+
+from tools.parsers import cache as cache_module
+from tools.parsers.cache import AnalysisCache, configure_analysis_cache, file_fingerprint
+from tools.parsers.python_parser import PythonParser
+
+
+def _write(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return str(path)
+
+
+class _Counter:
+    """记录被调用次数的 compute 函数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, abspath):
+        self.calls += 1
+        with open(abspath, encoding="utf-8") as f:
+            return f.read()
+
+
+def test_hit_and_miss(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    cache = AnalysisCache()
+    compute = _Counter()
+
+    assert cache.get_or_compute("ns", path, compute) == "alpha"
+    assert cache.get_or_compute("ns", path, compute) == "alpha"
+    assert compute.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_namespaces_are_independent(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    cache = AnalysisCache()
+    fingerprint = file_fingerprint(path)
+    cache.put("imports", path, fingerprint, 1)
+    assert cache.get("symbols", path, fingerprint) == (False, None)
+    assert cache.get("imports", path, fingerprint) == (True, 1)
+
+
+def test_changed_size_is_a_miss(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    cache = AnalysisCache()
+    compute = _Counter()
+    cache.get_or_compute("ns", path, compute)
+
+    _write(path, "alpha, longer")
+    assert cache.get_or_compute("ns", path, compute) == "alpha, longer"
+    assert compute.calls == 2
+
+
+def test_changed_mtime_is_a_miss(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    cache = AnalysisCache()
+    compute = _Counter()
+    cache.get_or_compute("ns", path, compute)
+
+    # 大小相同，只有 mtime 不同
+    _write(path, "omega")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache.get_or_compute("ns", path, compute) == "omega"
+    assert compute.calls == 2
+
+
+def test_lru_eviction(tmp_path):
+    paths = [_write(tmp_path / f"{name}.txt", name) for name in "abc"]
+    cache = AnalysisCache(max_entries=2)
+    for path in paths[:2]:
+        cache.put("ns", path, file_fingerprint(path), path)
+    # 访问 a 后它成为最近使用的条目，写入 c 时淘汰 b
+    assert cache.get("ns", paths[0], file_fingerprint(paths[0]))[0]
+    cache.put("ns", paths[2], file_fingerprint(paths[2]), paths[2])
+
+    assert cache.evictions == 1
+    assert cache.get("ns", paths[0], file_fingerprint(paths[0]))[0]
+    assert not cache.get("ns", paths[1], file_fingerprint(paths[1]))[0]
+    assert cache.get("ns", paths[2], file_fingerprint(paths[2]))[0]
+
+
+def test_invalidate_drops_every_namespace(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    other = _write(tmp_path / "b.txt", "beta")
+    cache = AnalysisCache()
+    for namespace in ("imports", "symbols"):
+        cache.put(namespace, path, file_fingerprint(path), namespace)
+    cache.put("imports", other, file_fingerprint(other), "other")
+
+    cache.invalidate(path)
+    assert not cache.get("imports", path, file_fingerprint(path))[0]
+    assert not cache.get("symbols", path, file_fingerprint(path))[0]
+    assert cache.get("imports", other, file_fingerprint(other)) == (True, "other")
+
+
+def test_compute_errors_are_not_cached(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    cache = AnalysisCache()
+
+    def failing(abspath):
+        raise ValueError("parse error")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("ns", path, failing)
+    assert cache.stats()["entries"] == 0
+
+
+def test_sqlite_round_trip(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    db_path = str(tmp_path / "cache" / "analysis.db")
+    fingerprint = file_fingerprint(path)
+    AnalysisCache(db_path=db_path).put("ns", path, fingerprint, {"imports": ["os", "sys"]})
+
+    # 新实例（相当于服务重启）从磁盘读取
+    restarted = AnalysisCache(db_path=db_path)
+    assert restarted.get("ns", path, fingerprint) == (True, {"imports": ["os", "sys"]})
+    assert restarted.disk_hits == 1
+
+    # 文件变化后磁盘记录不再有效
+    _write(path, "alpha, longer")
+    assert not AnalysisCache(db_path=db_path).get("ns", path, file_fingerprint(path))[0]
+
+
+def test_sqlite_invalidate_and_clear(tmp_path):
+    path = _write(tmp_path / "a.txt", "alpha")
+    db_path = str(tmp_path / "analysis.db")
+    fingerprint = file_fingerprint(path)
+
+    cache = AnalysisCache(db_path=db_path)
+    cache.put("ns", path, fingerprint, 1)
+    cache.invalidate(path)
+    assert not AnalysisCache(db_path=db_path).get("ns", path, fingerprint)[0]
+
+    cache.put("ns", path, fingerprint, 1)
+    cache.clear()
+    assert not AnalysisCache(db_path=db_path).get("ns", path, fingerprint)[0]
+
+
+def test_parser_reuses_cached_imports(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "_analysis_cache", cache_module.get_analysis_cache())
+    cache = configure_analysis_cache()
+    path = _write(tmp_path / "app.py", "import os\n")
+    parser = PythonParser(str(tmp_path))
+
+    first = parser.parse_imports_cached(path)
+    # 返回副本，调用方修改不影响缓存
+    first[0].names.append("changed")
+    second = parser.parse_imports_cached(path)
+    assert [info.module for info in second] == ["os"]
+    assert "changed" not in second[0].names
+    assert (cache.hits, cache.misses) == (1, 1)
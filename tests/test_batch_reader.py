@@ -0,0 +1,67 @@
+import os
+
+from tools.batch_reader import read_files
+
+
+def _write(root, rel, content):
+    path = os.path.join(str(root), rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def _by_name(result):
+    return {os.path.basename(file["filepath"]): file for file in result["files"] if "filepath" in file}
+
+
+def test_reads_files_in_request_order(tmp_path):
+    paths = [_write(tmp_path, name, name * 3) for name in ("b.txt", "a.txt")]
+    result = read_files(paths)
+    assert [file["content"] for file in result["files"]] == ["b.txtb.txtb.txt", "a.txta.txta.txt"]
+    assert result["total_bytes"] == 30
+    assert result["error_count"] == 0 and result["truncated_count"] == 0
+
+
+def test_per_file_budget_truncates_with_cursor(tmp_path):
+    path = _write(tmp_path, "a.txt", "line\n" * 100)
+    result = read_files([path], max_bytes_per_file=50)
+    file = result["files"][0]
+    assert file["truncated"] and file["next_cursor"]
+    assert file["end_byte"] - file["start_byte"] <= 50
+    assert result["total_bytes"] == file["end_byte"]
+
+
+def test_total_budget_is_assigned_in_order(tmp_path):
+    paths = [_write(tmp_path, f"{name}.txt", "x" * 40) for name in "abc"]
+    result = read_files(paths, max_total_bytes=60)
+    files = _by_name(result)
+    assert files["a.txt"]["content"] == "x" * 40 and not files["a.txt"].get("truncated")
+    assert files["b.txt"]["truncated"] and len(files["b.txt"]["content"]) == 20
+    assert files["c.txt"]["skipped"] and "content" not in files["c.txt"]
+    assert result["total_bytes"] == 60
+    assert result["truncated_count"] == 2
+
+
+def test_errors_only_affect_their_file(tmp_path):
+    good = _write(tmp_path, "a.txt", "alpha")
+    result = read_files([str(tmp_path / "missing.txt"), good, str(tmp_path / "*.none")])
+    assert [file["status"] for file in result["files"]] == ["error", "success", "error"]
+    assert result["error_count"] == 2
+
+
+def test_globs_respect_exclusions_and_max_files(tmp_path):
+    _write(tmp_path, ".gitignore", "generated/\n")
+    for rel in ("src/a.py", "src/b.py", "src/sub/c.py", "generated/d.py", "node_modules/e.py"):
+        _write(tmp_path, rel, "pass\n")
+    result = read_files([str(tmp_path / "**" / "*.py")])
+    assert sorted(_by_name(result)) == ["a.py", "b.py", "c.py"]
+
+    limited = read_files([str(tmp_path / "**" / "*.py"), str(tmp_path / "src" / "a.py")], max_files=2)
+    assert limited["file_count"] == 2 and limited["max_files_reached"]
+
+
+def test_duplicates_are_read_once(tmp_path):
+    path = _write(tmp_path, "a.txt", "alpha")
+    result = read_files([path, str(tmp_path / "." / "a.txt"), str(tmp_path / "*.txt")])
+    assert result["file_count"] == 1
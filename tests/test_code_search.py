@@ -0,0 +1,82 @@
+import os
+import re
+
+from tools import code_search
+from tools.code_search import TrigramIndex, plan_query, search_code
+
+
+def test_plan_extracts_literal_runs():
+    assert plan_query("hello") == ("lit", b"hello")
+    assert plan_query("foo.*bar") == ("and", [("lit", b"foo"), ("lit", b"bar")])
+
+
+def test_plan_without_three_char_literal_is_unconstrained():
+    assert plan_query("ab") is None
+    assert plan_query("[a-z]+") is None
+
+
+def test_plan_optional_and_repeated_groups():
+    # 可以不出现的分组不提供约束，至少重复一次的分组提供约束
+    assert plan_query("x(abc)?") is None
+    assert plan_query("(abc)+") == ("lit", b"abc")
+
+
+def test_plan_alternation_requires_every_branch():
+    assert plan_query("(?:alpha|beta)") == ("or", [("lit", b"alpha"), ("lit", b"beta")])
+    assert plan_query("foo|.*") is None
+
+
+def test_plan_is_lowercased_and_skips_non_ascii_under_ignorecase():
+    assert plan_query("HeLLo", re.IGNORECASE) == ("lit", b"hello")
+    assert plan_query("中文", re.IGNORECASE) is None
+
+
+def test_candidates_never_drop_a_matching_file(tmp_path):
+    files = {
+        "a.py": "def alpha_handler(): pass\n",
+        "b.py": "BETA_VALUE = 1\n",
+        "c.py": "nothing here\n",
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_text(content)
+    index = TrigramIndex(str(tmp_path))
+    index.build()
+
+    for pattern, flags in [("alpha_handler", 0), ("beta", re.IGNORECASE), ("(?:alpha|BETA)", 0), ("here$", re.M)]:
+        regex = re.compile(pattern, flags)
+        candidates = {name for name in files if str(tmp_path / name) in index.candidates(plan_query(pattern, flags))}
+        matching = {name for name, content in files.items() if regex.search(content)}
+        assert matching <= candidates, pattern
+    assert index.candidates(plan_query("missing_symbol")) == []
+
+
+def test_plan_falls_back_to_full_scan_without_regex_internals(monkeypatch):
+    monkeypatch.setattr(code_search, "sre_parse", None)
+    assert plan_query("hello") is None
+
+
+def test_search_scans_files_too_large_to_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(code_search, "MAX_INDEXED_BYTES", 64)
+    (tmp_path / "small.py").write_text("needle = 1\n")
+    (tmp_path / "large.py").write_text("x = 1\n" * 50 + "needle()\n")
+    (tmp_path / "blob.py").write_bytes(b"\0" * 100 + b"needle")
+
+    result = search_code(str(tmp_path), "needle")
+    assert [(match["path"], match["line"]) for match in result["matches"]] == [("large.py", 51), ("small.py", 1)]
+    assert result["large_files_scanned"] == 2
+
+
+def test_index_is_not_persisted_unless_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(code_search, "_index_dir", None)
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text("needle = 1\n")
+    search_code(str(project), "needle")
+    assert code_search.get_search_index_cache().indexes()[-1].index_path is None
+
+    index_dir = tmp_path / "index"
+    index = TrigramIndex(str(project), index_dir=str(index_dir))
+    index.build()
+    assert os.path.exists(index.index_path)
+    restored = TrigramIndex(str(project), index_dir=str(index_dir))
+    assert restored.load() and restored.candidates(plan_query("needle")) == [str(project / "a.py")]
@@ -0,0 +1,108 @@
+import os
+
+from tools.compact import IMPORT_COLUMNS, StringTable, compact_analysis, relative_path
+from tools.file_analyzer import analyze_file_imports, get_dependency_tree
+
+
+def _write(root, rel, content=""):
+    path = os.path.join(str(root), rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def _expand_path(compact, index, root):
+    if index is None:
+        return None
+    path = compact["strings"][index]
+    return path if os.path.isabs(path) or root is None else os.path.join(root, path)
+
+
+def _expand(compact, root=None):
+    """把紧凑格式还原为 analyze_file_imports 的完整格式中的对应字段"""
+    strings = compact["strings"]
+    details = []
+    for row in compact["imports"]:
+        record = dict(zip(compact["import_columns"], row))
+        record["module"] = strings[record["module"]]
+        record["resolved_path"] = _expand_path(compact, record["resolved_path"], root)
+        details.append(record)
+    return {
+        "filepath": _expand_path(compact, compact["filepath"], root),
+        "local_imports": [_expand_path(compact, index, root) for index in compact["local_imports"]],
+        "external_imports": [strings[index] for index in compact["external_imports"]],
+        "import_details": details,
+    }
+
+
+def _project(tmp_path):
+    root = str(tmp_path)
+    _write(root, "pkg/__init__.py")
+    _write(root, "pkg/models.py")
+    app = _write(root, "app.py", "import os\nfrom pkg import models\nfrom pkg.models import A, B\nimport pkg.models\n")
+    return root, app
+
+
+def _full_fields(full):
+    return {
+        "filepath": full["filepath"],
+        "local_imports": full["local_imports"],
+        "external_imports": full["external_imports"],
+        "import_details": [
+            {key: detail[key] for key in IMPORT_COLUMNS} for detail in full["import_details"]
+        ],
+    }
+
+
+def test_string_table_deduplicates():
+    table = StringTable()
+    assert [table.add(value) for value in ("a", "b", "a")] == [0, 1, 0]
+    assert table.strings == ["a", "b"]
+
+
+def test_relative_path_keeps_outside_paths_absolute(tmp_path):
+    base = str(tmp_path / "project")
+    assert relative_path(os.path.join(base, "a", "b.py"), base) == os.path.join("a", "b.py")
+    assert relative_path(str(tmp_path / "other.py"), base) == str(tmp_path / "other.py")
+
+
+def test_compact_round_trip(tmp_path):
+    root, app = _project(tmp_path)
+    full = analyze_file_imports(app, root)
+    compact = analyze_file_imports(app, root, output_format="compact")
+    assert compact["format"] == "compact" and compact["status"] == "success"
+    assert _expand(compact) == _full_fields(full)
+    # 重复出现的路径和模块名只保存一次
+    assert len(compact["strings"]) == len(set(compact["strings"]))
+
+
+def test_compact_relative_round_trip(tmp_path):
+    root, app = _project(tmp_path)
+    full = analyze_file_imports(app, root)
+    compact = analyze_file_imports(app, root, output_format="compact", relative_paths=True)
+    assert all(not os.path.isabs(value) for value in compact["strings"] if value.endswith(".py"))
+    assert _expand(compact, root) == _full_fields(full)
+
+
+def test_compact_analysis_of_failed_file(tmp_path):
+    root = str(tmp_path)
+    broken = _write(root, "broken.py", "def (:\n")
+    compact = analyze_file_imports(broken, root, output_format="compact")
+    full = analyze_file_imports(broken, root)
+    assert compact["status"] == full["status"]
+    assert compact.get("error") == full["error"]
+
+
+def test_compact_dependency_graph_matches_flat_graph(tmp_path):
+    root, app = _project(tmp_path)
+    flat = get_dependency_tree(app, project_root=root, output_format="graph")["graph"]
+    compact = get_dependency_tree(app, project_root=root, output_format="compact")["graph"]
+    strings = compact["strings"]
+    assert [strings[entry["path"]] for entry in compact["files"]] == [node["filepath"] for node in flat["nodes"]]
+    assert compact["edges"] == flat["edges"]
+    assert compact["cycles"] == flat["cycles"]
+
+
+def test_unknown_output_format():
+    assert analyze_file_imports("a.py", output_format="xml")["status"] == "error"
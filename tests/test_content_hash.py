@@ -0,0 +1,79 @@
+import os
+import time
+
+import pytest
+
+from tools import content_hash
+from tools.content_hash import ContentHashCache
+from tools.file_analyzer import get_file_content
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """每个测试使用独立的哈希缓存"""
+    cache = ContentHashCache()
+    monkeypatch.setattr(content_hash, "_content_hash_cache", cache)
+    return cache
+
+
+def _write(path, content, age=60):
+    """写入文件并把 mtime 设为 age 秒之前（age=0 表示刚修改，处于不可信的时间窗口内）"""
+    path.write_text(content)
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return str(path)
+
+
+def test_full_read_returns_hash_and_not_modified(tmp_path, hashes):
+    path = _write(tmp_path / "a.txt", "alpha\nbeta\n")
+    first = get_file_content(path)
+    assert first["content"] == "alpha\nbeta\n" and first["content_hash"]
+
+    second = get_file_content(path, if_none_match=first["content_hash"])
+    assert second["not_modified"] and "content" not in second
+
+
+def test_partial_ranged_read_does_not_hash_whole_file(tmp_path, hashes):
+    path = _write(tmp_path / "a.txt", "".join(f"line {number}\n" for number in range(1000)))
+    result = get_file_content(path, start_line=10, end_line=20, max_bytes=1_000_000)
+    assert result["content"].startswith("line 9\n")
+    assert result["content_hash"] is None
+    # 没有为此计算整个文件的哈希
+    assert hashes.stats()["entries"] == 0
+
+
+def test_ranged_read_covering_whole_file_returns_hash(tmp_path, hashes):
+    path = _write(tmp_path / "a.txt", "alpha\n")
+    assert get_file_content(path, max_bytes=1_000_000)["content_hash"] == get_file_content(path)["content_hash"]
+
+
+def test_ranged_read_with_if_none_match(tmp_path, hashes):
+    path = _write(tmp_path / "a.txt", "".join(f"line {number}\n" for number in range(1000)))
+    etag = get_file_content(path)["content_hash"]
+    hashes.clear()
+
+    assert get_file_content(path, start_line=1, end_line=2, if_none_match=etag)["not_modified"]
+    _write(tmp_path / "a.txt", "changed\n")
+    result = get_file_content(path, start_line=1, end_line=2, if_none_match=etag)
+    assert not result["not_modified"] and result["content"] == "changed\n"
+    assert result["content_hash"] != etag
+
+
+def test_cursor_read_ignores_if_none_match(tmp_path, hashes):
+    path = _write(tmp_path / "a.txt", "x" * 1000)
+    etag = get_file_content(path)["content_hash"]
+    page = get_file_content(path, max_bytes=100)
+    result = get_file_content(path, cursor=page["next_cursor"], max_bytes=100, if_none_match=etag)
+    assert not result["not_modified"] and len(result["content"]) == 100
+
+
+def test_racy_hash_is_reused_but_not_trusted(tmp_path, hashes):
+    path = _write(tmp_path / "a.txt", "alpha\n", age=0)
+    first = get_file_content(path)
+    assert hashes.lookup(path, os.stat(path)) is None
+    assert hashes.lookup(path, os.stat(path), allow_racy=True) == first["content_hash"]
+
+    # 文件刚被修改时 not_modified 由实际读取的内容决定
+    second = get_file_content(path, if_none_match=first["content_hash"])
+    assert second["not_modified"]
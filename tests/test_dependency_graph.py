@@ -0,0 +1,47 @@
+import sys
+
+from tools.dependency_graph import DependencyGraph
+
+
+def _graph(edges, count=None):
+    """按邻接关系构造依赖图，节点路径为 n0、n1 ..."""
+    count = count if count is not None else 1 + max([node for edge in edges for node in edge], default=-1)
+    graph = DependencyGraph()
+    for node in range(count):
+        graph.add_node(f"n{node}")
+    for node, child in edges:
+        graph.add_edge(node, child)
+    return graph
+
+
+def _components(graph):
+    return sorted(sorted(component) for component in graph.strongly_connected_components())
+
+
+def test_scc_separates_cycles_from_acyclic_nodes():
+    graph = _graph([(0, 1), (1, 2), (2, 0), (2, 3), (3, 4), (4, 3), (5, 0)])
+    assert _components(graph) == [[0, 1, 2], [3, 4], [5]]
+    assert graph.cycles() == [[0, 1, 2], [3, 4]]
+
+
+def test_diamond_is_not_a_cycle():
+    graph = _graph([(0, 1), (0, 2), (1, 3), (2, 3)])
+    assert _components(graph) == [[0], [1], [2], [3]]
+    assert graph.cycles() == []
+
+
+def test_self_import_is_a_cycle():
+    graph = _graph([(0, 0), (0, 1)])
+    assert graph.cycles() == [[0]]
+
+
+def test_components_are_emitted_in_reverse_topological_order():
+    graph = _graph([(0, 1), (1, 2), (2, 1), (2, 3)])
+    order = [sorted(component) for component in graph.strongly_connected_components()]
+    assert order == [[3], [1, 2], [0]]
+
+
+def test_deep_chain_does_not_hit_recursion_limit():
+    depth = sys.getrecursionlimit() * 3
+    graph = _graph([(node, node + 1) for node in range(depth - 1)] + [(depth - 1, 0)])
+    assert graph.cycles() == [list(range(depth))]
@@ -0,0 +1,83 @@
+import os
+
+from tools.directory_analyzer import find_entry_files, find_source_files, is_discoverable, source_file_matcher
+from tools.exclusion import ExclusionMatcher, compile_path_glob
+
+
+def _write(root, rel, content=""):
+    path = os.path.join(str(root), rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_exact_names_globs_and_paths(tmp_path):
+    matcher = ExclusionMatcher(["node_modules", "*.egg-info", "docs/build"], root=str(tmp_path))
+    assert matcher.is_excluded(str(tmp_path / "node_modules"), True)
+    assert matcher.is_excluded(str(tmp_path / "pkg.egg-info"), True)
+    assert matcher.is_excluded(str(tmp_path / "docs" / "build"), True)
+    assert not matcher.is_excluded(str(tmp_path / "build"), True)
+    assert not matcher.is_excluded(str(tmp_path / "src"), True)
+
+
+def test_hidden_entries(tmp_path):
+    assert ExclusionMatcher(root=str(tmp_path)).is_excluded(str(tmp_path / ".env"))
+    assert not ExclusionMatcher(root=str(tmp_path), show_hidden=True).is_excluded(str(tmp_path / ".env"))
+
+
+def test_gitignore_rules(tmp_path):
+    _write(tmp_path, ".gitignore", "\n".join([
+        "# 注释",
+        "*.log",
+        "!keep.log",
+        "/generated",
+        "cache/",
+        "docs/**/tmp",
+    ]))
+    matcher = ExclusionMatcher(root=str(tmp_path), respect_gitignore=True)
+
+    def excluded(rel, is_dir=False):
+        return matcher.is_excluded(os.path.join(str(tmp_path), rel), is_dir)
+
+    assert excluded("debug.log") and excluded("sub/debug.log")
+    # 后出现的取反规则优先
+    assert not excluded("keep.log")
+    # 以 / 开头的模式只匹配根目录下
+    assert excluded("generated", True) and not excluded("src/generated", True)
+    # 以 / 结尾的模式只匹配目录
+    assert excluded("cache", True) and not excluded("cache")
+    assert excluded("docs/a/b/tmp", True) and excluded("docs/tmp", True)
+    assert not ExclusionMatcher(root=str(tmp_path)).is_excluded(str(tmp_path / "debug.log"))
+
+
+def test_compile_path_glob():
+    regex = compile_path_glob("src/**/*.py")
+    assert regex.match("src/a.py") and regex.match("src/a/b/c.py")
+    assert not regex.match("src/a.pyc") and not regex.match("lib/a.py")
+
+
+def test_find_source_files_skips_excluded_trees(tmp_path):
+    _write(tmp_path, ".gitignore", "vendor/\n")
+    for rel in ("src/app.py", "vendor/lib.py", "node_modules/x.py", ".hidden/y.py", "build/z.py"):
+        _write(tmp_path, rel)
+    assert find_source_files(str(tmp_path), [".py"]) == [str(tmp_path / "src" / "app.py")]
+    assert str(tmp_path / "vendor" / "lib.py") in find_source_files(str(tmp_path), [".py"], respect_gitignore=False)
+
+
+def test_is_discoverable_matches_find_source_files(tmp_path):
+    _write(tmp_path, ".gitignore", "vendor/\n")
+    paths = [_write(tmp_path, rel) for rel in ("src/app.py", "vendor/lib.py", "src/build/gen.py", "src/.cache/c.py")]
+    matcher = source_file_matcher(str(tmp_path))
+    found = set(find_source_files(str(tmp_path), None))
+    assert {path for path in paths if is_discoverable(matcher, str(tmp_path), path)} == found & set(paths)
+    assert not is_discoverable(matcher, str(tmp_path), str(tmp_path.parent / "outside.py"))
+
+
+def test_find_entry_files_respects_gitignore(tmp_path):
+    _write(tmp_path, ".gitignore", "third_party/\n")
+    for rel in ("main.py", "pkg/__main__.py", "third_party/main.py", "node_modules/app/index.js", "venv/run.py"):
+        _write(tmp_path, rel)
+    result = find_entry_files(str(tmp_path))
+    assert sorted(entry["relative_path"] for entry in result["entry_files"]) == \
+        sorted(["main.py", os.path.join("pkg", "__main__.py")])
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from tools.file_reader import _decode_cursor, _encode_cursor, read_file_range
+
+
+def test_cursor_round_trip():
+    state = {"o": 1024, "l": 17, "el": None, "eb": 4096, "m": 1700000000123456789, "s": 8192}
+    cursor = _encode_cursor(state)
+    assert cursor.isascii() and "/" not in cursor and "+" not in cursor
+    assert _decode_cursor(cursor) == state
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        _decode_cursor("not a cursor")
+
+
+def test_cursor_pages_through_whole_file(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("".join(f"line {number}\n" for number in range(1, 201)))
+
+    chunks = []
+    result = read_file_range(str(path), max_bytes=100)
+    chunks.append(result["content"])
+    while result["next_cursor"]:
+        # 按行读取时每一页都以整行结束
+        assert result["content"].endswith("\n")
+        result = read_file_range(str(path), cursor=result["next_cursor"], max_bytes=100)
+        assert result["start_line"] == int(chunks[-1].splitlines()[-1].split()[1]) + 1
+        chunks.append(result["content"])
+    assert "".join(chunks) == path.read_text()
+
+
+def test_cursor_is_invalidated_by_modification(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("x" * 1000)
+    result = read_file_range(str(path), max_bytes=100)
+    path.write_text("y" * 2000)
+    with pytest.raises(ValueError):
+        read_file_range(str(path), cursor=result["next_cursor"])
@@ -0,0 +1,73 @@
+import os
+
+from tools.file_analyzer import find_dependents
+from tools.parsers.project_root import UNWATCHED_TTL
+
+
+def _write(root, rel, content=""):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def _chain(tmp_path):
+    """app -> services -> models，cli -> models"""
+    root = str(tmp_path)
+    _write(root, "app.py", "import services\n")
+    _write(root, "services.py", "import models\n")
+    _write(root, "cli.py", "import models\n")
+    return root, _write(root, "models.py", "import os\n")
+
+
+def _dependents(result):
+    return sorted((item["path"], item["depth"], item["via"]) for item in result["dependents"])
+
+
+def test_transitive_dependents_with_depth(tmp_path):
+    root, models = _chain(tmp_path)
+    result = find_dependents(models, max_depth=None, dirpath=root, project_root=root)
+    assert result["indexed"]
+    assert _dependents(result) == [
+        ("app.py", 2, "services.py"),
+        ("cli.py", 1, "models.py"),
+        ("services.py", 1, "models.py"),
+    ]
+
+    direct = find_dependents(models, max_depth=1, dirpath=root, project_root=root)
+    assert _dependents(direct) == [("cli.py", 1, "models.py"), ("services.py", 1, "models.py")]
+
+
+def test_existing_index_is_used_for_files_inside_it(tmp_path):
+    root, models = _chain(tmp_path)
+    find_dependents(models, dirpath=root, project_root=root)
+
+    # 不传 dirpath 时使用已建立的包含该文件的索引
+    result = find_dependents(os.path.join(root, "services.py"), max_depth=None)
+    assert result["project"] == root
+    assert not result["index"]["rebuilt"]
+    assert _dependents(result) == [("app.py", 1, "services.py")]
+
+
+def test_file_outside_index_is_reported(tmp_path):
+    root, _ = _chain(tmp_path)
+    result = find_dependents(os.path.join(root, "missing.py"), dirpath=root, project_root=root)
+    assert result["status"] == "success"
+    assert not result["indexed"] and result["dependents"] == []
+
+
+def test_unwatched_index_sees_new_importer_after_ttl(tmp_path, clock):
+    root, models = _chain(tmp_path)
+    find_dependents(models, dirpath=root, project_root=root)
+
+    _write(root, "jobs.py", "import models\n")
+    clock.advance(UNWATCHED_TTL + 1)
+    result = find_dependents(models, max_depth=1, dirpath=root, project_root=root)
+    assert result["index"]["rebuilt"]
+    assert ("jobs.py", 1, "models.py") in _dependents(result)
+
+
+def test_errors(tmp_path):
+    assert find_dependents(str(tmp_path / "a.txt"))["status"] == "error"
+    assert find_dependents(str(tmp_path / "a.py"), dirpath=str(tmp_path / "missing"))["status"] == "error"
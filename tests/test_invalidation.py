@@ -0,0 +1,180 @@
+import os
+import time
+
+import pytest
+
+from tools.content_hash import get_content_hash_cache
+from tools.directory_analyzer import list_directory
+from tools.file_analyzer import analyze_file_imports, find_dependents, get_dependency_tree, get_file_content
+from tools.invalidation import handle_events, unwatch_project
+from tools.parsers.project_root import UNWATCHED_TTL
+from tools.watcher import watch
+
+# 等待轮询监听产生事件的上限（小于 UNWATCHED_TTL，且测试中时钟不前进，结果变化只能来自文件事件）
+EVENT_TIMEOUT = 3.0
+
+
+@pytest.fixture(params=["unwatched", "watched"])
+def project(request, tmp_path, clock):
+    """同一组场景分别在未被监听和被监听（轮询后端）的项目目录中运行"""
+    root = str(tmp_path)
+    if request.param == "watched":
+        watch(root, handle_events, interval=0.05, backend="polling")
+        request.addfinalizer(lambda: unwatch_project(root))
+    return request.param, root
+
+
+def _expect(project, clock, check):
+    """
+    未被监听的项目：推进时钟使短期记录过期后立即满足；
+    被监听的项目：时钟不动，在 EVENT_TIMEOUT 内由文件事件使结果满足
+    """
+    mode, _ = project
+    if mode == "unwatched":
+        clock.advance(UNWATCHED_TTL + 1)
+        assert check()
+        return
+    deadline = time.time() + EVENT_TIMEOUT
+    while not check():
+        assert time.time() < deadline, "文件事件没有使缓存失效"
+        time.sleep(0.05)
+
+
+def _write(path, content=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def test_python_import_follows_module_create_and_delete(project, clock):
+    _, root = project
+    app = os.path.join(root, "app.py")
+    helper = os.path.join(root, "helper.py")
+    _write(app, "import helper\n")
+
+    def imports():
+        result = analyze_file_imports(app, root)
+        return result["local_imports"], result["external_imports"]
+
+    assert imports() == ([], ["helper"])
+
+    _write(helper, "VALUE = 1\n")
+    _expect(project, clock, lambda: imports() == ([helper], []))
+
+    os.remove(helper)
+    _expect(project, clock, lambda: imports() == ([], ["helper"]))
+
+
+def test_python_package_init_create_and_delete(project, clock):
+    _, root = project
+    app = os.path.join(root, "app.py")
+    init = os.path.join(root, "pkg", "__init__.py")
+    _write(app, "from pkg import mod\n")
+    _write(os.path.join(root, "pkg", "mod.py"))
+
+    def local_imports():
+        return analyze_file_imports(app, root)["local_imports"]
+
+    assert local_imports() == []
+
+    _write(init)
+    _expect(project, clock, lambda: local_imports() == [init])
+
+    os.remove(init)
+    _expect(project, clock, lambda: local_imports() == [])
+
+
+def test_java_class_create_and_delete(project, clock):
+    _, root = project
+    package_dir = os.path.join(root, "src", "main", "java", "com", "example")
+    app = os.path.join(package_dir, "App.java")
+    helper = os.path.join(package_dir, "util", "Helper.java")
+    _write(app, "package com.example;\nimport com.example.util.Helper;\npublic class App {}\n")
+
+    def imports():
+        result = analyze_file_imports(app, root)
+        return result["local_imports"], result["external_imports"]
+
+    assert imports() == ([], ["com.example.util.Helper"])
+
+    _write(helper, "package com.example.util;\npublic class Helper {}\n")
+    _expect(project, clock, lambda: imports() == ([os.path.normcase(helper)], []))
+
+    os.remove(helper)
+    _expect(project, clock, lambda: imports() == ([], ["com.example.util.Helper"]))
+
+
+def test_content_hash_follows_recreated_file(project, clock):
+    _, root = project
+    path = os.path.join(root, "data.txt")
+    _write(path, "first version\n")
+    first = get_file_content(path)["content_hash"]
+
+    os.remove(path)
+    assert get_file_content(path)["status"] == "error"
+
+    _write(path, "second, longer version\n")
+    result = get_file_content(path, if_none_match=first)
+    assert not result["not_modified"]
+    assert result["content"] == "second, longer version\n"
+    assert result["content_hash"] != first
+    assert get_content_hash_cache().lookup(os.path.abspath(path), os.stat(path), allow_racy=True) \
+        == result["content_hash"]
+
+
+def test_rewatch_does_not_serve_caches_from_before_unwatch(tmp_path, clock):
+    root = str(tmp_path)
+    app = os.path.join(root, "app.py")
+    helper = os.path.join(root, "helper.py")
+    other = os.path.join(root, "other.py")
+    _write(app, "import helper\n")
+    _write(helper)
+
+    def listed():
+        return [entry["name"] for entry in list_directory(root)["children"]["files"]]
+
+    def dependencies():
+        graph = get_dependency_tree(app, project_root=root, output_format="graph")["graph"]
+        return sorted(os.path.basename(node["filepath"]) for node in graph["nodes"])
+
+    def dependents():
+        return [os.path.basename(item["path"]) for item in find_dependents(other, dirpath=root, project_root=root)["dependents"]]
+
+    watch(root, handle_events, interval=0.05, backend="polling")
+    try:
+        assert listed() == ["app.py", "helper.py"]
+        assert dependencies() == ["app.py", "helper.py"]
+        assert dependents() == []
+    finally:
+        unwatch_project(root)
+
+    # 停止监听期间的修改不会产生事件，重新监听后也不会补发
+    _write(other)
+    _write(app, "import helper\nimport other\n")
+    watch(root, handle_events, interval=0.05, backend="polling")
+    try:
+        assert listed() == ["app.py", "helper.py", "other.py"]
+        assert dependencies() == ["app.py", "helper.py", "other.py"]
+        assert dependents() == ["app.py"]
+    finally:
+        unwatch_project(root)
+
+
+def test_watched_java_index_picks_up_new_source_root(tmp_path, clock):
+    root = str(tmp_path)
+    app = os.path.join(root, "app", "src", "main", "java", "com", "example", "App.java")
+    library = os.path.join(root, "lib", "src", "main", "java", "com", "example", "lib", "Lib.java")
+    _write(app, "package com.example;\nimport com.example.lib.Lib;\npublic class App {}\n")
+
+    def imports():
+        result = analyze_file_imports(app, root)
+        return result["local_imports"], result["external_imports"]
+
+    watch(root, handle_events, interval=0.05, backend="polling")
+    try:
+        assert imports() == ([], ["com.example.lib.Lib"])
+        # 新增的模块带来新的源码根目录，不在已建立的索引中
+        _write(library, "package com.example.lib;\npublic class Lib {}\n")
+        _expect(("watched", root), clock, lambda: imports() == ([os.path.normcase(library)], []))
+    finally:
+        unwatch_project(root)
@@ -0,0 +1,49 @@
+from tools.parsers.java_parser import scan_java_header
+
+
+def _write(tmp_path, source, name="Sample.java"):
+    path = tmp_path / name
+    path.write_text(source, encoding="utf-8")
+    return str(path)
+
+
+def test_package_and_import_kinds(tmp_path):
+    path = _write(tmp_path, (
+        "package com.example.app;\n"
+        "import java.util.List;\n"
+        "import static java.lang.Math.max;\n"
+        "import com.example.util.*;\n"
+        "public class Sample {}\n"
+    ))
+    assert scan_java_header(path) == ("com.example.app", [
+        ("java.util.List", False, False),
+        ("java.lang.Math.max", True, False),
+        ("com.example.util", False, True),
+    ])
+
+
+def test_comments_strings_and_annotations_are_ignored(tmp_path):
+    path = _write(tmp_path, (
+        "/* import fake.Block; */\n"
+        "@Deprecated\n"
+        "package com.example;\n"
+        "// import fake.Line;\n"
+        "import java.io.File; // import fake.Trailing;\n"
+        "class Sample { String s = \"import fake.String;\"; }\n"
+    ))
+    assert scan_java_header(path) == ("com.example", [("java.io.File", False, False)])
+
+
+def test_statement_split_across_lines(tmp_path):
+    path = _write(tmp_path, "import\n    com.example.multi\n    .Line;\nclass Sample {}\n")
+    assert scan_java_header(path) == (None, [("com.example.multi.Line", False, False)])
+
+
+def test_stops_at_first_type_declaration(tmp_path):
+    path = _write(tmp_path, "import a.B;\ninterface Sample {}\nimport c.D;\n")
+    assert scan_java_header(path) == (None, [("a.B", False, False)])
+
+
+def test_module_declaration_has_no_imports(tmp_path):
+    path = _write(tmp_path, "module com.foo {\n    requires java.base;\n}\n", name="module-info.java")
+    assert scan_java_header(path) == (None, [])
@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+from tools import project_index
+from tools.project_index import ProjectIndex
+from tools.parsers.project_root import UNWATCHED_TTL
+
+
+def _write(root, rel, content=""):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def _snapshot(index):
+    """与节点编号无关的图内容：(文件, 本地导入) 和外部导入"""
+    graph = index.graph
+    edges = sorted(
+        (os.path.basename(graph.paths[node]), os.path.basename(graph.paths[child]))
+        for node, children in enumerate(graph.edges) for child in children
+    )
+    external = sorted(
+        (os.path.basename(path), tuple(info["external_imports"]))
+        for path, info in zip(graph.paths, graph.nodes) if info is not None
+    )
+    return edges, external
+
+
+def _fresh(root):
+    index = ProjectIndex(root, project_root=root)
+    index.build(workers=1)
+    return index
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path)
+    _write(root, "app.py", "import models\nimport services\n")
+    _write(root, "models.py", "import os\n")
+    _write(root, "services.py", "import models\n")
+    return root
+
+
+@pytest.fixture
+def walks(monkeypatch):
+    """统计遍历目录的次数"""
+    counter = {"count": 0}
+    discover = project_index.discover_source_files
+
+    def counting(*args, **kwargs):
+        counter["count"] += 1
+        return discover(*args, **kwargs)
+
+    monkeypatch.setattr(project_index, "discover_source_files", counting)
+    return counter
+
+
+@pytest.fixture
+def watched(monkeypatch):
+    monkeypatch.setattr(project_index, "is_watched", lambda path: True)
+
+
+def test_build_indexes_forward_and_reverse_edges(project):
+    index = _fresh(project)
+    assert index.files == [os.path.join(project, name) for name in ("app.py", "models.py", "services.py")]
+    assert _snapshot(index)[0] == [("app.py", "models.py"), ("app.py", "services.py"), ("services.py", "models.py")]
+    dependents = index.dependents(os.path.join(project, "models.py"))
+    assert sorted((os.path.basename(item["filepath"]), item["depth"]) for item in dependents) == \
+        [("app.py", 1), ("services.py", 1)]
+
+
+def test_watched_modify_and_create_update_in_place(project, walks, watched):
+    index = _fresh(project)
+    walks["count"] = 0
+
+    _write(project, "services.py", "import models\nimport cache\n")
+    index.mark_changed("modified", os.path.join(project, "services.py"))
+    cache = _write(project, "cache.py", "import models\n")
+    index.mark_changed("created", cache)
+    assert index.refresh()
+
+    assert walks["count"] == 0
+    assert _snapshot(index) == _snapshot(_fresh(project))
+    assert cache in index.files
+    assert index.graph.reused_count == 2
+
+
+def test_watched_delete_rebuilds_without_walking(project, walks, watched):
+    index = _fresh(project)
+    walks["count"] = 0
+
+    os.remove(os.path.join(project, "models.py"))
+    index.mark_changed("deleted", os.path.join(project, "models.py"))
+    assert index.refresh()
+
+    assert walks["count"] == 0
+    assert os.path.join(project, "models.py") not in index.files
+    assert index.graph.node_id(os.path.join(project, "models.py")) is None
+    assert _snapshot(index) == _snapshot(_fresh(project))
+
+
+def test_watched_created_file_in_excluded_directory_is_ignored(project, watched):
+    index = _fresh(project)
+    vendored = _write(project, "node_modules/lib.py", "import models\n")
+    index.mark_changed("created", vendored)
+    index.refresh()
+    assert vendored not in index.files
+
+
+def test_watched_directory_event_falls_back_to_walk(project, walks, watched):
+    index = _fresh(project)
+    walks["count"] = 0
+
+    _write(project, "pkg/__init__.py")
+    index.mark_changed("created", os.path.join(project, "pkg"), True)
+    assert index.refresh()
+    assert walks["count"] == 1
+    assert os.path.join(project, "pkg", "__init__.py") in index.files
+
+
+def test_unwatched_validation_is_throttled(project, walks, clock, monkeypatch):
+    index = _fresh(project)
+    walks["count"] = 0
+    stats = []
+    fingerprint = project_index.file_fingerprint
+    monkeypatch.setattr(project_index, "file_fingerprint", lambda path: stats.append(path) or fingerprint(path))
+
+    _write(project, "cache.py", "import models\n")
+    # UNWATCHED_TTL 之内直接使用已建立的索引，不检查文件
+    assert not index.refresh()
+    assert stats == [] and walks["count"] == 0
+
+    clock.advance(UNWATCHED_TTL + 1)
+    assert index.refresh()
+    assert os.path.join(project, "cache.py") in index.files
+    assert _snapshot(index) == _snapshot(_fresh(project))
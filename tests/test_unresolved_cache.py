@@ -0,0 +1,89 @@
+import os
+
+from tools.parsers import unresolved as unresolved_module
+from tools.parsers.project_root import UNWATCHED_TTL
+from tools.parsers.unresolved import UnresolvedImportCache
+
+KEY = ("PythonImportParser", "requests", 0)
+
+
+def test_contains_after_add(tmp_path):
+    cache = UnresolvedImportCache()
+    directory = str(tmp_path)
+    assert not cache.contains(directory, KEY)
+    cache.add(directory, KEY)
+    assert cache.contains(directory, KEY)
+    assert not cache.contains(directory, ("PythonImportParser", "numpy", 0))
+    assert not cache.contains(str(tmp_path / "other"), KEY)
+    stats = cache.stats()
+    assert (stats["directories"], stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1, 3)
+
+
+def test_unwatched_entries_expire(tmp_path, clock):
+    cache = UnresolvedImportCache()
+    directory = str(tmp_path)
+    cache.add(directory, KEY)
+    clock.advance(UNWATCHED_TTL - 1)
+    assert cache.contains(directory, KEY)
+    clock.advance(2)
+    assert not cache.contains(directory, KEY)
+    # 过期后重新加入的记录从新的有效期开始，不保留旧的条目
+    cache.add(directory, ("PythonImportParser", "numpy", 0))
+    assert not cache.contains(directory, KEY)
+
+
+def test_watched_entries_do_not_expire(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(unresolved_module, "is_watched", lambda path: True)
+    cache = UnresolvedImportCache()
+    cache.add(str(tmp_path), KEY)
+    clock.advance(UNWATCHED_TTL * 100)
+    assert cache.contains(str(tmp_path), KEY)
+
+
+def test_invalidate_clears_ancestor_directories(tmp_path):
+    cache = UnresolvedImportCache()
+    root = str(tmp_path)
+    package = os.path.join(root, "pkg")
+    sibling = os.path.join(root, "other")
+    for directory in (root, package, sibling):
+        cache.add(directory, KEY)
+
+    cache.invalidate(os.path.join(package, "requests.py"))
+    assert not cache.contains(root, KEY)
+    assert not cache.contains(package, KEY)
+    # 兄弟目录下的解析结果不受影响
+    assert cache.contains(sibling, KEY)
+
+
+def test_invalidate_tree(tmp_path):
+    cache = UnresolvedImportCache()
+    root = str(tmp_path / "project")
+    outside = str(tmp_path / "project2")
+    for directory in (root, os.path.join(root, "pkg"), outside):
+        cache.add(directory, KEY)
+
+    cache.invalidate_tree(root)
+    assert not cache.contains(root, KEY)
+    assert not cache.contains(os.path.join(root, "pkg"), KEY)
+    assert cache.contains(outside, KEY)
+
+
+def test_top_level_names_follow_invalidate(tmp_path):
+    cache = UnresolvedImportCache()
+    root = str(tmp_path)
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "json.py").write_text("")
+    (tmp_path / "notes.txt").write_text("")
+    assert cache.top_level_names(root) == {"pkg", "json"}
+
+    # 未失效前复用缓存的名称
+    new_module = tmp_path / "logging.py"
+    new_module.write_text("")
+    assert "logging" not in cache.top_level_names(root)
+
+    cache.invalidate(str(new_module))
+    assert "logging" in cache.top_level_names(root)
+
+
+def test_top_level_names_of_missing_directory(tmp_path):
+    assert UnresolvedImportCache().top_level_names(str(tmp_path / "missing")) == frozenset()
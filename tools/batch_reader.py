@@ -0,0 +1,214 @@
+import contextvars
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .dependency_graph import normalize_path
+from .exclusion import DEFAULT_EXCLUDES, ExclusionMatcher, compile_path_glob
+from .file_analyzer import get_file_content
+from .file_reader import read_file_range
+from .usage import serial_requested
+
+# 批量读取使用的 I/O 线程数
+IO_WORKERS = 8
+# 单次调用最多读取的文件数（包括通配符展开后的文件）
+DEFAULT_MAX_FILES = 100
+
+_io_pool: Optional[ThreadPoolExecutor] = None
+_io_pool_lock = threading.Lock()
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    """获取共享的 I/O 线程池（跨请求复用，与执行工具函数的线程池分开，避免互相等待）"""
+    global _io_pool
+    with _io_pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="mcp-io")
+        return _io_pool
+
+
+def _iter_glob(pattern: str) -> Iterator[str]:
+    """
+    逐个产生匹配通配符的文件（** 匹配任意层目录；同一目录中先文件后子目录，按名称排序）
+    从不含通配符的最长前缀目录开始遍历，与 list_directory 使用相同的排除规则：
+    隐藏目录、node_modules、.git、构建产物和 .gitignore 中的目录不会进入
+    """
+    parts = os.path.abspath(pattern).split(os.sep)
+    static = 0
+    while static < len(parts) - 1 and not glob.has_magic(parts[static]):
+        static += 1
+    base = os.sep.join(parts[:static]) or os.sep
+    rest = "/".join(parts[static:])
+    regex = compile_path_glob(rest)
+    # 不含 ** 时只需遍历到模式的层数
+    max_depth = None if "**" in rest else rest.count("/") + 1
+
+    matcher = ExclusionMatcher(DEFAULT_EXCLUDES, root=base, show_hidden=False, respect_gitignore=True)
+    stack = [(base, "", 1)]
+    while stack:
+        path, rel, depth = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            entry_rel = f"{rel}{entry.name}"
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if matcher.is_excluded(entry.path, is_dir, entry.name):
+                continue
+            if is_dir:
+                if max_depth is None or depth < max_depth:
+                    subdirs.append((entry.path, entry_rel + "/", depth + 1))
+            elif regex.match(entry_rel) and entry.is_file():
+                yield entry.path
+        stack.extend(reversed(subdirs))
+
+
+def _expand_paths(paths: List[str], max_files: int) -> Tuple[List[Tuple[str, Optional[str]]], int, bool]:
+    """
+    展开通配符并按规范化路径去重，保持请求中的顺序；达到 max_files 后不再继续遍历目录
+
+    Returns:
+        (请求的路径, 绝对路径) 列表（没有匹配文件的通配符对应 None）、
+        因超出 max_files 而省略的文件数、是否有通配符因此提前停止展开
+    """
+    targets: List[Tuple[str, Optional[str]]] = []
+    seen = set()
+    omitted = 0
+    stopped = False
+    for requested in paths:
+        is_glob = glob.has_magic(requested)
+        matches = _iter_glob(requested) if is_glob else [os.path.abspath(requested)]
+
+        matched = False
+        for path in matches:
+            matched = True
+            key = normalize_path(path)
+            if key in seen:
+                continue
+            if len(seen) >= max_files:
+                if is_glob:
+                    stopped = True
+                    break
+                omitted += 1
+                continue
+            seen.add(key)
+            targets.append((requested, path))
+        if is_glob and not matched:
+            targets.append((requested, None))
+    return targets, omitted, stopped
+
+
+def _stat(path: Optional[str]) -> Optional[int]:
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _read_one(requested: str, path: str, allowance: int, size: int) -> Dict:
+    """按分配的字节数读取单个文件，失败时返回该文件的错误信息"""
+    try:
+        if allowance >= size:
+            result = get_file_content(path)
+        else:
+            result = read_file_range(path, max_bytes=allowance)
+    except Exception as e:
+        result = {"filepath": path, "error": str(e), "status": "error"}
+    return {"requested": requested, **result}
+
+
+def read_files(
+        paths: List[str],
+        max_bytes_per_file: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+        max_files: int = DEFAULT_MAX_FILES
+) -> Dict:
+    """
+    一次读取多个文件（支持通配符），在共享的 I/O 线程池中并发读取
+
+    字节预算按请求顺序分配：每个文件最多 max_bytes_per_file，所有文件合计最多 max_total_bytes；
+    超出预算的文件截断（truncated=True，可用 next_cursor 通过 read_file 继续读取），
+    预算用完后的文件标记为 skipped；单个文件出错只影响该文件的结果
+
+    Args:
+        paths: 文件路径或通配符（如 "src/**/*.py"）
+        max_bytes_per_file: 单个文件最多返回的字节数（None 表示不限）
+        max_total_bytes: 所有文件合计最多返回的字节数（None 表示不限）
+        max_files: 最多读取的文件数
+
+    Returns:
+        按请求顺序排列的每个文件的结果，以及总字节数和预算使用情况
+    """
+    if not paths:
+        return {"error": "未指定要读取的文件", "status": "error"}
+
+    targets, omitted, stopped = _expand_paths(paths, max(max_files, 1))
+    serial = serial_requested()
+    pool = None if serial else _get_io_pool()
+    sizes = [_stat(path) for _, path in targets] if serial else list(pool.map(_stat, [path for _, path in targets]))
+
+    # 按顺序分配字节预算，读取之前就确定每个文件的读取量
+    remaining = max_total_bytes
+    jobs = []
+    files: List[Optional[Dict]] = []
+    for (requested, path), size in zip(targets, sizes):
+        if path is None:
+            files.append({"requested": requested, "error": "没有匹配的文件", "status": "error"})
+            continue
+        if size is None:
+            files.append({"requested": requested, "filepath": path, "error": f"文件不存在: {path}", "status": "error"})
+            continue
+        allowance = size
+        if max_bytes_per_file is not None:
+            allowance = min(allowance, max(max_bytes_per_file, 0))
+        if remaining is not None:
+            allowance = min(allowance, remaining)
+        if allowance <= 0 < size:
+            files.append({
+                "requested": requested,
+                "filepath": path,
+                "size": size,
+                "skipped": True,
+                "truncated": True,
+                "status": "success"
+            })
+            continue
+        if remaining is not None:
+            remaining -= allowance
+        if serial:
+            files.append(_read_one(requested, path, allowance, size))
+            continue
+        # 复制上下文，使访问文件数等统计计入当前工具调用
+        context = contextvars.copy_context()
+        jobs.append((len(files), pool.submit(context.run, _read_one, requested, path, allowance, size)))
+        files.append(None)
+
+    for position, future in jobs:
+        files[position] = future.result()
+
+    total_bytes = sum(
+        file.get("end_byte", file.get("size", 0)) - file.get("start_byte", 0)
+        for file in files if file["status"] == "success" and not file.get("skipped")
+    )
+    return {
+        "files": files,
+        "file_count": len(files),
+        "error_count": sum(1 for file in files if file["status"] == "error"),
+        "truncated_count": sum(1 for file in files if file.get("truncated")),
+        "omitted_files": omitted,
+        "max_files_reached": stopped or omitted > 0,
+        "total_bytes": total_bytes,
+        "max_total_bytes": max_total_bytes,
+        "max_bytes_per_file": max_bytes_per_file,
+        "status": "success"
+    }
@@ -0,0 +1,594 @@
+"""基于三元组（trigram）索引的代码搜索：用正则中必须出现的字面量筛选候选文件，只对候选文件运行正则"""
+import atexit
+import fnmatch
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+# 正则解析器是 CPython 的内部模块，不同版本中名称不同；都不可用时不提取约束，退化为扫描全部文件
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:
+    try:  # Python 3.10 及更早版本
+        import sre_constants
+        import sre_parse
+    except ImportError:
+        sre_constants = sre_parse = None
+
+from .dependency_graph import normalize_path, relative_path
+from .directory_analyzer import find_source_files
+from .parsers.cache import Fingerprint, file_fingerprint
+from .parsers.project_root import UNWATCHED_TTL
+from .project_index import ProjectIndexCache, dirs_changed
+from .usage import note_files_touched
+from .watcher import is_watched
+
+# 超过该大小的文件不建立索引，搜索时逐个线性扫描；二进制文件不参与搜索
+MAX_INDEXED_BYTES = 2 * 1024 * 1024
+# 判断二进制文件时检查的前缀长度
+BINARY_SNIFF_BYTES = 8192
+# 单行输出的最大字符数
+MAX_LINE_CHARS = 300
+# 上下文行数上限
+MAX_CONTEXT_LINES = 10
+# 墓碑（已删除或已更新文件的旧编号）超过存活文件数时压缩倒排表
+COMPACT_MIN_TOMBSTONES = 1000
+# 增量更新后写回磁盘的最短间隔（秒），退出时会写回所有未保存的索引
+SAVE_INTERVAL = 60.0
+
+_INDEX_VERSION = 1
+
+# 查询计划：None 表示无约束（所有文件都是候选），("lit", bytes)、("and", [...])、("or", [...])
+QueryPlan = Optional[tuple]
+
+
+def _trigrams(data: bytes) -> Set[int]:
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def default_index_dir() -> str:
+    """服务默认使用的索引保存目录（库调用默认不保存到磁盘）"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "mcp-file-analyzer", "trigram")
+
+
+# ---------- 查询计划 ----------
+
+def _plan(subpattern, ignorecase: bool) -> QueryPlan:
+    """
+    从 sre_parse 的解析结果中提取必须出现的字面量：
+    连续的字面字符组成一段，分组和至少重复一次的子模式递归处理，分支的每个选项都有约束时取并集
+    """
+    parts: List[QueryPlan] = []
+    run: List[str] = []
+
+    def flush():
+        if len(run) >= 3:
+            parts.append(("lit", "".join(run).encode("utf-8").lower()))
+        run.clear()
+
+    for op, av in subpattern:
+        if op is sre_constants.LITERAL:
+            char = chr(av)
+            if ignorecase and not char.isascii():
+                # 非 ASCII 字符的大小写变体字节不同，无法用小写化的索引约束
+                flush()
+                continue
+            run.append(char)
+            continue
+
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, body = av
+            child_ignorecase = (ignorecase or bool(add_flags & sre_constants.SRE_FLAG_IGNORECASE)) \
+                and not del_flags & sre_constants.SRE_FLAG_IGNORECASE
+            parts.append(_plan(body, child_ignorecase))
+        elif op is sre_constants.BRANCH:
+            alternatives = [_plan(alternative, ignorecase) for alternative in av[1]]
+            if all(alternative is not None for alternative in alternatives):
+                parts.append(("or", alternatives))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+                    getattr(sre_constants, "POSSESSIVE_REPEAT", None)):
+            minimum, _, body = av
+            if minimum >= 1:
+                parts.append(_plan(body, ignorecase))
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            parts.append(_plan(av, ignorecase))
+        # 字符类、任意字符、断言等不提供约束
+    flush()
+
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def plan_query(pattern: str, flags: int = 0) -> QueryPlan:
+    """为正则表达式生成候选文件的查询计划，无法提取约束时返回 None"""
+    if sre_parse is None:
+        return None
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+        return _plan(parsed, bool(parsed.state.flags & re.IGNORECASE))
+    except (AttributeError, TypeError, ValueError):
+        # 内部模块的结构与预期不符
+        return None
+
+
+# ---------- 索引 ----------
+
+class TrigramIndex:
+    """
+    单个项目目录的三元组索引
+    文件编号只增不减：文件更新或删除时旧编号成为墓碑，查询时跳过，墓碑过多时统一压缩；
+    被监听的项目依靠文件事件保持最新，其余项目每隔 UNWATCHED_TTL 秒按文件指纹和目录 mtime 校验一次
+    """
+
+    def __init__(self, dirpath: str, exclude_patterns: Optional[List[str]] = None,
+                 index_dir: Optional[str] = None):
+        self.dirpath = os.path.abspath(dirpath)
+        self.exclude_patterns = exclude_patterns
+        self.index_dir = index_dir
+
+        self.paths: List[Optional[str]] = []  # 文件编号 -> 路径，墓碑为 None
+        self.fingerprints: List[Optional[Fingerprint]] = []
+        self.ids: Dict[str, int] = {}  # 路径 -> 当前编号
+        self.postings: Dict[int, array] = {}  # 三元组 -> 按编号递增的文件编号
+        self.skipped: Dict[str, Optional[Fingerprint]] = {}  # 二进制或过大的文件
+        self.tombstones = 0
+        self.loaded_from_disk = False
+
+        self._dir_mtimes: Dict[str, int] = {}
+        self._events: List[Tuple[str, str, bool]] = []
+        self._validated_at = 0.0
+        self._saved_at = 0.0
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    # ---------- 持久化 ----------
+
+    @property
+    def index_path(self) -> Optional[str]:
+        if not self.index_dir:
+            return None
+        key = f"{normalize_path(self.dirpath)}\0{sorted(self.exclude_patterns or [])}"
+        return os.path.join(self.index_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def save(self):
+        path = self.index_path
+        if path is None:
+            return
+        with self._lock:
+            state = {
+                "version": _INDEX_VERSION,
+                "dirpath": self.dirpath,
+                "exclude_patterns": sorted(self.exclude_patterns or []),
+                "paths": self.paths,
+                "fingerprints": self.fingerprints,
+                "postings": self.postings,
+                "skipped": self.skipped,
+                "dir_mtimes": self._dir_mtimes
+            }
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except (OSError, pickle.PicklingError):
+                return
+            self._saved_at = time.monotonic()
+            self._dirty = False
+
+    def load(self) -> bool:
+        """从磁盘载入索引（之后仍需 refresh 校验），格式或目录不符时返回 False"""
+        path = self.index_path
+        if path is None or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        if not isinstance(state, dict) or state.get("version") != _INDEX_VERSION \
+                or state.get("dirpath") != self.dirpath \
+                or state.get("exclude_patterns") != sorted(self.exclude_patterns or []):
+            return False
+
+        with self._lock:
+            self.paths = state["paths"]
+            self.fingerprints = state["fingerprints"]
+            self.postings = state["postings"]
+            self.skipped = state["skipped"]
+            self._dir_mtimes = state["dir_mtimes"]
+            self.ids = {path: file_id for file_id, path in enumerate(self.paths) if path is not None}
+            self.tombstones = len(self.paths) - len(self.ids)
+            self._validated_at = float("-inf")  # 载入后的第一次 refresh 必须完整校验
+            self.loaded_from_disk = True
+            self._saved_at = time.monotonic()
+        return True
+
+    # ---------- 建立与更新 ----------
+
+    def _discover(self) -> List[str]:
+        dirs: List[str] = []
+        files = find_source_files(self.dirpath, None, self.exclude_patterns, visited_dirs=dirs)
+        dir_mtimes = {}
+        for path in dirs:
+            try:
+                dir_mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        self._dir_mtimes = dir_mtimes
+        return files
+
+    def _add(self, path: str):
+        fingerprint = file_fingerprint(path)
+        if fingerprint is None:
+            return
+        if fingerprint[1] > MAX_INDEXED_BYTES:
+            self.skipped[path] = fingerprint
+            return
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        note_files_touched()
+        if b"\0" in data[:BINARY_SNIFF_BYTES]:
+            self.skipped[path] = fingerprint
+            return
+
+        file_id = len(self.paths)
+        self.paths.append(path)
+        self.fingerprints.append(fingerprint)
+        self.ids[path] = file_id
+        postings = self.postings
+        for trigram in _trigrams(data.lower()):
+            ids = postings.get(trigram)
+            if ids is None:
+                postings[trigram] = array("I", (file_id,))
+            else:
+                ids.append(file_id)
+
+    def _remove(self, path: str):
+        self.skipped.pop(path, None)
+        file_id = self.ids.pop(path, None)
+        if file_id is not None:
+            self.paths[file_id] = None
+            self.fingerprints[file_id] = None
+            self.tombstones += 1
+
+    def _current_fingerprint(self, path: str) -> Optional[Fingerprint]:
+        file_id = self.ids.get(path)
+        if file_id is not None:
+            return self.fingerprints[file_id]
+        return self.skipped.get(path)
+
+    def _update(self, path: str):
+        fingerprint = file_fingerprint(path)
+        if fingerprint is not None and fingerprint == self._current_fingerprint(path):
+            return
+        self._remove(path)
+        if fingerprint is not None:
+            self._add(path)
+
+    def _compact(self):
+        """去掉墓碑并重新编号，倒排表只需按映射改写，不需要重新读取文件"""
+        remap = {}
+        paths, fingerprints = [], []
+        for file_id, path in enumerate(self.paths):
+            if path is not None:
+                remap[file_id] = len(paths)
+                paths.append(path)
+                fingerprints.append(self.fingerprints[file_id])
+
+        postings = {}
+        for trigram, ids in self.postings.items():
+            kept = array("I", (remap[file_id] for file_id in ids if file_id in remap))
+            if kept:
+                postings[trigram] = kept
+
+        self.paths, self.fingerprints, self.postings = paths, fingerprints, postings
+        self.ids = {path: file_id for file_id, path in enumerate(paths)}
+        self.tombstones = 0
+
+    def build(self) -> int:
+        """扫描整个目录并建立索引，返回建立索引的文件数"""
+        with self._lock:
+            self.paths, self.fingerprints, self.ids, self.postings = [], [], {}, {}
+            self.skipped, self.tombstones, self._events = {}, 0, []
+            for path in self._discover():
+                self._add(path)
+            self._validated_at = time.monotonic()
+            self.save()
+            return len(self.ids)
+
+    def mark_changed(self, kind: str, path: str, is_dir: bool = False):
+        """记录文件监听事件，下次查询前统一处理"""
+        if kind != "overflow" and not self.contains(path):
+            return
+        with self._lock:
+            self._events.append((kind, path, is_dir))
+
+    def contains(self, path: str) -> bool:
+        key = normalize_path(path)
+        root = normalize_path(self.dirpath)
+        return key == root or key.startswith(root.rstrip(os.sep) + os.sep)
+
+    def refresh(self) -> int:
+        """使索引与磁盘一致，返回重新建立索引的文件数"""
+        with self._lock:
+            changed: Set[str] = set()
+            rediscover = False
+            for kind, path, is_dir in self._events:
+                if kind == "modified" and not is_dir:
+                    changed.add(path)
+                else:
+                    rediscover = True
+            self._events = []
+
+            now = time.monotonic()
+            if not is_watched(self.dirpath) and now - self._validated_at >= UNWATCHED_TTL:
+                for path in list(self.ids) + list(self.skipped):
+                    if file_fingerprint(path) != self._current_fingerprint(path):
+                        changed.add(path)
+                rediscover = rediscover or dirs_changed(self._dir_mtimes)
+                self._validated_at = now
+
+            if rediscover:
+                current = set(self._discover())
+                known = set(self.ids) | set(self.skipped)
+                for path in known - current:
+                    self._remove(path)
+                changed |= current - known
+                changed &= current
+
+            for path in changed:
+                self._update(path)
+
+            if self.tombstones >= COMPACT_MIN_TOMBSTONES and self.tombstones > len(self.ids):
+                self._compact()
+            if changed:
+                self._dirty = True
+            if self._dirty and now - self._saved_at >= SAVE_INTERVAL:
+                self.save()
+            return len(changed)
+
+    # ---------- 查询 ----------
+
+    def _evaluate(self, plan: QueryPlan) -> Optional[Set[int]]:
+        if plan is None:
+            return None
+        kind, value = plan
+        if kind == "lit":
+            result = None
+            # 先用最短的倒排表，交集很快缩小
+            lists = sorted((self.postings.get(trigram, ()) for trigram in _trigrams(value)), key=len)
+            for ids in lists:
+                result = set(ids) if result is None else result.intersection(ids)
+                if not result:
+                    return set()
+            return result
+        children = [self._evaluate(child) for child in value]
+        if kind == "and":
+            constrained = sorted((child for child in children if child is not None), key=len)
+            if not constrained:
+                return None
+            result = constrained[0]
+            for child in constrained[1:]:
+                result = result & child
+            return result
+        if any(child is None for child in children):
+            return None
+        return set().union(*children)
+
+    def large_files(self) -> List[str]:
+        """超过 MAX_INDEXED_BYTES 而未建立索引的文件（按路径排序），搜索时需要线性扫描"""
+        with self._lock:
+            found = [
+                path for path, fingerprint in self.skipped.items()
+                if fingerprint is not None and fingerprint[1] > MAX_INDEXED_BYTES
+            ]
+        found.sort()
+        return found
+
+    def candidates(self, plan: QueryPlan) -> List[str]:
+        """满足查询计划的文件（按路径排序）"""
+        with self._lock:
+            ids = self._evaluate(plan)
+            paths = self.paths
+            if ids is None:
+                found = [path for path in paths if path is not None]
+            else:
+                found = [paths[file_id] for file_id in ids if paths[file_id] is not None]
+        found.sort()
+        return found
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "files": len(self.ids),
+                "skipped_files": len(self.skipped),
+                "trigrams": len(self.postings),
+                "tombstones": self.tombstones,
+                "loaded_from_disk": self.loaded_from_disk,
+                "index_path": self.index_path
+            }
+
+
+# 默认只保存在内存中，由 configure_search_index 显式开启持久化
+_index_dir: Optional[str] = None
+_search_indexes = ProjectIndexCache()
+_save_registered = False
+
+
+def configure_search_index(index_dir: Optional[str]):
+    """设置索引的保存目录（None 表示只保存在内存中）；设置目录后退出时写回未保存的索引"""
+    global _index_dir, _save_registered
+    _index_dir = index_dir
+    _search_indexes.clear()
+    if index_dir and not _save_registered:
+        atexit.register(_save_dirty_indexes)
+        _save_registered = True
+
+
+def get_search_index_cache() -> ProjectIndexCache:
+    """获取全局搜索索引缓存（与项目导入索引使用相同的 LRU 结构）"""
+    return _search_indexes
+
+
+def _save_dirty_indexes():
+    for index in _search_indexes.indexes():
+        if index._dirty:
+            index.save()
+
+
+def _trim(line: str) -> str:
+    return line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + "…"
+
+
+def search_code(
+        dirpath: str,
+        pattern: str,
+        fixed_string: bool = False,
+        case_sensitive: bool = True,
+        include: Optional[str] = None,
+        context_lines: int = 0,
+        max_results: Optional[int] = 100,
+        exclude_patterns: Optional[List[str]] = None
+) -> Dict:
+    """
+    在项目中按正则表达式（或固定字符串）搜索，返回匹配的行号和有限的上下文
+    先用三元组索引筛出候选文件，再对候选文件运行正则
+
+    Args:
+        dirpath: 项目目录
+        pattern: 正则表达式（fixed_string 为 True 时按字面量匹配）
+        fixed_string: 是否把 pattern 当作普通字符串
+        case_sensitive: 是否区分大小写
+        include: 只搜索相对路径匹配该通配符的文件（如 "*.py"、"src/*"）
+        context_lines: 每个匹配前后附带的行数（最多 MAX_CONTEXT_LINES）
+        max_results: 最多返回的匹配行数（None 表示不限）
+        exclude_patterns: 额外排除的名称、通配符或相对路径模式
+    """
+    dirpath = os.path.abspath(dirpath)
+    if not os.path.isdir(dirpath):
+        return {
+            "error": f"目录不存在: {dirpath}",
+            "status": "error"
+        }
+
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    source = re.escape(pattern) if fixed_string else pattern
+    try:
+        regex = re.compile(source, flags)
+        plan = plan_query(source, flags)
+    except re.error as e:
+        return {
+            "error": f"无效的正则表达式: {e}",
+            "status": "error"
+        }
+    context_lines = min(max(context_lines, 0), MAX_CONTEXT_LINES)
+
+    started_at = time.perf_counter()
+    cache = get_search_index_cache()
+    key = cache.key(dirpath, None, exclude_patterns, None)
+    index = cache.get(key)
+    if index is None:
+        index = TrigramIndex(dirpath, exclude_patterns, _index_dir)
+        if index.load():
+            updated = index.refresh()
+        else:
+            updated = index.build()
+        cache.store(key, index)
+    else:
+        updated = index.refresh()
+    index_ms = (time.perf_counter() - started_at) * 1000
+
+    candidates = index.candidates(plan)
+    # 过大的文件不在索引中，不能用三元组排除，全部线性扫描
+    large_files = index.large_files()
+    if include:
+        include_pattern = include.replace(os.sep, "/")
+
+        def included(path: str) -> bool:
+            return fnmatch.fnmatch(relative_path(path, dirpath).replace(os.sep, "/"), include_pattern) \
+                or fnmatch.fnmatch(os.path.basename(path), include_pattern)
+
+        candidates = [path for path in candidates if included(path)]
+        large_files = [path for path in large_files if included(path)]
+    large = set(large_files)
+    scan_order = sorted(candidates + large_files) if large_files else candidates
+
+    matches = []
+    matched_files = 0
+    truncated = False
+    for path in scan_order:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        note_files_touched()
+        if path in large and b"\0" in data[:BINARY_SNIFF_BYTES]:
+            continue
+        content = data.decode("utf-8", errors="replace")
+
+        lines = None
+        last_line = 0
+        line_number = 1
+        position = 0
+        file_matched = False
+        for match in regex.finditer(content):
+            line_number += content.count("\n", position, match.start())
+            position = match.start()
+            if line_number == last_line:
+                continue
+            if max_results is not None and len(matches) >= max_results:
+                truncated = True
+                break
+            last_line = line_number
+            file_matched = True
+
+            if lines is None:
+                lines = content.split("\n")
+            entry = {
+                "path": relative_path(path, dirpath),
+                "line": line_number,
+                "column": match.start() - (content.rfind("\n", 0, match.start()) + 1) + 1,
+                "text": _trim(lines[line_number - 1].rstrip("\r"))
+            }
+            if context_lines:
+                start = max(0, line_number - 1 - context_lines)
+                entry["before"] = [_trim(line.rstrip("\r")) for line in lines[start:line_number - 1]]
+                entry["after"] = [_trim(line.rstrip("\r")) for line in lines[line_number:line_number + context_lines]]
+            matches.append(entry)
+
+        matched_files += file_matched
+        if truncated:
+            break
+
+    return {
+        "pattern": pattern,
+        "project": dirpath,
+        "matches": matches,
+        "total": len(matches),
+        "matched_files": matched_files,
+        "truncated": truncated,
+        "candidate_files": len(candidates),
+        "large_files_scanned": len(large_files),
+        "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 3),
+        "index": {
+            **index.stats(),
+            "updated_files": updated,
+            "refresh_ms": round(index_ms, 3),
+            "watched": is_watched(dirpath)
+        },
+        "status": "success"
+    }
@@ -0,0 +1,70 @@
+import os
+from typing import Dict, List, Optional
+
+from .parsers.base import FileAnalysisResult
+
+# 紧凑格式中每条导入记录的列顺序
+IMPORT_COLUMNS = ["type", "module", "names", "resolved_path", "level"]
+
+
+def relative_path(path: str, base_dir: str) -> str:
+    """base_dir 之下的路径转为相对路径，其余保持绝对路径"""
+    try:
+        rel = os.path.relpath(path, base_dir)
+    except ValueError:
+        return path
+    return path if rel == os.pardir or rel.startswith(os.pardir + os.sep) else rel
+
+
+class StringTable:
+    """
+    字符串表：重复出现的路径和模块名只输出一次，其余位置用下标引用
+    指定 base_dir 时，base_dir 下的路径以相对路径存入
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self._index[value] = index
+            self.strings.append(value)
+        return index
+
+    def path(self, path: Optional[str]) -> Optional[int]:
+        if path is None:
+            return None
+        return self.add(relative_path(path, self.base_dir) if self.base_dir else path)
+
+
+def compact_analysis(result: FileAnalysisResult, relative: bool = False) -> Dict:
+    """
+    单个文件导入分析结果的紧凑格式：路径和模块名放入字符串表，
+    每条导入是按 IMPORT_COLUMNS 排列的数组，省略可由 local_imports 推出的 is_local
+
+    Args:
+        relative: 项目根目录下的路径是否输出为相对路径
+    """
+    table = StringTable(result.project_root if relative and result.project_root else None)
+    compact = {
+        "format": "compact",
+        "filepath": table.path(result.filepath),
+        "project_root": result.project_root,
+        "language": result.language,
+        "local_imports": [table.path(path) for path in result.local_imports],
+        "external_imports": [table.add(module) for module in result.external_imports],
+        "import_columns": IMPORT_COLUMNS,
+        "imports": [
+            [imp.type, table.add(imp.module), imp.names, table.path(imp.resolved_path), imp.level]
+            for imp in result.import_details
+        ],
+        "status": result.status
+    }
+    if result.error:
+        compact["error"] = result.error
+    compact["strings"] = table.strings
+    return compact
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# 计算哈希时每次读取的字节数
+_CHUNK_SIZE = 1 << 20
+# 超过该大小的文件使用基于 stat 的弱标签（"W/" 开头），不读取整个文件
+STRONG_HASH_MAX_BYTES = 32 << 20
+# 计算哈希时 mtime 距今不足该时长的记录不可完全信任：同一时间刻度内的再次修改无法通过 stat 发现
+RACY_WINDOW_NS = 2_000_000_000
+
+# 缓存键的文件状态：(st_dev, st_ino, st_mtime_ns, st_size)
+StatKey = Tuple[int, int, int, int]
+
+
+def _stat_key(st: os.stat_result) -> StatKey:
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def weak_tag(st: os.stat_result) -> str:
+    return f"W/{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"
+
+
+class ContentHashCache:
+    """
+    文件内容哈希的缓存：绝对路径 -> (文件状态, 哈希, 是否可信)
+    文件状态（inode、mtime、size）不变时直接返回上次的哈希，不再读取文件
+
+    在文件刚被修改（RACY_WINDOW_NS 之内）时计算的哈希不可信：之后同一时间刻度内的修改不会改变文件状态。
+    这样的记录只用于按范围读取时附带的 content_hash（allow_racy=True），
+    判断 if_none_match 时会重新计算一次，得到可信的记录
+    """
+
+    def __init__(self, max_entries: int = 65536):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[StatKey, str, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, abspath: str, st: os.stat_result, allow_racy: bool = False) -> Optional[str]:
+        """已缓存且文件状态未变时返回哈希，否则返回 None；allow_racy 为 False 时只返回可信的记录"""
+        if st.st_size > STRONG_HASH_MAX_BYTES:
+            return weak_tag(st)
+        with self._lock:
+            entry = self._entries.get(abspath)
+            if entry is not None and entry[0] == _stat_key(st) and (entry[2] or allow_racy):
+                self._entries.move_to_end(abspath)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def remember(self, abspath: str, st: os.stat_result, data: bytes) -> str:
+        """用已经读出的完整文件内容计算并缓存哈希，避免再读一次文件"""
+        if st.st_size > STRONG_HASH_MAX_BYTES:
+            return weak_tag(st)
+        digest = hash_bytes(data)
+        self._store(abspath, st, digest)
+        return digest
+
+    def digest(self, abspath: str, st: Optional[os.stat_result] = None, allow_racy: bool = False) -> str:
+        """文件内容的哈希，未缓存时分块读取文件计算"""
+        if st is None:
+            st = os.stat(abspath)
+        cached = self.lookup(abspath, st, allow_racy)
+        if cached is not None:
+            return cached
+
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(abspath, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        self._store(abspath, st, digest)
+        return digest
+
+    def _store(self, abspath: str, st: os.stat_result, digest: str):
+        trusted = time.time_ns() - st.st_mtime_ns >= RACY_WINDOW_NS
+        with self._lock:
+            self._entries[abspath] = (_stat_key(st), digest, trusted)
+            self._entries.move_to_end(abspath)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, abspath: str):
+        with self._lock:
+            self._entries.pop(abspath, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_content_hash_cache = ContentHashCache()
+
+
+def get_content_hash_cache() -> ContentHashCache:
+    """获取全局文件内容哈希缓存"""
+    return _content_hash_cache
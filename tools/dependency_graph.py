@@ -0,0 +1,673 @@
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+from .compact import StringTable, relative_path
+from .parsers.cache import configure_analysis_cache, get_analysis_cache
+from .parsers.factory import ParserFactory
+from .parsers.python_parser import SCAN_MODE_ENV
+from .parsers.session import ParserSession
+from .usage import note_files_touched, serial_requested
+
+# 一层中待分析文件少于该数量时直接在当前线程分析，避免线程/进程调度开销
+PARALLEL_THRESHOLD = 8
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_config: Optional[tuple] = None
+_process_pool_lock = threading.Lock()
+
+
+def _init_worker(max_entries: int, db_path: Optional[str], scan_mode: Optional[str]):
+    """
+    进程池子进程的初始化：使用与服务进程相同的分析缓存配置（含 SQLite 持久化）和扫描模式
+    子进程收不到文件事件，根目录等缓存按未监听目录的有效期处理；分析缓存本身按文件指纹校验
+    """
+    configure_analysis_cache(max_entries=max_entries, db_path=db_path)
+    if scan_mode is not None:
+        os.environ[SCAN_MODE_ENV] = scan_mode
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    获取共享的进程池（跨请求复用，避免每次启动子进程）
+    使用 spawn 方式创建，避免在多线程的服务进程中 fork；缓存配置变化后重新创建
+    """
+    global _process_pool, _process_pool_config
+    cache = get_analysis_cache()
+    initargs = (cache.max_entries, cache.db_path, os.environ.get(SCAN_MODE_ENV))
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_config != (workers, initargs):
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=initargs
+            )
+            _process_pool_config = (workers, initargs)
+        return _process_pool
+
+
+def normalize_path(path: str) -> str:
+    """统一的节点路径形式（与解析器返回的 resolved_path 一致）"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def analyze_node(
+        filepath: str,
+        project_root: Optional[str] = None,
+        session: Optional[ParserSession] = None
+) -> Dict:
+    """
+    分析单个文件，返回依赖图节点所需的精简信息
+    仅包含基本类型，可以跨进程传递；传入 session 时复用其中的解析器和导入解析结果
+    """
+    if session is not None:
+        parser = session.get_parser(filepath, project_root)
+    else:
+        parser = ParserFactory.get_parser(filepath, project_root)
+    if parser is None:
+        _, ext = os.path.splitext(filepath)
+        return {
+            "filepath": os.path.abspath(filepath),
+            "status": "error",
+            "error": f"不支持的文件类型: {ext}"
+        }
+
+    result = parser.analyze_file(filepath)
+    return {
+        "filepath": result.filepath,
+        "project_root": result.project_root,
+        "language": result.language,
+        "local_imports": sorted(result.local_imports),
+        "external_imports": sorted(result.external_imports),
+        "status": result.status,
+        "error": result.error
+    }
+
+
+def analyze_batch(
+        filepaths: List[str],
+        project_roots: List[Optional[str]],
+        session: Optional[ParserSession] = None
+) -> List[Dict]:
+    """
+    批量分析文件，整批提交到进程池可以减少任务调度和结果回传的次数
+    未传入 session 时（如在子进程中）整批共用一个新的会话
+    """
+    if session is None:
+        session = ParserSession()
+    return [analyze_node(path, root, session) for path, root in zip(filepaths, project_roots)]
+
+
+def _remote_batch(filepaths: List[str], project_roots: List[Optional[str]]) -> Tuple[List[Dict], tuple]:
+    """在进程池子进程中分析一批文件，同时返回本批产生的分析缓存统计增量"""
+    before = get_analysis_cache().counters()
+    infos = analyze_batch(filepaths, project_roots)
+    after = get_analysis_cache().counters()
+    return infos, tuple(a - b for a, b in zip(after, before))
+
+
+def _merge_remote(result: Tuple[List[Dict], tuple]) -> List[Dict]:
+    infos, delta = result
+    get_analysis_cache().merge_counters(delta)
+    return infos
+
+
+# 项目分析的进度回调：(已完成文件数, 文件总数, 本批节点信息)
+ProgressCallback = Callable[[int, int, List[Dict]], None]
+
+
+class DependencyGraph:
+    """
+    依赖图引擎
+    每个文件只分析一次，节点以整数编号，边以邻接表存储；
+    通过 Tarjan 强连通分量识别真正的循环依赖（菱形依赖不会被误判为循环）
+    """
+
+    def __init__(self, project_root: Optional[str] = None, session: Optional[ParserSession] = None):
+        self.project_root = project_root
+        self.session = session  # 线程内分析时共用的解析会话（进程池中的子进程各自使用自己的会话）
+        self.paths: List[str] = []  # 节点编号 -> 路径
+        self.edges: List[List[int]] = []  # 邻接表
+        self.reverse_edges: List[List[int]] = []  # 反向邻接表：被谁导入
+        self.nodes: List[Optional[Dict]] = []  # 节点分析结果，None 表示未展开
+        self.depths: List[int] = []  # 距起始文件的最短深度
+        self.skipped = set()  # 因 max_files 预算而未展开的节点
+        self.reused_count = 0  # 复用已有分析结果的节点数
+        self.dirty = set()  # 文件变化后需要重新分析的节点路径
+        self.outside_scope = set()  # 项目分析时位于文件集合之外、未展开的节点
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def node_id(self, path: str) -> Optional[int]:
+        return self._ids.get(normalize_path(path))
+
+    def add_node(self, path: str, depth: int = 0) -> int:
+        """添加节点（已存在则返回原编号）"""
+        key = normalize_path(path)
+        node = self._ids.get(key)
+        if node is None:
+            node = len(self.paths)
+            self._ids[key] = node
+            self.paths.append(key)
+            self.edges.append([])
+            self.reverse_edges.append([])
+            self.nodes.append(None)
+            self.depths.append(depth)
+        return node
+
+    def add_edge(self, node: int, child: int):
+        """添加导入边，同时维护反向邻接表"""
+        self.edges[node].append(child)
+        self.reverse_edges[child].append(node)
+
+    @property
+    def analyzed_count(self) -> int:
+        return sum(1 for info in self.nodes if info is not None)
+
+    def build(
+            self,
+            filepath: str,
+            max_depth: int = 3,
+            workers: Optional[int] = 1,
+            executor: str = "auto",
+            max_files: Optional[int] = None,
+            known: Optional[Dict[str, Dict]] = None
+    ) -> int:
+        """
+        从起始文件开始按层（广度优先）展开依赖
+        深度不超过 max_depth 的文件会被分析，更深一层的文件只作为未展开节点保留
+
+        Args:
+            workers: 并行分析的工作者数量，None 表示 CPU 核数，1 表示串行
+            executor: "thread"、"process" 或 "auto"（Python 用进程池，其余用线程池）
+            max_files: 最多分析的文件数，超出后剩余文件不再展开
+            known: 可直接复用的节点分析结果（路径 -> 节点信息），这些文件不会重新分析
+        """
+        root = self.add_node(filepath, 0)
+        frontier = [root]
+
+        if serial_requested():
+            workers = 1
+        elif workers is None:
+            workers = os.cpu_count() or 1
+        if executor == "auto":
+            executor = "process" if filepath.lower().endswith(".py") else "thread"
+
+        thread_pool: Optional[ThreadPoolExecutor] = None
+        analyzed = 0
+
+        try:
+            while frontier:
+                if max_files is not None and analyzed + len(frontier) > max_files:
+                    remaining = max(max_files - analyzed, 0)
+                    self.skipped.update(frontier[remaining:])
+                    frontier = frontier[:remaining]
+                    if not frontier:
+                        break
+
+                results: Dict[int, Dict] = {}
+                if known:
+                    for node in frontier:
+                        info = known.get(self.paths[node])
+                        if info is not None:
+                            results[node] = info
+                    self.reused_count += len(results)
+
+                pending = [node for node in frontier if node not in results]
+                paths = [self.paths[node] for node in pending]
+                if workers > 1 and len(paths) >= PARALLEL_THRESHOLD and executor == "process":
+                    # 按批提交到子进程，每批回传结果和缓存统计增量
+                    size = max(1, len(paths) // (workers * 4))
+                    batches = [paths[i:i + size] for i in range(0, len(paths), size)]
+                    pool: Executor = _get_process_pool(workers)
+                    analyzed_infos = [
+                        info
+                        for result in pool.map(_remote_batch, batches, [[self.project_root] * len(b) for b in batches])
+                        for info in _merge_remote(result)
+                    ]
+                elif workers > 1 and len(paths) >= PARALLEL_THRESHOLD:
+                    if thread_pool is None:
+                        thread_pool = ThreadPoolExecutor(max_workers=workers)
+                    analyzed_infos = thread_pool.map(
+                        analyze_node, paths, [self.project_root] * len(paths), [self.session] * len(paths)
+                    )
+                else:
+                    analyzed_infos = (analyze_node(path, self.project_root, self.session) for path in paths)
+                results.update(zip(pending, analyzed_infos))
+                note_files_touched(len(pending))
+
+                analyzed += len(frontier)
+
+                # 按层内顺序合并结果，保证节点编号与串行分析完全一致
+                next_frontier = []
+                for node in frontier:
+                    info = results[node]
+                    self.nodes[node] = info
+
+                    if info.get("status") != "success":
+                        continue
+
+                    depth = self.depths[node]
+                    for dep_path in info.get("local_imports", []):
+                        is_new = normalize_path(dep_path) not in self._ids
+                        child = self.add_node(dep_path, depth + 1)
+                        self.add_edge(node, child)
+                        if is_new and depth + 1 <= max_depth:
+                            next_frontier.append(child)
+                frontier = next_frontier
+        finally:
+            if thread_pool is not None:
+                thread_pool.shutdown()
+
+        return root
+
+    def build_project(
+            self,
+            filepaths: List[str],
+            project_roots: Optional[List[Optional[str]]] = None,
+            workers: Optional[int] = 1,
+            executor: str = "thread",
+            progress: Optional[ProgressCallback] = None,
+            known: Optional[Dict[str, Dict]] = None
+    ) -> List[int]:
+        """
+        分析一组文件（通常是整个项目），所有文件都作为深度 0 的节点一次性分批提交
+        本地导入指向集合之外的文件时只添加节点、不展开，标记为 outside_scope
+
+        Args:
+            project_roots: 与 filepaths 一一对应的项目根目录，默认都使用 self.project_root
+            workers: 并行分析的工作者数量，None 表示 CPU 核数，1 表示串行
+            executor: "thread" 或 "process"
+            progress: 每完成一批文件调用一次，在调用 build_project 的线程中执行
+            known: 可直接复用的节点分析结果（路径 -> 节点信息），这些文件不会重新分析
+        """
+        if project_roots is None:
+            project_roots = [self.project_root] * len(filepaths)
+        if serial_requested():
+            workers = 1
+        elif workers is None:
+            workers = os.cpu_count() or 1
+
+        root_of: Dict[int, Optional[str]] = {}
+        for path, root in zip(filepaths, project_roots):
+            root_of.setdefault(self.add_node(path, 0), root)
+        nodes = list(root_of)
+        total = len(nodes)
+
+        results: Dict[int, Dict] = {}
+        if known:
+            for node in nodes:
+                info = known.get(self.paths[node])
+                if info is not None:
+                    results[node] = info
+            self.reused_count += len(results)
+        pending = [node for node in nodes if node not in results]
+
+        # 每个工作者分到若干批，既能均衡负载，又能及时汇报进度
+        batch_size = max(PARALLEL_THRESHOLD, min(256, total // (workers * 4) or 1))
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        done = len(results)
+
+        # 进程池中的批次在子进程里各自创建会话
+        batch_session = self.session if executor != "process" else None
+
+        def batch_args(batch: List[int]):
+            return [self.paths[node] for node in batch], [root_of[node] for node in batch], batch_session
+
+        def collect(batch: List[int], infos: List[Dict]):
+            nonlocal done
+            results.update(zip(batch, infos))
+            note_files_touched(len(batch))
+            done += len(batch)
+            if progress is not None:
+                progress(done, total, infos)
+
+        if workers > 1 and len(pending) >= PARALLEL_THRESHOLD:
+            if executor == "process":
+                pool: Executor = _get_process_pool(workers)
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers)
+            try:
+                if executor == "process":
+                    futures = {pool.submit(_remote_batch, *batch_args(batch)[:2]): batch for batch in batches}
+                else:
+                    futures = {pool.submit(analyze_batch, *batch_args(batch)): batch for batch in batches}
+                for future in as_completed(futures):
+                    result = future.result()
+                    collect(futures[future], _merge_remote(result) if executor == "process" else result)
+            finally:
+                if executor != "process":
+                    pool.shutdown()
+        else:
+            for batch in batches:
+                collect(batch, analyze_batch(*batch_args(batch)))
+
+        # 按文件顺序合并，保证节点编号与完成顺序无关
+        for node in nodes:
+            info = results[node]
+            self.nodes[node] = info
+            if info.get("status") != "success":
+                continue
+            for dep_path in info.get("local_imports", []):
+                self.add_edge(node, self.add_node(dep_path, 1))
+
+        self.outside_scope.update(node for node, info in enumerate(self.nodes) if info is None)
+        return nodes
+
+    # ---------- 增量更新 ----------
+
+    def replace_node(self, node: int, info: Dict) -> bool:
+        """
+        用新的分析结果替换节点并重建它的出边（被监听项目的增量更新）
+        返回是否有集合之外的节点因此不再被任何文件导入（这样的节点只有重建图才能去掉）
+        """
+        orphaned = False
+        for child in self.edges[node]:
+            self.reverse_edges[child].remove(node)
+            if child in self.outside_scope and not self.reverse_edges[child]:
+                orphaned = True
+        self.edges[node] = []
+        self.nodes[node] = info
+        self.outside_scope.discard(node)
+        self.dirty.discard(self.paths[node])
+
+        if info.get("status") == "success":
+            for dep_path in info.get("local_imports", []):
+                child = self.add_node(dep_path, 1)
+                if self.nodes[child] is None:
+                    self.outside_scope.add(child)
+                self.add_edge(node, child)
+        return orphaned
+
+    def reverse_dependents(self, node: int) -> List[int]:
+        """直接依赖该节点的节点"""
+        return list(dict.fromkeys(self.reverse_edges[node]))
+
+    def dependents(self, node: int, max_depth: Optional[int] = None) -> List[tuple]:
+        """
+        沿反向边广度优先查找传递依赖该节点的所有节点
+        返回 [(节点, 深度, 经由的下游节点)]，深度 1 为直接导入者
+        """
+        seen = {node}
+        found = []
+        frontier = [node]
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for child in frontier:
+                for parent in self.reverse_edges[child]:
+                    if parent in seen:
+                        continue
+                    seen.add(parent)
+                    found.append((parent, depth, child))
+                    next_frontier.append(parent)
+            frontier = next_frontier
+        return found
+
+    def mark_changed(self, kind: str, path: str, is_dir: bool = False):
+        """
+        根据文件变化标记需要重新分析的节点
+        修改：只有该文件本身；删除：该文件及其反向依赖（它们的导入解析结果会变化）；
+        新建：外部导入名称与新文件同名的节点（它们的导入可能因此变为本地依赖）
+        """
+        if kind == "overflow" or is_dir:
+            self.dirty.update(self.paths)
+            return
+
+        node = self.node_id(path)
+        if kind == "modified":
+            if node is not None:
+                self.dirty.add(self.paths[node])
+        elif kind == "deleted":
+            if node is not None:
+                self.dirty.add(self.paths[node])
+                self.dirty.update(self.paths[parent] for parent in self.reverse_dependents(node))
+        elif kind == "created":
+            stem = os.path.splitext(os.path.basename(path))[0]
+            if stem == "__init__":
+                stem = os.path.basename(os.path.dirname(path))
+            for other, info in enumerate(self.nodes):
+                if info is None:
+                    continue
+                for module in info.get("external_imports", []):
+                    if module == stem or module.endswith("." + stem):
+                        self.dirty.add(self.paths[other])
+                        break
+
+    def known_nodes(self) -> Dict[str, Dict]:
+        """未被标记为变化的节点分析结果，可在重建时直接复用"""
+        return {
+            path: info
+            for path, info in zip(self.paths, self.nodes)
+            if info is not None and path not in self.dirty
+        }
+
+    # ---------- 循环检测 ----------
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """Tarjan 强连通分量算法（迭代实现，避免深层依赖触发递归上限）"""
+        count = len(self.paths)
+        index_of = [-1] * count
+        low = [0] * count
+        on_stack = [False] * count
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for start in range(count):
+            if index_of[start] != -1:
+                continue
+
+            index_of[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = True
+            work = [(start, 0)]
+
+            while work:
+                node, i = work[-1]
+                edges = self.edges[node]
+
+                if i < len(edges):
+                    work[-1] = (node, i + 1)
+                    child = edges[i]
+                    if index_of[child] == -1:
+                        index_of[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, 0))
+                    elif on_stack[child]:
+                        low[node] = min(low[node], index_of[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        return components
+
+    def cycles(self) -> List[List[int]]:
+        """返回真正的循环依赖（多节点强连通分量或自依赖）"""
+        result = []
+        for component in self.strongly_connected_components():
+            if len(component) > 1 or component[0] in self.edges[component[0]]:
+                result.append(sorted(component))
+        return sorted(result)
+
+    # ---------- 输出 ----------
+
+    def _truncation_reason(self, node: int) -> str:
+        if node in self.outside_scope:
+            return "outside_scope"
+        return "max_files_reached" if node in self.skipped else "max_depth_reached"
+
+    def to_tree(self, root: int, max_depth: int) -> Dict:
+        """
+        输出兼容旧接口的嵌套树
+        只有位于当前路径上的节点（真正的回边）才标记为 circular；
+        不在任何环中的子树按深度记忆化，菱形依赖共享同一份子树
+        """
+        in_cycle = set()
+        for component in self.cycles():
+            in_cycle.update(component)
+
+        memo: Dict[tuple, Dict] = {}
+        on_path = set()
+
+        def render(node: int, depth: int) -> Dict:
+            if depth > max_depth:
+                return {"truncated": True, "reason": "max_depth_reached"}
+            if node in on_path:
+                return {"circular": True}
+
+            info = self.nodes[node]
+            if info is None:
+                return {"truncated": True, "reason": self._truncation_reason(node)}
+            if info.get("status") != "success":
+                return info
+
+            key = (node, depth)
+            if node not in in_cycle and key in memo:
+                return memo[key]
+
+            on_path.add(node)
+            dependencies = {
+                self.paths[child]: render(child, depth + 1)
+                for child in self.edges[node]
+            }
+            on_path.discard(node)
+
+            subtree = {
+                "filepath": info["filepath"],
+                "language": info.get("language"),
+                "local_imports": info.get("local_imports", []),
+                "external_imports": info.get("external_imports", []),
+                "dependencies": dependencies
+            }
+            if node not in in_cycle:
+                memo[key] = subtree
+            return subtree
+
+        return render(root, 0)
+
+    def to_flat(self) -> Dict:
+        """输出扁平的 {nodes, edges} 结构，大小与图的规模成线性关系"""
+        nodes = []
+        for node, path in enumerate(self.paths):
+            info = self.nodes[node]
+            entry = {"id": node, "filepath": path, "depth": self.depths[node]}
+            if info is None:
+                entry["status"] = "truncated"
+                entry["reason"] = self._truncation_reason(node)
+            else:
+                entry["language"] = info.get("language")
+                entry["external_imports"] = info.get("external_imports", [])
+                entry["status"] = info.get("status")
+                if info.get("error"):
+                    entry["error"] = info["error"]
+            nodes.append(entry)
+
+        return {
+            "nodes": nodes,
+            "edges": [[node, child] for node, children in enumerate(self.edges) for child in children],
+            "cycles": self.cycles()
+        }
+
+    def to_compact(self, base_dir: Optional[str], table: Optional[StringTable] = None) -> Dict:
+        """
+        输出紧凑的项目级导入图：每个文件只出现一次（base_dir 下为相对路径，None 表示保留绝对路径），
+        边和循环只引用文件下标
+        传入 table 时，路径和外部模块名也只输出下标，字符串放在结果的 strings 中
+        """
+        def path_of(path: str):
+            if table is not None:
+                return table.path(path)
+            return relative_path(path, base_dir) if base_dir else path
+
+        def module_of(module: str):
+            return table.add(module) if table is not None else module
+
+        files = []
+        for node, path in enumerate(self.paths):
+            info = self.nodes[node]
+            entry = {"path": path_of(path)}
+            if info is None:
+                entry["status"] = self._truncation_reason(node)
+            else:
+                entry["language"] = info.get("language")
+                if info.get("external_imports"):
+                    entry["external_imports"] = [module_of(module) for module in info["external_imports"]]
+                if info.get("status") != "success":
+                    entry["status"] = info.get("status")
+                    entry["error"] = info.get("error")
+            files.append(entry)
+
+        compact = {
+            "files": files,
+            "edges": [[node, child] for node, children in enumerate(self.edges) for child in children],
+            "cycles": self.cycles()
+        }
+        if table is not None:
+            compact["strings"] = table.strings
+        return compact
+
+
+class GraphCache:
+    """
+    被监听项目的依赖图缓存
+    文件变化时只标记受影响的节点，下次请求时其余节点的分析结果直接复用
+    """
+
+    def __init__(self, max_graphs: int = 32):
+        self.max_graphs = max_graphs
+        self._graphs: "OrderedDict[tuple, DependencyGraph]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def known_nodes(self, key: tuple) -> Optional[Dict[str, Dict]]:
+        with self._lock:
+            graph = self._graphs.get(key)
+            return graph.known_nodes() if graph is not None else None
+
+    def store(self, key: tuple, graph: "DependencyGraph"):
+        with self._lock:
+            self._graphs[key] = graph
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+
+    def mark_changed(self, kind: str, path: str, is_dir: bool = False):
+        with self._lock:
+            for graph in self._graphs.values():
+                graph.mark_changed(kind, path, is_dir)
+
+    def clear(self):
+        with self._lock:
+            self._graphs.clear()
+
+
+_graph_cache = GraphCache()
+
+
+def get_graph_cache() -> GraphCache:
+    """获取全局依赖图缓存"""
+    return _graph_cache
@@ -1,7 +1,10 @@
 # tools/directory_analyzer.py
 import os
-from typing import Dict, List, Optional, Set
-from pathlib import Path
+import threading
+from typing import Dict, List, Optional
+from .exclusion import DEFAULT_EXCLUDES, ExclusionMatcher
+from .usage import note_files_touched
+from .watcher import is_watched
 
 
 def _format_size(size_bytes: int) -> str:
@@ -13,36 +16,51 @@ def _format_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} TB"
 
 
-def _calculate_summary(tree: Dict) -> Dict:
-    """计算目录树的统计信息"""
-    total_files = 0
-    total_dirs = 0
-    files_by_ext = {}
+# 目录列表缓存：目录路径 -> 排序后的 DirEntry 列表
+# 只有被文件监听覆盖的目录才会缓存，目录内容变化时由监听事件精确失效
+_listing_cache: Dict[str, List[os.DirEntry]] = {}
+_listing_lock = threading.Lock()
 
-    def traverse(node):
-        nonlocal total_files, total_dirs
 
-        children = node.get("children", {})
+def _list_entries(path: str) -> List[os.DirEntry]:
+    """列出目录条目（按名称排序），被监听的目录直接复用缓存"""
+    watched = is_watched(path)
+    if watched:
+        with _listing_lock:
+            cached = _listing_cache.get(path)
+        if cached is not None:
+            return cached
 
-        # 统计文件
-        for file in children.get("files", []):
-            total_files += 1
-            ext = file.get("extension", "无扩展名")
-            files_by_ext[ext] = files_by_ext.get(ext, 0) + 1
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    note_files_touched(len(entries))
 
-        # 递归统计子目录
-        for directory in children.get("directories", []):
-            total_dirs += 1
-            if "children" in directory:
-                traverse(directory)
+    if watched:
+        # 预先取得文件的 stat，缓存中的 DirEntry 不再触发系统调用
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    entry.stat()
+            except OSError:
+                pass
+        with _listing_lock:
+            _listing_cache[path] = entries
+    return entries
 
-    traverse(tree)
 
-    return {
-        "total_files": total_files,
-        "total_directories": total_dirs,
-        "files_by_extension": files_by_ext
-    }
+def invalidate_listing(path: str, recursive: bool = False):
+    """使目录的列表缓存失效；recursive 为 True 时同时清除其所有子目录"""
+    with _listing_lock:
+        _listing_cache.pop(path, None)
+        if recursive:
+            prefix = path.rstrip(os.sep) + os.sep
+            for cached in [p for p in _listing_cache if p.startswith(prefix)]:
+                del _listing_cache[cached]
+
+
+def clear_listing_cache():
+    with _listing_lock:
+        _listing_cache.clear()
 
 
 def list_directory(
@@ -50,10 +68,14 @@ def list_directory(
         max_depth: int = 1,
         include_extensions: Optional[List[str]] = None,
         exclude_patterns: Optional[List[str]] = None,
-        show_hidden: bool = False
+        show_hidden: bool = False,
+        respect_gitignore: bool = False
 ) -> Dict:
     """
     列出目录下的文件和子目录结构
+
+    exclude_patterns 支持精确名称（如 venv）、通配符（如 *.egg-info）
+    以及相对路径模式（如 docs/build）；respect_gitignore 为 True 时额外应用根目录的 .gitignore
     """
     dirpath = os.path.abspath(dirpath)
 
@@ -69,115 +91,178 @@ def list_directory(
             "status": "error"
         }
 
-    # 默认排除常见的无关目录
-    default_excludes = {
-        '__pycache__', '.git', '.svn', '.hg',
-        'node_modules', '.idea', '.vscode',
-        'target', 'build', 'dist', '.gradle'
-    }
-
-    if exclude_patterns:
-        exclude_set = set(exclude_patterns) | default_excludes
-    else:
-        exclude_set = default_excludes
-
-    def should_exclude(path: str) -> bool:
-        """判断是否应该排除此路径"""
-        basename = os.path.basename(path)
-
-        # 排除隐藏文件
-        if not show_hidden and basename.startswith('.'):
-            return True
-
-        # 排除匹配的模式
-        for pattern in exclude_set:
-            if pattern in path or basename == pattern:
-                return True
+    exclude_set = set(exclude_patterns or []) | DEFAULT_EXCLUDES
 
-        return False
+    # 预编译排除规则，被排除的目录在进入之前就被剪掉
+    matcher = ExclusionMatcher(
+        exclude_set,
+        root=dirpath,
+        show_hidden=show_hidden,
+        respect_gitignore=respect_gitignore
+    )
 
-    def scan_directory(path: str, current_depth: int = 0) -> Dict:
-        """递归扫描目录"""
-        if current_depth > max_depth:
-            return None
+    summary = {
+        "total_files": 0,
+        "total_directories": 0,
+        "files_by_extension": {}
+    }
+    files_by_ext = summary["files_by_extension"]
 
+    def scan_entries(path: str, current_depth: int, pending: List) -> Optional[Dict]:
+        """
+        扫描单个目录，返回其 children；需要继续展开的子目录放入 pending
+        使用 os.scandir，类型判断直接使用 DirEntry 缓存的信息，每个文件只需一次 stat
+        """
         try:
-            entries = os.listdir(path)
+            entries = _list_entries(path)
         except PermissionError:
-            return {
-                "error": "权限不足",
-                "type": "error"
-            }
+            return None
 
         directories = []
         files = []
+        subdirs = []
 
-        for entry in sorted(entries):
-            entry_path = os.path.join(path, entry)
-
-            if should_exclude(entry_path):
+        for entry in entries:
+            is_dir = entry.is_dir()
+            if matcher.is_excluded(entry.path, is_dir, entry.name):
                 continue
 
-            if os.path.isdir(entry_path):
+            if is_dir:
                 dir_info = {
-                    "name": entry,
-                    "path": entry_path,
+                    "name": entry.name,
+                    "path": entry.path,
                     "type": "directory"
                 }
 
-                # 递归扫描子目录
+                # 子目录放入待扫描栈，迭代展开，避免深层目录触发递归上限
                 if current_depth < max_depth:
-                    subdir = scan_directory(entry_path, current_depth + 1)
-                    if subdir:
-                        dir_info["children"] = subdir.get("children")
-                        dir_info["summary"] = subdir.get("summary")
+                    subdirs.append((entry.path, current_depth + 1, dir_info))
 
                 directories.append(dir_info)
+                summary["total_directories"] += 1
 
-            elif os.path.isfile(entry_path):
-                _, ext = os.path.splitext(entry)
+            elif entry.is_file():
+                _, ext = os.path.splitext(entry.name)
 
                 # 扩展名过滤
                 if include_extensions and ext.lower() not in include_extensions:
                     continue
 
-                file_size = os.path.getsize(entry_path)
+                file_size = entry.stat().st_size
                 files.append({
-                    "name": entry,
-                    "path": entry_path,
+                    "name": entry.name,
+                    "path": entry.path,
                     "type": "file",
                     "extension": ext,
                     "size": file_size,
                     "size_human": _format_size(file_size)
                 })
+                summary["total_files"] += 1
+                files_by_ext[ext] = files_by_ext.get(ext, 0) + 1
 
+        # 逆序入栈，按名称顺序先序展开，files_by_extension 的键顺序与递归实现一致
+        pending.extend(reversed(subdirs))
         return {
-            "children": {
-                "directories": directories,
-                "files": files
-            }
+            "directories": directories,
+            "files": files
         }
 
-    result = scan_directory(dirpath, 0)
+    pending = []
+    root_children = scan_entries(dirpath, 0, pending)
 
-    # 计算统计信息
-    summary = _calculate_summary(result)
+    while pending:
+        path, depth, dir_info = pending.pop()
+        dir_info["children"] = scan_entries(path, depth, pending)
+        dir_info["summary"] = None
 
     return {
         "path": dirpath,
         "type": "directory",
-        "children": result.get("children"),
+        "children": root_children,
         "summary": summary,
         "filters": {
             "max_depth": max_depth,
             "include_extensions": include_extensions,
-            "exclude_patterns": list(exclude_set),
-            "show_hidden": show_hidden
+            "exclude_patterns": sorted(exclude_set),
+            "show_hidden": show_hidden,
+            "respect_gitignore": respect_gitignore
         },
         "status": "success"
     }
 
 
+def source_file_matcher(
+        dirpath: str,
+        exclude_patterns: Optional[List[str]] = None,
+        respect_gitignore: bool = True
+) -> ExclusionMatcher:
+    """find_source_files 使用的排除规则"""
+    return ExclusionMatcher(
+        set(exclude_patterns or []) | DEFAULT_EXCLUDES,
+        root=os.path.abspath(dirpath),
+        show_hidden=False,
+        respect_gitignore=respect_gitignore
+    )
+
+
+def is_discoverable(matcher: ExclusionMatcher, dirpath: str, path: str) -> bool:
+    """
+    find_source_files 遍历 dirpath 时是否会找到该文件：
+    文件本身及其在 dirpath 下的每一级上层目录都没有被排除（用于按文件事件增量更新，不必重新遍历目录）
+    """
+    dirpath = os.path.abspath(dirpath)
+    path = os.path.abspath(path)
+    rel = os.path.relpath(path, dirpath)
+    if rel == os.curdir or rel == os.pardir or rel.startswith(os.pardir + os.sep):
+        return False
+    current = dirpath
+    for name in rel.split(os.sep)[:-1]:
+        current = os.path.join(current, name)
+        if os.path.islink(current) or matcher.is_excluded(current, True, name):
+            return False
+    return os.path.isfile(path) and not matcher.is_excluded(path, False)
+
+
+def find_source_files(
+        dirpath: str,
+        extensions: Optional[List[str]],
+        exclude_patterns: Optional[List[str]] = None,
+        respect_gitignore: bool = True,
+        visited_dirs: Optional[List[str]] = None
+) -> List[str]:
+    """
+    递归找出目录下指定扩展名的所有文件（按路径排序，extensions 为 None 时返回所有文件）
+    与 list_directory 使用相同的排除规则，被排除的目录不会进入；不跟随目录符号链接，避免循环
+    visited_dirs 不为 None 时追加所有扫描过的目录
+    """
+    dirpath = os.path.abspath(dirpath)
+    extensions = {ext.lower() for ext in extensions} if extensions is not None else None
+    matcher = source_file_matcher(dirpath, exclude_patterns, respect_gitignore)
+
+    found = []
+    stack = [dirpath]
+    while stack:
+        path = stack.pop()
+        try:
+            entries = _list_entries(path)
+        except OSError:
+            continue
+        if visited_dirs is not None:
+            visited_dirs.append(path)
+
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if matcher.is_excluded(entry.path, is_dir, entry.name):
+                continue
+            if is_dir:
+                stack.append(entry.path)
+            elif (extensions is None or os.path.splitext(entry.name)[1].lower() in extensions) and entry.is_file():
+                found.append(entry.path)
+
+    found.sort()
+    return found
+
+
 def get_project_structure(
         dirpath: str,
         language: Optional[str] = None
@@ -209,7 +294,8 @@ def get_project_structure(
         max_depth=2,
         include_extensions=config['extensions'],
         exclude_patterns=config['exclude'],
-        show_hidden=False
+        show_hidden=False,
+        respect_gitignore=True
     )
 
 
@@ -228,20 +314,15 @@ def find_entry_files(
     dirpath = os.path.abspath(dirpath)
     entry_files = []
 
-    for root, dirs, files in os.walk(dirpath):
-        # 排除常见的无关目录
-        dirs[:] = [d for d in dirs if d not in {
-            '__pycache__', '.git', 'node_modules', 'venv', '.venv', 'target'
-        }]
-
-        for file in files:
-            if file in patterns or any(file.endswith(p) for p in patterns):
-                filepath = os.path.join(root, file)
-                entry_files.append({
-                    "name": file,
-                    "path": filepath,
-                    "relative_path": os.path.relpath(filepath, dirpath)
-                })
+    # 与 list_directory 使用相同的排除规则（包括 .gitignore），另外跳过虚拟环境
+    for filepath in find_source_files(dirpath, None, ['venv']):
+        file = os.path.basename(filepath)
+        if file in patterns or any(file.endswith(p) for p in patterns):
+            entry_files.append({
+                "name": file,
+                "path": filepath,
+                "relative_path": os.path.relpath(filepath, dirpath)
+            })
 
     return {
         "project_root": dirpath,
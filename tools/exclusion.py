@@ -0,0 +1,174 @@
+import fnmatch
+import os
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+# 默认排除的常见无关目录
+DEFAULT_EXCLUDES = {
+    '__pycache__', '.git', '.svn', '.hg',
+    'node_modules', '.idea', '.vscode',
+    'target', 'build', 'dist', '.gradle'
+}
+
+_GLOB_CHARS = set('*?[')
+
+
+def _compile_alternatives(regexes: List[str]) -> Optional[Pattern]:
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes))
+
+
+def _gitignore_to_regex(pattern: str) -> str:
+    """把 .gitignore 的通配模式转换为匹配相对路径（/ 分隔）的正则"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex.append(re.escape("["))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex.append(f"[{body}]")
+                i = end + 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(regex) + r"\Z"
+
+
+def compile_path_glob(pattern: str) -> Pattern:
+    """编译匹配相对路径（/ 分隔）的通配模式，** 匹配任意层目录"""
+    return re.compile(_gitignore_to_regex(pattern))
+
+
+def _parse_gitignore(gitignore_path: str) -> List[Tuple[Pattern, bool, bool]]:
+    """
+    解析 .gitignore，返回 [(正则, 是否取反, 是否仅匹配目录)]
+    不含 / 的模式匹配任意层级的文件名，含 / 的模式相对于 .gitignore 所在目录
+    """
+    rules = []
+    try:
+        with open(gitignore_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return rules
+
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        if "/" in line:
+            regex = _gitignore_to_regex(line.lstrip("/"))
+        else:
+            regex = "(?:.*/)?" + _gitignore_to_regex(line)
+        rules.append((re.compile(regex), negate, dir_only))
+
+    return rules
+
+
+class ExclusionMatcher:
+    """
+    预编译的路径排除匹配器
+    精确的名称放入集合，通配模式（如 *.egg-info）合并为一个正则，
+    含 / 的模式和可选的 .gitignore 规则按相对路径匹配
+    """
+
+    def __init__(
+            self,
+            patterns: Iterable[str] = (),
+            root: Optional[str] = None,
+            show_hidden: bool = False,
+            respect_gitignore: bool = False
+    ):
+        self.root = os.path.abspath(root) if root else None
+        self.show_hidden = show_hidden
+
+        self.exact_names = set()
+        name_globs = []
+        path_globs = []
+        for pattern in patterns:
+            pattern = os.path.normcase(pattern.strip().rstrip("/\\"))
+            if not pattern:
+                continue
+            if "/" in pattern or os.sep in pattern:
+                path_globs.append(fnmatch.translate(pattern.replace(os.sep, "/").lstrip("/")))
+            elif _GLOB_CHARS & set(pattern):
+                name_globs.append(fnmatch.translate(pattern))
+            else:
+                self.exact_names.add(pattern)
+
+        self._name_regex = _compile_alternatives(name_globs)
+        self._path_regex = _compile_alternatives(path_globs)
+
+        self._gitignore_rules = []
+        if respect_gitignore and self.root:
+            self._gitignore_rules = _parse_gitignore(os.path.join(self.root, ".gitignore"))
+
+        self._needs_rel_path = bool(self._path_regex or self._gitignore_rules)
+
+    def relative_path(self, path: str) -> str:
+        """相对于根目录、以 / 分隔的路径"""
+        rel_path = os.path.relpath(path, self.root) if self.root else path
+        return os.path.normcase(rel_path).replace(os.sep, "/")
+
+    def is_excluded(self, path: str, is_dir: bool = False, name: Optional[str] = None) -> bool:
+        """判断路径是否应被排除（目录被排除时调用方不应再进入该目录）"""
+        if name is None:
+            name = os.path.basename(path)
+
+        if not self.show_hidden and name.startswith('.'):
+            return True
+
+        name = os.path.normcase(name)
+        if name in self.exact_names:
+            return True
+        if self._name_regex is not None and self._name_regex.match(name):
+            return True
+
+        if not self._needs_rel_path:
+            return False
+
+        rel_path = self.relative_path(path)
+        if self._path_regex is not None and self._path_regex.match(rel_path):
+            return True
+
+        # .gitignore 规则：后出现的规则优先
+        excluded = False
+        for regex, negate, dir_only in self._gitignore_rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                excluded = not negate
+        return excluded
@@ -1,18 +1,99 @@
 import os
-from typing import Dict, Optional
+from collections import Counter
+from typing import Callable, Dict, List, Optional
 from .parsers.factory import ParserFactory
 from .parsers.base import FileAnalysisResult
+from .parsers.cache import get_analysis_cache
+from .parsers.project_root import get_project_root_stats
+from .parsers.session import new_session
+from .parsers.unresolved import get_unresolved_cache
+from .compact import StringTable, compact_analysis
+from .content_hash import get_content_hash_cache
+from .dependency_graph import DependencyGraph, get_graph_cache, normalize_path, relative_path
+from .project_index import ProjectIndex, get_project_index_cache
+from .symbol_index import MATCH_MODES, SymbolIndex, get_symbol_index_cache
+from .file_reader import read_file_range
+from .line_index import get_line_index_cache
+from .usage import note_files_touched
+from .watcher import is_watched
 
 
-def get_file_content(filepath: str) -> Dict[str, str]:
-    """读取单个文件的内容（语言无关）"""
+def get_file_content(
+        filepath: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        start_byte: Optional[int] = None,
+        end_byte: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        cursor: Optional[str] = None,
+        if_none_match: Optional[str] = None
+) -> Dict:
+    """
+    读取单个文件的内容（语言无关）
+    未指定范围和 max_bytes 时读取整个文件；否则按范围读取，
+    超出 max_bytes 时返回 next_cursor 以便分页继续读取
+
+    返回整个文件内容的 content_hash；不带 cursor 的读取传入的 if_none_match 与之相同时
+    只返回 not_modified，不再传输内容（哈希按文件状态缓存，未变化的文件无需重新读取）；
+    续读（带 cursor）总是返回内容，不影响分页。
+    按范围读取时只有传入 if_none_match、读取了整个文件或哈希已缓存时才有 content_hash，
+    否则为 None（不为了计算哈希读取整个文件）
+    """
+    ranged = any(arg is not None for arg in (start_line, end_line, start_byte, end_byte, max_bytes, cursor))
+    if cursor:
+        if_none_match = None
+    hashes = get_content_hash_cache()
     try:
         abspath = os.path.abspath(filepath)
-        with open(abspath, "r", encoding="utf-8") as f:
-            content = f.read()
+        st = os.stat(abspath)
+        content_hash = hashes.lookup(abspath, st)
+        if content_hash is None and ranged and if_none_match is not None:
+            # 按范围读取只读到文件的一部分，需要先计算整个文件的哈希才能判断是否变化
+            content_hash = hashes.digest(abspath, st)
+
+        if content_hash is None or content_hash != if_none_match:
+            if ranged:
+                result = read_file_range(
+                    abspath,
+                    start_line=start_line,
+                    end_line=end_line,
+                    start_byte=start_byte,
+                    end_byte=end_byte,
+                    max_bytes=max_bytes,
+                    cursor=cursor
+                )
+                # 文件刚被修改时算出的哈希也可以附带返回（不用于判断 not_modified）
+                content_hash = content_hash or hashes.lookup(abspath, st, allow_racy=True)
+                if content_hash is None and result["start_byte"] == 0 and result["end_byte"] == st.st_size:
+                    content_hash = hashes.digest(abspath, st, allow_racy=True)
+            else:
+                note_files_touched()
+                with open(abspath, "rb") as f:
+                    data = f.read()
+                content_hash = content_hash or hashes.remember(abspath, st, data)
+                # 与文本模式读取一致：统一换行符
+                content = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+                result = {
+                    "filepath": abspath,
+                    "content": content,
+                    "status": "success"
+                }
+
+            if ranged or content_hash != if_none_match:
+                result.update({
+                    "content_hash": content_hash,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "not_modified": False
+                })
+                return result
+
         return {
             "filepath": abspath,
-            "content": content,
+            "not_modified": True,
+            "content_hash": content_hash,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
             "status": "success"
         }
     except Exception as e:
@@ -25,12 +106,24 @@ def get_file_content(filepath: str) -> Dict[str, str]:
 
 def analyze_file_imports(
         filepath: str,
-        project_root: Optional[str] = None
+        project_root: Optional[str] = None,
+        output_format: str = "full",
+        relative_paths: bool = False
 ) -> Dict:
     """
     分析文件的导入语句（自动检测语言）
+
+    Args:
+        output_format: "full" 输出完整的 import_details；"compact" 输出字符串表 + 数组形式的导入记录
+        relative_paths: 紧凑格式中项目根目录下的路径是否输出为相对路径
     """
-    parser = ParserFactory.get_parser(filepath, project_root)
+    if output_format not in ("full", "compact"):
+        return {
+            "error": f"不支持的输出格式: {output_format}，可选: full, compact",
+            "status": "error"
+        }
+
+    parser = new_session(filepath).get_parser(filepath, project_root)
 
     if parser is None:
         _, ext = os.path.splitext(filepath)
@@ -41,6 +134,10 @@ def analyze_file_imports(
         }
 
     result = parser.analyze_file(filepath)
+    note_files_touched()
+
+    if output_format == "compact":
+        return compact_analysis(result, relative_paths)
 
     # 转换为字典
     return {
@@ -68,9 +165,27 @@ def analyze_file_imports(
 def get_dependency_tree(
         filepath: str,
         max_depth: int = 3,
-        project_root: Optional[str] = None
+        project_root: Optional[str] = None,
+        output_format: str = "tree",
+        workers: Optional[int] = 1,
+        executor: str = "auto",
+        max_files: Optional[int] = None,
+        relative_paths: bool = False
 ) -> Dict:
-    """获取依赖树结构（支持多语言）"""
+    """
+    获取依赖树结构（支持多语言）
+
+    Args:
+        filepath: 起始文件
+        max_depth: 最大深度
+        project_root: 项目根目录（可选，自动检测）
+        output_format: "tree" 输出兼容旧版的嵌套树，"graph" 输出扁平的 {nodes, edges}，
+            "compact" 输出字符串表 + 只引用下标的文件列表和边，体积最小
+        workers: 并行分析的工作者数量（None 表示 CPU 核数，1 表示串行）
+        executor: "thread"、"process" 或 "auto"
+        max_files: 最多分析的文件数
+        relative_paths: 紧凑格式中项目根目录下的路径是否输出为相对路径
+    """
     parser = ParserFactory.get_parser(filepath, project_root)
 
     if parser is None:
@@ -80,37 +195,292 @@ def get_dependency_tree(
             "status": "error"
         }
 
-    visited = set()
+    if executor not in ("auto", "thread", "process"):
+        return {
+            "error": f"不支持的执行方式: {executor}，可选: auto, thread, process",
+            "status": "error"
+        }
+
+    if output_format not in ("tree", "graph", "compact"):
+        return {
+            "error": f"不支持的输出格式: {output_format}，可选: tree, graph, compact",
+            "status": "error"
+        }
 
-    def build_tree(path, depth=0):
-        if depth > max_depth:
-            return {"truncated": True, "reason": "max_depth_reached"}
+    # 被监听的项目中复用上一次的依赖图，只重新分析发生变化的文件
+    watched = is_watched(filepath)
+    cache_key = (normalize_path(filepath), project_root, max_depth, max_files)
+    known = get_graph_cache().known_nodes(cache_key) if watched else None
 
-        abspath = os.path.abspath(path)
-        if abspath in visited:
-            return {"circular": True}
+    # 整个依赖树共用一个解析会话，相同的导入只解析一次
+    session = new_session(filepath)
+    graph = DependencyGraph(project_root, session=session)
+    root = graph.build(
+        filepath, max_depth,
+        workers=workers, executor=executor, max_files=max_files, known=known
+    )
+    if watched:
+        get_graph_cache().store(cache_key, graph)
+    detected_root = project_root or graph.nodes[root].get("project_root")
 
-        visited.add(abspath)
+    result = {
+        "root": filepath,
+        "project_root": detected_root,
+        "total_files": graph.analyzed_count,
+        "reused_files": graph.reused_count,
+        "budget_exhausted": bool(graph.skipped),
+        "session": session.stats()
+    }
+    if output_format == "compact":
+        # 循环依赖以文件下标的形式包含在 graph 中
+        table = StringTable(detected_root if relative_paths else None)
+        result["graph"] = graph.to_compact(None, table)
+        return result
+
+    result["cycles"] = [[graph.paths[node] for node in cycle] for cycle in graph.cycles()]
+    if output_format == "graph":
+        result["graph"] = graph.to_flat()
+    else:
+        result["tree"] = graph.to_tree(root, max_depth)
+    return result
 
-        analysis = analyze_file_imports(abspath, project_root)
-        if analysis.get("status") == "error":
-            return analysis
 
-        dependencies = {}
-        for dep_path in analysis.get("local_imports", []):
-            dependencies[dep_path] = build_tree(dep_path, depth + 1)
+def analyze_project(
+        dirpath: str,
+        project_root: Optional[str] = None,
+        workers: Optional[int] = None,
+        executor: str = "auto",
+        max_files: Optional[int] = None,
+        exclude_patterns: Optional[List[str]] = None,
+        progress: Optional[Callable[[int, int, List[Dict]], None]] = None
+) -> Dict:
+    """
+    一次分析整个项目：找出所有已注册解析器支持的源文件，并行分析后返回项目级导入图
+    用于替代逐个文件调用 analyze_file_imports；项目根目录按目录检测，不再每个文件检测一次
 
+    Args:
+        dirpath: 项目目录
+        project_root: 项目根目录（可选，默认与逐个文件分析时一样自动检测）
+        workers: 并行分析的工作者数量（None 表示 CPU 核数，1 表示串行）
+        executor: "thread"、"process" 或 "auto"（包含 Python 文件时用进程池）
+        max_files: 最多分析的文件数
+        exclude_patterns: 额外排除的名称、通配符或相对路径模式
+        progress: 每完成一批文件调用 progress(已完成数, 总数, 本批文件的导入信息)
+    """
+    dirpath = os.path.abspath(dirpath)
+    if not os.path.isdir(dirpath):
         return {
-            "filepath": abspath,
-            "language": analysis.get("language"),
-            "local_imports": analysis.get("local_imports", []),
-            "external_imports": analysis.get("external_imports", []),
-            "dependencies": dependencies
+            "error": f"目录不存在: {dirpath}",
+            "status": "error"
+        }
+
+    if executor not in ("auto", "thread", "process"):
+        return {
+            "error": f"不支持的执行方式: {executor}，可选: auto, thread, process",
+            "status": "error"
         }
 
+    on_batch = None
+    if progress is not None:
+        def on_batch(done: int, total: int, infos: List[Dict]):
+            progress(done, total, [
+                {
+                    "path": relative_path(info["filepath"], dirpath),
+                    "language": info.get("language"),
+                    "local_imports": [relative_path(dep, dirpath) for dep in info.get("local_imports", [])],
+                    "external_imports": info.get("external_imports", []),
+                    "status": info.get("status")
+                }
+                for info in infos
+            ])
+
+    # 已建立过索引时只重新分析变化的文件
+    cache = get_project_index_cache()
+    key = cache.key(dirpath, project_root, exclude_patterns, max_files)
+    index = cache.get(key)
+    if index is None:
+        index = ProjectIndex(dirpath, project_root, exclude_patterns, max_files)
+        index.build(workers=workers, executor=executor, progress=on_batch)
+        cache.store(key, index)
+    else:
+        index.refresh(workers=workers)
+
+    graph = index.graph
+    analyzed = [info for info in graph.nodes if info is not None]
     return {
-        "root": filepath,
-        "project_root": parser.project_root,
-        "tree": build_tree(filepath),
-        "total_files": len(visited)
-    }
\ No newline at end of file
+        "root": dirpath,
+        "project_roots": index.roots_by_ext,
+        "total_files": len(index.files),
+        "reused_files": graph.reused_count,
+        "truncated": index.truncated,
+        "languages": dict(Counter(info.get("language") or "unknown" for info in analyzed)),
+        "failed_files": sum(1 for info in analyzed if info.get("status") != "success"),
+        **graph.to_compact(dirpath),
+        "status": "success"
+    }
+
+
+def find_dependents(
+        filepath: str,
+        max_depth: Optional[int] = 3,
+        dirpath: Optional[str] = None,
+        project_root: Optional[str] = None
+) -> Dict:
+    """
+    查找传递依赖该文件的所有文件（"改动这个文件会影响谁"）
+    从项目导入索引的反向边直接回答；索引不存在时先分析整个项目建立索引，
+    已存在时只重新分析变化过的文件
+
+    Args:
+        filepath: 目标文件
+        max_depth: 最大反向深度（1 表示只返回直接导入者，None 表示不限）
+        dirpath: 项目目录（可选，默认使用已建立的包含该文件的索引，否则自动检测）
+        project_root: 项目根目录（可选，自动检测）
+    """
+    abspath = os.path.abspath(filepath)
+    cache = get_project_index_cache()
+
+    index = None
+    if dirpath is None:
+        index = cache.find_containing(abspath)
+        if index is None:
+            parser = ParserFactory.get_parser(abspath, project_root)
+            if parser is None:
+                _, ext = os.path.splitext(abspath)
+                return {
+                    "error": f"不支持的文件类型: {ext}",
+                    "status": "error"
+                }
+            dirpath = project_root or parser.find_project_root(os.path.dirname(abspath))
+
+    if index is None:
+        dirpath = os.path.abspath(dirpath)
+        if not os.path.isdir(dirpath):
+            return {
+                "error": f"目录不存在: {dirpath}",
+                "status": "error"
+            }
+        key = cache.key(dirpath, project_root, None, None)
+        index = cache.get(key)
+        if index is None:
+            index = ProjectIndex(dirpath, project_root)
+            index.build()
+            cache.store(key, index)
+            rebuilt = True
+        else:
+            rebuilt = index.refresh()
+    else:
+        rebuilt = index.refresh()
+
+    dependents = index.dependents(abspath, max_depth)
+    base = index.dirpath
+    return {
+        "filepath": abspath,
+        "project": base,
+        "indexed": dependents is not None,
+        "max_depth": max_depth,
+        "dependents": [
+            {
+                "path": relative_path(item["filepath"], base),
+                "depth": item["depth"],
+                "via": relative_path(item["via"], base)
+            }
+            for item in dependents or []
+        ],
+        "total": len(dependents or []),
+        "index": {
+            "files": len(index.files),
+            "rebuilt": rebuilt,
+            "reused_files": index.graph.reused_count if rebuilt else len(index.files),
+            "watched": is_watched(base)
+        },
+        "status": "success"
+    }
+
+
+def find_symbol(
+        dirpath: str,
+        name: str,
+        kind: Optional[str] = None,
+        match: str = "exact",
+        case_sensitive: bool = True,
+        limit: Optional[int] = 50,
+        exclude_patterns: Optional[List[str]] = None
+) -> Dict:
+    """
+    在项目中查找类、函数、方法等符号的定义位置（文件和行范围），一次调用即可定位
+    项目符号索引首次查询时建立，之后只重新解析变化过的文件
+
+    Args:
+        dirpath: 项目目录
+        name: 符号名称，可带外层类型（如 "JavaParser.parse_symbols"）
+        kind: 只返回该类型的符号（如 "class"、"function"、"method"）
+        match: "exact" 完全匹配，"prefix" 前缀匹配，"contains" 包含匹配
+        case_sensitive: 是否区分大小写
+        limit: 最多返回的结果数（None 表示不限）
+        exclude_patterns: 额外排除的名称、通配符或相对路径模式
+    """
+    dirpath = os.path.abspath(dirpath)
+    if not os.path.isdir(dirpath):
+        return {
+            "error": f"目录不存在: {dirpath}",
+            "status": "error"
+        }
+
+    if match not in MATCH_MODES:
+        return {
+            "error": f"不支持的匹配方式: {match}，可选: {', '.join(MATCH_MODES)}",
+            "status": "error"
+        }
+
+    cache = get_symbol_index_cache()
+    key = cache.key(dirpath, None, exclude_patterns, None)
+    index = cache.get(key)
+    if index is None:
+        index = SymbolIndex(dirpath, exclude_patterns)
+        parsed = index.build()
+        cache.store(key, index)
+        rebuilt = True
+    else:
+        parsed = index.refresh()
+        rebuilt = False
+    note_files_touched(parsed)
+
+    results = index.search(name, kind, match, case_sensitive)
+    shown = results if limit is None else results[:limit]
+    return {
+        "query": name,
+        "project": dirpath,
+        "matches": [
+            {
+                "name": symbol.name,
+                "qualified_name": symbol.qualified_name,
+                "kind": symbol.kind,
+                "path": relative_path(path, dirpath),
+                "line": symbol.line,
+                "end_line": symbol.end_line
+            }
+            for path, symbol in shown
+        ],
+        "total": len(results),
+        "truncated": len(shown) < len(results),
+        "index": {
+            **index.stats(),
+            "rebuilt": rebuilt,
+            "parsed_files": parsed,
+            "watched": is_watched(dirpath)
+        },
+        "status": "success"
+    }
+
+
+def get_cache_stats() -> Dict:
+    """获取导入分析缓存、行索引缓存、内容哈希缓存和项目根目录缓存的统计信息（命中、未命中、淘汰次数等）"""
+    return {
+        "analysis_cache": get_analysis_cache().stats(),
+        "line_index_cache": get_line_index_cache().stats(),
+        "content_hash_cache": get_content_hash_cache().stats(),
+        "project_root_cache": get_project_root_stats(),
+        "unresolved_import_cache": get_unresolved_cache().stats(),
+        "status": "success"
+    }
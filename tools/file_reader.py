@@ -0,0 +1,142 @@
+import base64
+import json
+import os
+from typing import Dict, Optional
+
+from .line_index import get_line_index
+from .usage import note_files_touched
+
+
+def _encode_cursor(state: Dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Dict:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError(f"无效的续读标记: {cursor}")
+
+
+def _trim_to_boundary(chunk: bytes, cut: int, whole_lines: bool = True) -> int:
+    """在 chunk 的 (0, cut] 内寻找合适的截断位置：按行读取时优先整行，其次 UTF-8 字符边界"""
+    if whole_lines:
+        newline = chunk.rfind(b"\n", 0, cut)
+        if newline != -1:
+            return newline + 1
+    # UTF-8 后续字节形如 0b10xxxxxx，不能作为截断点
+    while cut > 0 and (chunk[cut] & 0xC0) == 0x80:
+        cut -= 1
+    return cut if cut > 0 else 1
+
+
+def read_file_range(
+        filepath: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        start_byte: Optional[int] = None,
+        end_byte: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        cursor: Optional[str] = None
+) -> Dict:
+    """
+    按行或字节范围读取文件，超过 max_bytes 时截断并返回续读标记
+
+    Args:
+        filepath: 文件路径
+        start_line / end_line: 行范围（从 1 开始，包含 end_line）
+        start_byte / end_byte: 字节范围（end_byte 不包含）
+        max_bytes: 本次最多返回的字节数
+        cursor: 上一次返回的 next_cursor，用于继续读取
+
+    Returns:
+        文件内容片段、所在范围以及 next_cursor（读完时为 None）
+    """
+    abspath = os.path.abspath(filepath)
+
+    if (start_line is not None or end_line is not None) and \
+            (start_byte is not None or end_byte is not None):
+        raise ValueError("行范围和字节范围不能同时指定")
+
+    st = os.stat(abspath)
+    size = st.st_size
+
+    if cursor:
+        state = _decode_cursor(cursor)
+        if state.get("m") != st.st_mtime_ns or state.get("s") != size:
+            raise ValueError("文件在两次读取之间发生了变化，续读标记已失效")
+        offset, line = state["o"], state.get("l")
+        end_line, end_byte = state.get("el"), state.get("eb")
+        byte_mode = line is None
+    else:
+        offset, line = 0, 1
+        byte_mode = start_byte is not None or end_byte is not None
+
+    # 按行定位时使用缓存的行索引，任意行范围都只需一次 seek
+    index = None
+    if not byte_mode and (start_line is not None or end_line is not None):
+        index = get_line_index(abspath, st)
+
+    # 起始位置
+    if not cursor:
+        if start_byte is not None:
+            offset, line = min(max(start_byte, 0), size), None
+        elif start_line is not None:
+            line = max(start_line, 1)
+            offset = index.line_start(line)
+
+    # 结束位置（不包含）
+    if end_line is not None and index is not None:
+        end = max(index.line_start(end_line + 1), offset)
+    elif end_byte is not None:
+        end = min(max(end_byte, offset), size)
+    else:
+        end = size
+
+    truncated = max_bytes is not None and end - offset > max_bytes
+    note_files_touched()
+    with open(abspath, "rb") as f:
+        f.seek(offset)
+        if truncated:
+            # 多读一个字节用于判断截断点是否落在字符中间
+            budget = max(max_bytes, 1)
+            chunk = f.read(budget + 1)
+            end = offset + _trim_to_boundary(chunk, budget, whole_lines=not byte_mode)
+            chunk = chunk[:end - offset]
+        else:
+            chunk = f.read(end - offset)
+
+    content = chunk.decode("utf-8", errors="replace" if byte_mode else "strict")
+
+    result = {
+        "filepath": abspath,
+        "content": content,
+        "size": size,
+        "start_byte": offset,
+        "end_byte": end,
+        "truncated": truncated,
+        "next_cursor": None,
+        "status": "success"
+    }
+
+    next_line = None
+    if line is not None:
+        lines_read = chunk.count(b"\n")
+        if chunk and not chunk.endswith(b"\n"):
+            lines_read += 1
+        result["start_line"] = line
+        result["end_line"] = line + lines_read - 1
+        next_line = line + chunk.count(b"\n")
+
+    if truncated:
+        result["next_cursor"] = _encode_cursor({
+            "o": end,
+            "l": next_line,
+            "el": end_line,
+            "eb": end_byte,
+            "m": st.st_mtime_ns,
+            "s": size
+        })
+
+    return result
@@ -0,0 +1,130 @@
+import os
+from typing import Dict, List
+
+from .code_search import get_search_index_cache
+from .content_hash import get_content_hash_cache
+from .dependency_graph import get_graph_cache
+from .directory_analyzer import clear_listing_cache, invalidate_listing
+from .line_index import get_line_index_cache
+from .parsers.cache import get_analysis_cache
+from .parsers.java_index import java_class_indexes
+from .parsers.project_root import invalidate_project_roots
+from .parsers.session import invalidate_sessions
+from .parsers.unresolved import get_unresolved_cache
+from .project_index import get_project_index_cache
+from .symbol_index import get_symbol_index_cache
+from .watcher import FileEvent, list_watchers, unwatch, watch
+
+
+def handle_events(events: List[FileEvent]):
+    """
+    把文件系统事件分发给各个缓存，只失效受影响的条目：
+    导入分析缓存、行索引、内容哈希、项目根目录、Java 类索引、目录列表缓存、依赖图缓存、项目导入索引、符号索引和代码搜索索引
+    """
+    analysis_cache = get_analysis_cache()
+    line_index_cache = get_line_index_cache()
+    content_hashes = get_content_hash_cache()
+    graph_cache = get_graph_cache()
+    project_indexes = get_project_index_cache()
+    symbol_indexes = get_symbol_index_cache()
+    search_indexes = get_search_index_cache()
+    indexes = java_class_indexes()
+
+    for event in events:
+        if event.kind == "overflow":
+            # 事件丢失，无法判断影响范围，全部失效
+            analysis_cache.clear()
+            content_hashes.clear()
+            clear_listing_cache()
+            invalidate_project_roots()
+            invalidate_sessions()
+            get_unresolved_cache().clear()
+            graph_cache.clear()
+            project_indexes.mark_changed(event.kind, event.path, event.is_dir)
+            symbol_indexes.mark_changed(event.kind, event.path, event.is_dir)
+            search_indexes.mark_changed(event.kind, event.path, event.is_dir)
+            for index in indexes:
+                index.invalidate()
+            continue
+
+        path = event.path
+
+        # 目录列表：条目增删或文件大小变化都会影响父目录的列表
+        invalidate_listing(os.path.dirname(path))
+        if event.is_dir:
+            invalidate_listing(path, recursive=True)
+
+        # 项目根目录：只有 __init__.py、pom.xml 等标识文件或目录的增删才会影响
+        # 导入解析结果只取决于文件是否存在
+        if event.kind != "modified":
+            invalidate_project_roots(path, event.is_dir)
+            invalidate_sessions(path)
+            get_unresolved_cache().invalidate(path)
+
+        if not event.is_dir and event.kind in ("modified", "deleted"):
+            analysis_cache.invalidate(path)
+            line_index_cache.invalidate(path)
+            content_hashes.invalidate(path)
+
+        # Java 类索引：文件级增删增量更新，目录级增删重建（新建的目录可能是新的源码根目录）
+        for index in indexes:
+            if event.is_dir and event.kind == "deleted":
+                index.invalidate()
+            elif event.is_dir and event.kind == "created":
+                if index.contains(path):
+                    index.invalidate()
+            elif not event.is_dir and event.kind in ("created", "deleted"):
+                index.update_file(path, exists=event.kind == "created")
+
+        graph_cache.mark_changed(event.kind, path, event.is_dir)
+        project_indexes.mark_changed(event.kind, path, event.is_dir)
+        symbol_indexes.mark_changed(event.kind, path, event.is_dir)
+        search_indexes.mark_changed(event.kind, path, event.is_dir)
+
+
+def watch_project(root: str, interval: float = 1.0, backend: str = "auto") -> Dict:
+    """开始监听项目目录，文件变化时自动失效相关缓存"""
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        return {
+            "error": f"目录不存在: {root}",
+            "status": "error"
+        }
+
+    watcher = watch(root, handle_events, interval=interval, backend=backend)
+    return {
+        "root": watcher.root,
+        "backend": watcher.backend_name,
+        "status": "success"
+    }
+
+
+def unwatch_project(root: str) -> Dict:
+    """停止监听项目目录"""
+    stopped = unwatch(root)
+    root = os.path.abspath(root)
+    # 停止监听后不再收到文件事件，依赖事件保持最新的缓存都不能继续使用：
+    # 之后的修改不会产生事件，重新监听时也不会补发
+    invalidate_sessions(root)
+    invalidate_project_roots(root, is_dir=True)
+    get_unresolved_cache().invalidate_tree(root)
+    invalidate_listing(root, recursive=True)
+    get_graph_cache().mark_changed("deleted", root, True)
+    get_project_index_cache().invalidate_tree(root)
+    get_symbol_index_cache().invalidate_tree(root)
+    get_search_index_cache().invalidate_tree(root)
+    for index in java_class_indexes():
+        if index.project_root == root or index.project_root.startswith(root.rstrip(os.sep) + os.sep):
+            index.invalidate()
+    return {
+        "root": root,
+        "stopped": stopped,
+        "status": "success"
+    }
+
+
+def get_watch_status() -> Dict:
+    return {
+        "watchers": list_watchers(),
+        "status": "success"
+    }
@@ -0,0 +1,144 @@
+import bisect
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, count, repeat
+from operator import add
+from typing import Dict, Optional
+
+# 建立索引时每次处理的字节数
+_CHUNK_SIZE = 16 << 20
+
+
+class LineIndex:
+    """
+    文件的换行偏移索引
+    offsets[i] 为第 i + 1 行的起始字节位置，使用紧凑的 array('Q') 存储
+    """
+
+    def __init__(self, offsets: array, size: int, mtime_ns: int):
+        self.offsets = offsets
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @property
+    def line_count(self) -> int:
+        """行数（末尾没有换行符的最后一行也计入）"""
+        if self.size == 0:
+            return 0
+        return len(self.offsets) if self.offsets[-1] < self.size else len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.itemsize * len(self.offsets)
+
+    def line_start(self, line: int) -> int:
+        """第 line 行（从 1 开始）的起始字节位置；超出文件末尾时返回文件大小"""
+        if line <= 1:
+            return 0
+        if line > len(self.offsets):
+            return self.size
+        return self.offsets[line - 1]
+
+    def line_of_offset(self, offset: int) -> int:
+        """字节位置所在的行号（从 1 开始）"""
+        return bisect.bisect_right(self.offsets, offset)
+
+
+def build_line_index(abspath: str, st: Optional[os.stat_result] = None) -> LineIndex:
+    """扫描文件建立换行偏移索引（大文件通过 mmap 分块扫描）"""
+    if st is None:
+        st = os.stat(abspath)
+
+    offsets = array('Q', [0])
+    if st.st_size == 0:
+        return LineIndex(offsets, 0, st.st_mtime_ns)
+
+    with open(abspath, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for base in range(0, st.st_size, _CHUNK_SIZE):
+            parts = data[base:base + _CHUNK_SIZE].split(b"\n")
+            # 第 k 个换行符之后的位置 = 前 k 段长度之和 + k，全部在 C 层迭代完成
+            ends = map(add, accumulate(map(len, parts[:-1])), count(1))
+            offsets.extend(map(add, ends, repeat(base)))
+
+    return LineIndex(offsets, st.st_size, st.st_mtime_ns)
+
+
+class LineIndexCache:
+    """按 (mtime, size) 校验的行索引 LRU 缓存，以索引占用的总字节数为上限"""
+
+    def __init__(self, max_bytes: int = 64 << 20):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, abspath: str, st: Optional[os.stat_result] = None) -> LineIndex:
+        """获取文件的行索引，文件变化或未缓存时重新建立"""
+        if st is None:
+            st = os.stat(abspath)
+
+        with self._lock:
+            index = self._entries.get(abspath)
+            if index is not None and index.mtime_ns == st.st_mtime_ns and index.size == st.st_size:
+                self._entries.move_to_end(abspath)
+                self.hits += 1
+                return index
+            self.misses += 1
+
+        index = build_line_index(abspath, st)
+
+        with self._lock:
+            old = self._entries.pop(abspath, None)
+            if old is not None:
+                self._total_bytes -= old.nbytes
+            self._entries[abspath] = index
+            self._total_bytes += index.nbytes
+
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+                self.evictions += 1
+
+        return index
+
+    def invalidate(self, abspath: str):
+        with self._lock:
+            index = self._entries.pop(abspath, None)
+            if index is not None:
+                self._total_bytes -= index.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "index_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+_line_index_cache = LineIndexCache()
+
+
+def get_line_index_cache() -> LineIndexCache:
+    """获取全局行索引缓存"""
+    return _line_index_cache
+
+
+def get_line_index(filepath: str, st: Optional[os.stat_result] = None) -> LineIndex:
+    """获取文件的行索引（带缓存），供所有需要行号的工具复用"""
+    return _line_index_cache.get(os.path.abspath(filepath), st)
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Set
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+
+from .cache import get_analysis_cache
+from .unresolved import get_unresolved_cache
 
 
 @dataclass
@@ -14,6 +17,20 @@ class ImportInfo:
     level: int = 0  # 相对导入层级（Python特有）
 
 
+@dataclass(frozen=True)
+class SymbolInfo:
+    """符号定义（类、函数、方法等）的统一数据结构"""
+    name: str
+    kind: str  # 'class', 'function', 'method', 'interface', 'enum', 'record', 'constructor' 等
+    line: int  # 定义起始行（从 1 开始）
+    end_line: int  # 定义结束行
+    container: Optional[str] = None  # 外层类型的名称（如 "Outer.Inner"），顶层定义为 None
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.container}.{self.name}" if self.container else self.name
+
+
 @dataclass
 class FileAnalysisResult:
     """文件分析结果的统一数据结构"""
@@ -35,6 +52,8 @@ class LanguageParser(ABC):
 
     def __init__(self, project_root: Optional[str] = None):
         self.project_root = project_root
+        # 所属的解析会话（可选），用于跨文件复用导入解析结果
+        self.session = None
 
     @abstractmethod
     def get_file_extensions(self) -> List[str]:
@@ -69,6 +88,74 @@ class LanguageParser(ABC):
         """
         pass
 
+    def resolution_key(self, import_info: ImportInfo, current_file: str) -> Optional[tuple]:
+        """
+        导入解析结果的复用键：解析结果只取决于该键时，同一会话中的其他文件可以直接复用
+        第一个元素为解析所依赖的目录（该目录下文件增删时结果可能变化）；返回 None 表示不复用（默认）
+        """
+        return None
+
+    def is_known_external(self, import_info: ImportInfo, current_file: str) -> bool:
+        """无需访问文件系统即可确定为外部模块的导入（如标准库），默认没有"""
+        return False
+
+    def resolve_import(self, import_info: ImportInfo, current_file: str) -> Optional[str]:
+        """
+        解析导入路径
+        已知的外部模块和最近确认无法解析的导入直接返回 None，不再访问文件系统；
+        属于某个会话时优先复用会话中的解析结果
+        """
+        if self.is_known_external(import_info, current_file):
+            return None
+
+        key = self.resolution_key(import_info, current_file)
+        unresolved = get_unresolved_cache()
+        if key is not None:
+            negative_key = (self.__class__.__name__,) + key[1:]
+            if unresolved.contains(key[0], negative_key):
+                return None
+
+        if self.session is not None:
+            path = self.session.resolve(self, import_info, current_file)
+        else:
+            path = self.resolve_import_path(import_info, current_file)
+
+        if path is None and key is not None:
+            unresolved.add(key[0], negative_key)
+        return path
+
+    @property
+    def cache_namespace(self) -> str:
+        """分析缓存的命名空间，解析结果只与文件内容和解析器配置有关"""
+        return f"{self.__class__.__name__}:imports"
+
+    def parse_imports_cached(self, filepath: str) -> List[ImportInfo]:
+        """
+        带缓存的 parse_imports
+        文件的 (mtime, size) 未变化时直接复用上次的解析结果
+        返回副本，调用方可以自由修改
+        """
+        cached = get_analysis_cache().get_or_compute(
+            self.cache_namespace, filepath, self.parse_imports
+        )
+        return [replace(info, names=list(info.names)) for info in cached]
+
+    def parse_symbols(self, filepath: str) -> List[SymbolInfo]:
+        """解析文件中定义的符号（类、函数等），不支持的语言返回空列表"""
+        return []
+
+    @property
+    def symbols_namespace(self) -> str:
+        """符号解析结果在分析缓存中的命名空间"""
+        return f"{self.__class__.__name__}:symbols"
+
+    def parse_symbols_cached(self, filepath: str) -> List[SymbolInfo]:
+        """
+        带缓存的 parse_symbols，与导入解析结果共用分析缓存（按文件指纹校验）
+        SymbolInfo 不可变，返回的列表可以直接共享
+        """
+        return get_analysis_cache().get_or_compute(self.symbols_namespace, filepath, self.parse_symbols)
+
     def is_local_file(self, path: Optional[str]) -> bool:
         """判断文件是否属于本地项目"""
         if path is None:
@@ -107,14 +194,14 @@ class LanguageParser(ABC):
 
         try:
             # 解析导入语句
-            import_infos = self.parse_imports(abspath)
+            import_infos = self.parse_imports_cached(abspath)
 
             local_imports = []
             external_imports = []
 
             # 解析每个导入的实际路径
             for import_info in import_infos:
-                resolved_path = self.resolve_import_path(import_info, abspath)
+                resolved_path = self.resolve_import(import_info, abspath)
                 import_info.resolved_path = resolved_path
                 import_info.is_local = self.is_local_file(resolved_path)
 
@@ -0,0 +1,239 @@
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+# 文件指纹：(mtime_ns, size)
+Fingerprint = Tuple[int, int]
+
+
+def file_fingerprint(abspath: str) -> Optional[Fingerprint]:
+    """返回文件的 (mtime_ns, size) 指纹，文件不可访问时返回 None"""
+    try:
+        st = os.stat(abspath)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class AnalysisCache:
+    """
+    以 (命名空间, 绝对路径) 为键、文件指纹校验的分析结果缓存
+    内存中为有界 LRU，可选使用 SQLite 持久化，服务重启后仍然有效
+    """
+
+    def __init__(self, max_entries: int = 4096, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Fingerprint, Any]]" = OrderedDict()
+        # 路径 -> 命名空间集合，用于按路径失效
+        self._namespaces_by_path: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+
+    # ---------- SQLite 持久化 ----------
+
+    def _get_db(self) -> Optional[sqlite3.Connection]:
+        """按需打开数据库；fork 出的子进程需重新建立连接"""
+        if not self.db_path:
+            return None
+        if self._db is not None and self._db_pid == os.getpid():
+            return self._db
+
+        db_dir = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(db_dir, exist_ok=True)
+
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            "namespace TEXT NOT NULL, path TEXT NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, value BLOB NOT NULL, "
+            "PRIMARY KEY (namespace, path))"
+        )
+        db.commit()
+        self._db = db
+        self._db_pid = os.getpid()
+        return db
+
+    def _disk_get(self, namespace: str, abspath: str, fingerprint: Fingerprint) -> Tuple[bool, Any]:
+        db = self._get_db()
+        if db is None:
+            return False, None
+        try:
+            row = db.execute(
+                "SELECT mtime_ns, size, value FROM analysis WHERE namespace = ? AND path = ?",
+                (namespace, abspath)
+            ).fetchone()
+            if row is None or (row[0], row[1]) != fingerprint:
+                return False, None
+            return True, pickle.loads(row[2])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError):
+            return False, None
+
+    def _disk_put(self, namespace: str, abspath: str, fingerprint: Fingerprint, value: Any):
+        db = self._get_db()
+        if db is None:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO analysis (namespace, path, mtime_ns, size, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, abspath, fingerprint[0], fingerprint[1],
+                 pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            )
+            db.commit()
+        except (sqlite3.Error, pickle.PicklingError):
+            pass
+
+    # ---------- 内存 LRU ----------
+
+    def _remember(self, key: Tuple[str, str], fingerprint: Fingerprint, value: Any):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (fingerprint, value)
+        self._entries.move_to_end(key)
+        self._namespaces_by_path.setdefault(key[1], set()).add(key[0])
+
+        while len(self._entries) > self.max_entries:
+            (old_ns, old_path), _ = self._entries.popitem(last=False)
+            self._forget_namespace(old_path, old_ns)
+            self.evictions += 1
+
+    def _forget_namespace(self, abspath: str, namespace: str):
+        namespaces = self._namespaces_by_path.get(abspath)
+        if namespaces is not None:
+            namespaces.discard(namespace)
+            if not namespaces:
+                del self._namespaces_by_path[abspath]
+
+    # ---------- 公共接口 ----------
+
+    def get(self, namespace: str, abspath: str, fingerprint: Fingerprint) -> Tuple[bool, Any]:
+        """查询缓存，返回 (是否命中, 值)；指纹不一致视为未命中"""
+        key = (namespace, abspath)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+
+            found, value = self._disk_get(namespace, abspath, fingerprint)
+            if found:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, fingerprint, value)
+                return True, value
+
+            self.misses += 1
+            return False, None
+
+    def put(self, namespace: str, abspath: str, fingerprint: Fingerprint, value: Any):
+        """写入缓存（内存，及可选的磁盘）"""
+        with self._lock:
+            self._remember((namespace, abspath), fingerprint, value)
+            self._disk_put(namespace, abspath, fingerprint, value)
+
+    def get_or_compute(self, namespace: str, abspath: str, compute: Callable[[str], Any]) -> Any:
+        """
+        命中则直接返回缓存值，否则调用 compute(abspath) 计算并写入缓存
+        compute 抛出的异常不会被缓存
+        """
+        fingerprint = file_fingerprint(abspath)
+        if fingerprint is None:
+            return compute(abspath)
+
+        found, value = self.get(namespace, abspath, fingerprint)
+        if found:
+            return value
+
+        value = compute(abspath)
+        self.put(namespace, abspath, fingerprint, value)
+        return value
+
+    def invalidate(self, abspath: str):
+        """使某个文件的所有缓存条目失效"""
+        with self._lock:
+            for namespace in self._namespaces_by_path.pop(abspath, set()):
+                self._entries.pop((namespace, abspath), None)
+
+            db = self._get_db()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM analysis WHERE path = ?", (abspath,))
+                    db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def clear(self):
+        """清空缓存（包括磁盘）并重置统计"""
+        with self._lock:
+            self._entries.clear()
+            self._namespaces_by_path.clear()
+            self.hits = self.misses = self.evictions = self.disk_hits = 0
+
+            db = self._get_db()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM analysis")
+                    db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def counters(self) -> Tuple[int, int, int, int]:
+        """(hits, misses, evictions, disk_hits)，用于计算子进程中的统计增量"""
+        with self._lock:
+            return self.hits, self.misses, self.evictions, self.disk_hits
+
+    def merge_counters(self, delta: Tuple[int, int, int, int]):
+        """累加进程池子进程中发生的命中/未命中，使 stats() 反映所有进程的缓存使用情况"""
+        with self._lock:
+            self.hits += delta[0]
+            self.misses += delta[1]
+            self.evictions += delta[2]
+            self.disk_hits += delta[3]
+
+    def stats(self) -> Dict:
+        """返回命中/未命中/淘汰等统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "db_path": self.db_path
+            }
+
+
+_analysis_cache = AnalysisCache()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """获取全局分析缓存"""
+    return _analysis_cache
+
+
+def configure_analysis_cache(
+        max_entries: int = 4096,
+        db_path: Optional[str] = None
+) -> AnalysisCache:
+    """重新配置全局分析缓存（max_entries=0 表示禁用内存缓存）"""
+    global _analysis_cache
+    _analysis_cache = AnalysisCache(max_entries=max_entries, db_path=db_path)
+    return _analysis_cache
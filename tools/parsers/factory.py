@@ -20,6 +20,12 @@ class ParserFactory:
         for ext in parser_instance.get_file_extensions():
             cls._parsers[ext.lower()] = parser_class
 
+    @classmethod
+    def get_parser_class(cls, filepath: str) -> Optional[Type[LanguageParser]]:
+        """根据文件扩展名获取对应的解析器类"""
+        _, ext = os.path.splitext(filepath)
+        return cls._parsers.get(ext.lower())
+
     @classmethod
     def get_parser(
             cls,
@@ -27,10 +33,7 @@ class ParserFactory:
             project_root: Optional[str] = None
     ) -> Optional[LanguageParser]:
         """根据文件扩展名获取对应的解析器"""
-        _, ext = os.path.splitext(filepath)
-        ext = ext.lower()
-
-        parser_class = cls._parsers.get(ext)
+        parser_class = cls.get_parser_class(filepath)
         if parser_class:
             return parser_class(project_root)
 
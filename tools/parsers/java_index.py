@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..watcher import is_watched
+from .project_root import UNWATCHED_TTL
+
+# 源码根目录之外不进入的构建产物/工具目录
+_PRUNED_DIRS = {'target', 'build', 'out', 'node_modules', 'bin'}
+
+
+class JavaClassIndex:
+    """
+    项目级 Java 类索引：全限定类名 -> .java 文件路径
+    一次扫描项目目录即可找出所有源码根目录（包括多模块的 */src/main/java），
+    之后的 import 解析只需一次字典查找；
+    被监听的项目由文件事件增量更新，其余项目在查找不到时按目录 mtime 校验（每 UNWATCHED_TTL 秒最多一次）
+    """
+
+    def __init__(self, project_root: str):
+        self.project_root = os.path.abspath(project_root)
+        self.src_dirs: List[str] = []
+        self.classes: Dict[str, str] = {}
+        self._dir_mtimes: Dict[str, int] = {}  # 扫描过的目录 -> mtime，用于发现新增的类
+        self._validated_at = 0.0
+        self._built = False
+        self._lock = threading.Lock()
+
+    def _is_src_root(self, dirpath: str) -> bool:
+        """名为 java 且位于某个 src 目录之下的目录视为源码根目录"""
+        if os.path.basename(dirpath) != "java":
+            return False
+        rel_parts = os.path.relpath(dirpath, self.project_root).split(os.sep)
+        return "src" in rel_parts[:-1]
+
+    def build(self):
+        """扫描项目目录，建立类名索引"""
+        src_dirs = []
+        classes = {}
+        dir_mtimes = {}
+        # 目录 -> [(所属源码根目录, 包名前缀)]
+        roots_of: Dict[str, List[Tuple[str, str]]] = {self.project_root: []}
+
+        for root, dirs, files in os.walk(self.project_root):
+            try:
+                dir_mtimes[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                pass
+            active = roots_of.pop(root, [])
+            if self._is_src_root(root):
+                src_dirs.append(root)
+                active = active + [(root, "")]
+
+            # 排序保证结果稳定（main 先于 test，与原先的查找顺序一致）
+            kept = []
+            for name in sorted(dirs):
+                if name.startswith('.'):
+                    continue
+                if not active and name in _PRUNED_DIRS:
+                    continue
+                kept.append(name)
+                roots_of[os.path.join(root, name)] = [
+                    (src_root, f"{prefix}{name}.") for src_root, prefix in active
+                ]
+            dirs[:] = kept
+
+            if not active:
+                continue
+
+            for filename in files:
+                if not filename.endswith(".java"):
+                    continue
+                class_name = filename[:-len(".java")]
+                path = os.path.normcase(os.path.join(root, filename))
+                for _, prefix in active:
+                    classes.setdefault(prefix + class_name, path)
+
+        with self._lock:
+            self.src_dirs = src_dirs
+            self.classes = classes
+            self._dir_mtimes = dir_mtimes
+            self._validated_at = time.monotonic()
+            self._built = True
+
+    def ensure_built(self):
+        if not self._built:
+            self.build()
+
+    def lookup(self, qualified_name: str) -> Optional[str]:
+        """按全限定类名查找文件路径，找不到时返回 None"""
+        self.ensure_built()
+        path = self.classes.get(qualified_name)
+        if path is not None and not os.path.exists(path):
+            # 文件已被删除，索引过期，重建后再查一次
+            self.build()
+            path = self.classes.get(qualified_name)
+        elif path is None and self._dirs_changed():
+            # 未被监听的项目中可能新增了类
+            self.build()
+            path = self.classes.get(qualified_name)
+        return path
+
+    def _dirs_changed(self) -> bool:
+        """未被监听的项目：距上次校验超过 UNWATCHED_TTL 时，检查扫描过的目录是否有条目增删"""
+        if is_watched(self.project_root):
+            return False
+        now = time.monotonic()
+        if now - self._validated_at < UNWATCHED_TTL:
+            return False
+        self._validated_at = now
+        for path, mtime in list(self._dir_mtimes.items()):
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def update_file(self, path: str, exists: bool):
+        """
+        增量更新单个 .java 文件（由文件监听触发）
+        索引尚未建立时无需处理；新建的文件不在任何已知的源码根目录下时（如新增的模块）下次查询时重建
+        """
+        if not self._built or not path.endswith(".java"):
+            return
+
+        path = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            known_root = False
+            for src_root in self.src_dirs:
+                prefix = os.path.normcase(src_root) + os.sep
+                if not path.startswith(prefix):
+                    continue
+                known_root = True
+                qualified_name = path[len(prefix):-len(".java")].replace(os.sep, ".")
+                if exists:
+                    self.classes.setdefault(qualified_name, path)
+                elif self.classes.get(qualified_name) == path:
+                    del self.classes[qualified_name]
+            if exists and not known_root and self.contains(path):
+                self._built = False
+
+    def contains(self, path: str) -> bool:
+        """路径是否位于项目目录之下"""
+        root = os.path.normcase(self.project_root)
+        path = os.path.normcase(os.path.abspath(path))
+        return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+    def invalidate(self):
+        """标记索引过期，下次查询时重建"""
+        with self._lock:
+            self._built = False
+
+
+_indexes: Dict[str, JavaClassIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_java_class_index(project_root: str) -> JavaClassIndex:
+    """获取（必要时创建）项目对应的类索引"""
+    key = os.path.normcase(os.path.abspath(project_root))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = JavaClassIndex(project_root)
+            _indexes[key] = index
+        return index
+
+
+def java_class_indexes() -> List[JavaClassIndex]:
+    """当前已创建的所有类索引"""
+    with _indexes_lock:
+        return list(_indexes.values())
+
+
+def invalidate_java_class_index(project_root: Optional[str] = None):
+    """使指定项目（或全部项目）的类索引失效"""
+    with _indexes_lock:
+        if project_root is None:
+            indexes = list(_indexes.values())
+        else:
+            index = _indexes.get(os.path.normcase(os.path.abspath(project_root)))
+            indexes = [index] if index else []
+    for index in indexes:
+        index.invalidate()
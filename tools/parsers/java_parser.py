@@ -1,12 +1,121 @@
+import bisect
 import os
 import re
-from typing import List, Optional
-from .base import LanguageParser, ImportInfo
+from typing import Dict, List, Optional, Tuple
+from .base import LanguageParser, ImportInfo, SymbolInfo
+from .cache import file_fingerprint, get_analysis_cache
+from .java_index import get_java_class_index
+from .project_root import java_root_resolver
+
+# 注释、文本块、字符串和字符字面量，提取符号前替换为等长空白（保留换行，行号不变）
+_JAVA_NON_CODE = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'',
+    re.DOTALL
+)
+# 类型声明：class / interface / enum / record / @interface
+_JAVA_TYPE = re.compile(r'(?<![\w$.@])(?:(@\s*interface)|(class|interface|enum|record))\s+([A-Za-z_$][\w$]*)')
+# 方法或构造器声明：名称 (参数) [throws ...] [default 值] 后接方法体或分号
+_JAVA_METHOD = re.compile(
+    r'(?<![\w$.@])([A-Za-z_$][\w$]*)\s*\(([^()]*(?:\([^()]*\)[^()]*)*)\)\s*'
+    r'(?:throws\s+[\w$.,\s]+?|default\s+[^;{}]+?)?\s*([{;])'
+)
+_JAVA_ANNOTATION = re.compile(r'@[\w$.]+(?:\s*\([^()]*\))?')
+_JAVA_MODIFIERS = frozenset({
+    "public", "protected", "private", "static", "final", "abstract", "synchronized",
+    "native", "default", "strictfp", "transient", "volatile", "sealed", "non-sealed"
+})
+_JAVA_STATEMENT_KEYWORDS = frozenset({
+    "if", "for", "while", "switch", "catch", "synchronized", "return", "new", "else", "try", "do", "throw"
+})
+
+# 文件头扫描：行内需要跳过的注释、文本块和字面量的起始
+_HEADER_SKIP = re.compile(r'//|/\*|"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'')
+# package / import 语句（去掉注解之后）
+_HEADER_STATEMENT = re.compile(
+    r'\s*(package|import)\s+(?:(static)\s+)?([A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*)(\s*\.\s*\*)?\s*$'
+)
+# 模块声明（module-info.java），与类型声明一样标志着文件头的结束
+_JAVA_MODULE = re.compile(r'(?<![\w$.@])(?:open\s+)?module\s+[\w$.\s]+\{')
+
+
+def _strip_header_line(line: str, mode: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    去掉一行中的注释和字面量，返回剩余代码和行末的状态
+    mode 为 "comment" / "text_block" 时表示上一行结束在块注释 / 文本块之中
+    """
+    parts = []
+    position = 0
+    while position < len(line):
+        if mode is not None:
+            end = line.find("*/" if mode == "comment" else '"""', position)
+            if end == -1:
+                return "".join(parts), mode
+            position, mode = end + (2 if mode == "comment" else 3), None
+            parts.append(" ")
+            continue
+        match = _HEADER_SKIP.search(line, position)
+        if match is None:
+            parts.append(line[position:])
+            break
+        parts.append(line[position:match.start()])
+        token = match.group()
+        if token == "//":
+            break
+        if token == "/*":
+            mode = "comment"
+        elif token == '"""':
+            mode = "text_block"
+        else:
+            parts.append(" ")
+        position = match.end()
+    return "".join(parts), mode
+
+
+def scan_java_header(filepath: str) -> Tuple[Optional[str], List[Tuple[str, bool, bool]]]:
+    """
+    逐行读取 Java 文件头，提取 package 和 import 语句
+    import 只能出现在第一个类型声明之前，遇到 class / interface / enum / record / @interface
+    （或模块声明）即停止读取；注释和字符串中的 "import" 不会被误认为语句
+
+    Returns:
+        (包名，无 package 语句时为 None, [(导入的名称, 是否 static, 是否通配符导入)])
+    """
+    package = None
+    imports = []
+    pending = ""
+    mode = None
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            code, mode = _strip_header_line(line, mode)
+            pending += code + " "
+            while True:
+                semicolon = pending.find(";")
+                statement = pending if semicolon == -1 else pending[:semicolon]
+                if _JAVA_TYPE.search(statement) or _JAVA_MODULE.search(statement):
+                    return package, imports
+                if semicolon == -1:
+                    break
+                pending = pending[semicolon + 1:]
+
+                match = _HEADER_STATEMENT.match(_JAVA_ANNOTATION.sub(" ", statement))
+                if match is None:
+                    continue
+                name = re.sub(r'\s+', "", match.group(3))
+                if match.group(1) == "package":
+                    package = name
+                else:
+                    imports.append((name, match.group(2) is not None, match.group(4) is not None))
+    return package, imports
 
 
 class JavaParser(LanguageParser):
     """Java 语言解析器"""
 
+    def __init__(self, project_root: Optional[str] = None):
+        super().__init__(project_root)
+        # 当前文件 -> 源码根目录（解析器只在一次分析中使用，每个文件只需推导一次）
+        self._source_roots: Dict[str, Optional[str]] = {}
+
     def get_file_extensions(self) -> List[str]:
         return ['.java']
 
@@ -14,62 +123,65 @@ class JavaParser(LanguageParser):
         """
         查找 Java 项目根目录
         标识：pom.xml (Maven) 或 build.gradle (Gradle) 或 src/ 目录
+        结果按目录缓存，同一模块内的文件不再重复逐级检查
         """
-        current = os.path.abspath(start_path)
+        return java_root_resolver.resolve(start_path)
 
-        while True:
-            parent = os.path.dirname(current)
-            if parent == current:
-                return start_path
-
-            # 检查 Maven 项目
-            if os.path.exists(os.path.join(current, "pom.xml")):
-                return current
-
-            # 检查 Gradle 项目
-            if os.path.exists(os.path.join(current, "build.gradle")) or \
-                    os.path.exists(os.path.join(current, "build.gradle.kts")):
-                return current
-
-            # 检查 src 目录
-            if os.path.basename(current) == "src" and os.path.isdir(current):
-                return parent
-
-            current = parent
-
-        return start_path
+    @property
+    def package_namespace(self) -> str:
+        return f"{self.__class__.__name__}:package"
 
     def parse_imports(self, filepath: str) -> List[ImportInfo]:
-        """解析 Java 文件的 import 语句"""
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        import_infos = []
-
-        # 正则匹配 import 语句
-        # import com.example.MyClass;
-        # import static com.example.Utils.*;
-        import_pattern = r'import\s+(?:static\s+)?([a-zA-Z0-9_.]+)(?:\.\*)?;'
+        """
+        解析 Java 文件的 import 语句
+        只扫描文件头（第一个类型声明之前），顺便把 package 写入分析缓存供解析回退使用
 
-        for match in re.finditer(import_pattern, content):
-            full_import = match.group(1)
+        import com.example.MyClass;       -> module="com.example.MyClass"
+        import static com.example.Utils.*; -> module="com.example.Utils"
+        """
+        # 先取指纹再读取，读取期间文件被修改时缓存的是旧指纹，下次会重新解析
+        fingerprint = file_fingerprint(filepath)
+        package, imports = scan_java_header(filepath)
+        if fingerprint is not None:
+            get_analysis_cache().put(self.package_namespace, filepath, fingerprint, package)
 
-            # 分离包名和类名
-            parts = full_import.split('.')
-            if len(parts) > 0:
-                class_name = parts[-1]
-                package = '.'.join(parts[:-1]) if len(parts) > 1 else ''
+        return [
+            ImportInfo(
+                type="import",
+                module=name,
+                names=[name.rsplit('.', 1)[-1]],
+                is_local=False,
+                resolved_path=None,
+                level=0
+            )
+            for name, _, _ in imports
+        ]
 
-                import_infos.append(ImportInfo(
-                    type="import",
-                    module=full_import,
-                    names=[class_name],
-                    is_local=False,
-                    resolved_path=None,
-                    level=0
-                ))
+    def parse_package(self, filepath: str) -> Optional[str]:
+        """文件声明的包名（带缓存），没有 package 语句时返回 None"""
+        return get_analysis_cache().get_or_compute(
+            self.package_namespace, filepath, lambda path: scan_java_header(path)[0]
+        )
 
-        return import_infos
+    def _source_root(self, current_file: str) -> Optional[str]:
+        """
+        按文件的包名推出所在的源码根目录（com.example.Foo 位于 <root>/com/example/Foo.java）
+        目录结构与包名不一致或文件无法读取时返回 None
+        """
+        if current_file in self._source_roots:
+            return self._source_roots[current_file]
+        self._source_roots[current_file] = None
+        try:
+            package = self.parse_package(current_file)
+        except (OSError, UnicodeDecodeError):
+            return None
+        directory = os.path.dirname(os.path.abspath(current_file))
+        for part in reversed(package.split('.') if package else []):
+            if os.path.basename(directory) != part:
+                return None
+            directory = os.path.dirname(directory)
+        self._source_roots[current_file] = directory
+        return directory
 
     def resolve_import_path(
             self,
@@ -79,39 +191,108 @@ class JavaParser(LanguageParser):
         """解析 Java 包路径为文件路径"""
         # Java 的包名对应目录结构
         # com.example.MyClass -> src/main/java/com/example/MyClass.java
+        # 通过项目级类索引直接查找，避免每个 import 都遍历 src 目录
+        path = get_java_class_index(self.project_root).lookup(import_info.module)
+        if path is not None:
+            return path
 
-        # 查找 src 目录
-        src_dirs = self._find_src_directories()
+        # 不在 src/**/java 布局中的源码：按当前文件的 package 推出源码根目录后查找
+        source_root = self._source_root(current_file)
+        if source_root is None:
+            return None
+        candidate = os.path.join(source_root, *import_info.module.split('.')) + ".java"
+        return os.path.normcase(candidate) if os.path.isfile(candidate) else None
 
-        # 将包名转换为路径
-        package_path = import_info.module.replace('.', os.sep) + '.java'
+    def resolution_key(self, import_info: ImportInfo, current_file: str) -> Optional[tuple]:
+        """同一项目、同一源码根目录中，同一个全限定类名总是解析到同一个文件"""
+        return self.project_root, self._source_root(current_file), import_info.module
 
-        # 在各个 src 目录中查找
-        for src_dir in src_dirs:
-            possible_path = os.path.join(src_dir, package_path)
-            if os.path.exists(possible_path):
-                return os.path.normcase(os.path.abspath(possible_path))
+    def parse_symbols(self, filepath: str) -> List[SymbolInfo]:
+        """
+        解析类型声明（含嵌套类型）及其中直接声明的方法和构造器
+        先把注释和字符串替换为空白，再按花括号配对确定每个声明的范围；
+        方法体、匿名类和 lambda 中的内容不计入
+        """
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
 
-        return None
+        code = _JAVA_NON_CODE.sub(lambda m: re.sub(r'[^\n]', ' ', m.group()), content)
+        line_starts = [0] + [match.end() for match in re.finditer(r'\n', code)]
 
-    def _find_src_directories(self) -> List[str]:
-        """查找项目中的 src 目录"""
-        src_dirs = []
+        def line_of(offset: int) -> int:
+            return bisect.bisect_right(line_starts, offset)
+
+        # 花括号配对：左括号位置 -> 右括号位置
+        closing: Dict[int, int] = {}
+        stack = []
+        opens = []
+        for match in re.finditer(r'[{}]', code):
+            if match.group() == "{":
+                stack.append(match.start())
+                opens.append(match.start())
+            elif stack:
+                closing[stack.pop()] = match.start()
+
+        def enclosing(offset: int) -> Optional[int]:
+            """包含 offset 的最内层左括号"""
+            index = bisect.bisect_left(opens, offset) - 1
+            while index >= 0:
+                position = opens[index]
+                if closing.get(position, len(code)) > offset:
+                    return position
+                index -= 1
+            return None
 
-        # Maven 标准结构
-        maven_src = os.path.join(self.project_root, "src", "main", "java")
-        if os.path.exists(maven_src):
-            src_dirs.append(maven_src)
+        # 类型体的左括号 -> 类型的限定名称
+        type_bodies: Dict[int, str] = {}
+        symbols = []
+        for match in _JAVA_TYPE.finditer(code):
+            body = code.find("{", match.end())
+            if body == -1:
+                continue
+            outer = enclosing(match.start())
+            if outer is not None and outer not in type_bodies:
+                continue  # 方法体中的局部类
+            container = type_bodies.get(outer)
+            name = match.group(3)
+            type_bodies[body] = f"{container}.{name}" if container else name
+            kind = "annotation" if match.group(1) else match.group(2)
+            symbols.append(SymbolInfo(
+                name, kind, line_of(match.start()), line_of(closing.get(body, len(code))), container
+            ))
 
-        maven_test = os.path.join(self.project_root, "src", "test", "java")
-        if os.path.exists(maven_test):
-            src_dirs.append(maven_test)
+        for match in _JAVA_METHOD.finditer(code):
+            name = match.group(1)
+            if name in _JAVA_STATEMENT_KEYWORDS:
+                continue
+            container = type_bodies.get(enclosing(match.start()))
+            if container is None:
+                continue
 
-        # Gradle 可能的结构
-        gradle_src = os.path.join(self.project_root, "src")
-        if os.path.exists(gradle_src):
-            for root, dirs, files in os.walk(gradle_src):
-                if "java" in dirs:
-                    src_dirs.append(os.path.join(root, "java"))
+            # 名称前（到上一个语句边界为止）去掉注解、泛型和修饰符后剩下的是返回类型
+            boundary = max(code.rfind(char, 0, match.start()) for char in ";{}")
+            prefix = _JAVA_ANNOTATION.sub(" ", code[boundary + 1:match.start()])
+            if "=" in prefix or "(" in prefix or "->" in prefix:
+                continue
+            prefix = re.sub(r'<[^<>]*(?:<[^<>]*>[^<>]*)*>', " ", prefix)
+            tokens = [token for token in prefix.split() if token not in _JAVA_MODIFIERS]
+            if tokens and tokens[-1] in ("class", "interface", "enum", "record"):
+                continue  # record 的组件列表
+            if tokens:
+                kind = "method"
+            elif name == container.rsplit(".", 1)[-1]:
+                kind = "constructor"
+            else:
+                continue  # 枚举常量等
 
-        return src_dirs
\ No newline at end of file
+            end = closing.get(match.start(3), len(code)) if match.group(3) == "{" else match.start(3)
+            symbols.append(SymbolInfo(name, kind, line_of(match.start()), line_of(end), container))
+
+        symbols.sort(key=lambda symbol: (symbol.line, symbol.end_line))
+        return symbols
+
+    def _find_src_directories(self) -> List[str]:
+        """查找项目中的 src 目录"""
+        index = get_java_class_index(self.project_root)
+        index.ensure_built()
+        return list(index.src_dirs)
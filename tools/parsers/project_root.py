@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from ..watcher import watch_root_of
+
+# 影响项目根目录判断的文件/目录名，它们增删时需要使相关的缓存失效
+ROOT_MARKERS = {"__init__.py", "pom.xml", "build.gradle", "build.gradle.kts", "src"}
+
+# 未被监听的目录无法得知标识文件的增删，缓存结果只在短时间内有效
+# （足以覆盖一次依赖树或项目分析中的大量重复查询）
+UNWATCHED_TTL = 5.0
+
+# step 的返回值：当前目录无法确定根目录，继续向上查找
+CONTINUE = object()
+
+# 一直查找到文件系统根目录仍未确定时的记录值，调用方返回自己的 start_path
+_REACHED_TOP = None
+
+Step = Callable[[str, str], object]
+
+
+def _within(path: str, root: Optional[str]) -> bool:
+    if root is None:
+        return False
+    key = os.path.normcase(path)
+    return key == root or key.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class ProjectRootResolver:
+    """
+    带缓存的项目根目录查找
+    每种语言提供 step(current, parent)：能在当前目录确定根目录时返回它，否则返回 CONTINUE；
+    查找过程中经过的每一级目录都会记录结果，同一目录树下的其他文件只需一次字典查找
+    """
+
+    def __init__(self, name: str, step: Step, ttl: float = UNWATCHED_TTL):
+        self.name = name
+        self.step = step
+        self.ttl = ttl
+        self._memo: Dict[str, Tuple[Optional[str], Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, directory: str, now: float):
+        entry = self._memo.get(directory)
+        if entry is None:
+            return CONTINUE
+        root, expires_at = entry
+        if expires_at is not None and expires_at < now:
+            return CONTINUE
+        return root
+
+    def _expiry_of(self, directory: str) -> Optional[float]:
+        entry = self._memo.get(directory)
+        return entry[1] if entry is not None else None
+
+    def resolve(self, start_path: str) -> str:
+        """返回 start_path 所属的项目根目录，与未缓存时的逐级查找结果一致"""
+        current = os.path.abspath(start_path)
+        now = time.monotonic()
+
+        with self._lock:
+            root = self._lookup(current, now)
+            if root is not CONTINUE:
+                self.hits += 1
+                return start_path if root is _REACHED_TOP else root
+            self.misses += 1
+
+        # 只有判断所依据的目录都在同一个监听目录之下时，结果才能依靠文件事件保持最新而不设过期时间；
+        # 监听目录之外（上级目录）的标识文件增删不会产生事件
+        watch_root = watch_root_of(start_path)
+        expires_at: Optional[float] = now + self.ttl
+        chain = []
+        root = CONTINUE
+        while True:
+            with self._lock:
+                root = self._lookup(current, now)
+                if root is not CONTINUE:
+                    # 沿用已缓存的结果，也沿用它的有效期
+                    expires_at = self._expiry_of(current)
+            if root is not CONTINUE:
+                break
+
+            chain.append(current)
+            parent = os.path.dirname(current)
+            if parent == current:
+                root = _REACHED_TOP
+                break
+
+            root = self.step(current, parent)
+            if root is not CONTINUE:
+                if _within(current, watch_root) and _within(root, watch_root):
+                    expires_at = None
+                break
+            current = parent
+
+        with self._lock:
+            for directory in chain:
+                static = expires_at is None and _within(directory, watch_root)
+                self._memo[directory] = (root, None if static else now + self.ttl)
+
+        return start_path if root is _REACHED_TOP else root
+
+    def invalidate(self, path: Optional[str] = None):
+        """使 path 及其下所有目录的缓存失效；path 为 None 时全部清空"""
+        with self._lock:
+            if path is None:
+                self._memo.clear()
+                return
+            path = os.path.abspath(path)
+            prefix = path.rstrip(os.sep) + os.sep
+            for directory in [d for d in self._memo if d == path or d.startswith(prefix)]:
+                del self._memo[directory]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._memo),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+def _python_step(current: str, parent: str):
+    """父目录不是 Python 包时，父目录就是项目根目录（当前目录为顶层包）"""
+    if not os.path.exists(os.path.join(parent, "__init__.py")):
+        return parent
+    return CONTINUE
+
+
+def _java_step(current: str, parent: str):
+    """Maven / Gradle 构建文件所在目录，或 src 目录的父目录"""
+    if os.path.exists(os.path.join(current, "pom.xml")):
+        return current
+    if os.path.exists(os.path.join(current, "build.gradle")) or \
+            os.path.exists(os.path.join(current, "build.gradle.kts")):
+        return current
+    if os.path.basename(current) == "src" and os.path.isdir(current):
+        return parent
+    return CONTINUE
+
+
+python_root_resolver = ProjectRootResolver("python", _python_step)
+java_root_resolver = ProjectRootResolver("java", _java_step)
+
+_resolvers = (python_root_resolver, java_root_resolver)
+
+
+def invalidate_project_roots(path: Optional[str] = None, is_dir: bool = False):
+    """
+    文件变化时使受影响的根目录缓存失效
+    标识文件的增删影响其所在目录及以下；目录的增删影响该目录及以下
+    """
+    if path is not None:
+        if os.path.basename(path) not in ROOT_MARKERS and not is_dir:
+            return
+        path = path if is_dir else os.path.dirname(path)
+    for resolver in _resolvers:
+        resolver.invalidate(path)
+
+
+def get_project_root_stats() -> Dict:
+    return {resolver.name: resolver.stats() for resolver in _resolvers}
@@ -1,43 +1,189 @@
 import ast
 import os
-from typing import List, Optional
-from .base import LanguageParser, ImportInfo
+import re
+import sys
+from typing import Iterable, List, Optional
+from .base import LanguageParser, ImportInfo, SymbolInfo
+from .cache import file_fingerprint, get_analysis_cache
+from .project_root import python_root_resolver
+from .unresolved import get_unresolved_cache
+
+# 扫描模式：ast 为完整语法树；fast 为快速扫描，遇到歧义时回退到 ast
+SCAN_MODES = ("ast", "fast")
+# 默认扫描模式的环境变量（通过环境变量传递，进程池中的子进程也能生效）
+SCAN_MODE_ENV = "MCP_PYTHON_SCAN_MODE"
+
+# 标准库顶层模块名，这些导入无需查找文件系统（除非项目根目录下有同名的文件或目录）
+STDLIB_MODULES = frozenset(getattr(sys, "stdlib_module_names", sys.builtin_module_names))
+
+# 快速扫描用的词法模式：字符串和注释整体跳过，
+# 行首、分号后或复合语句冒号后的 import/from 视为导入语句的开始，无法配对的引号视为歧义
+_FAST_SCAN_PATTERN = re.compile(
+    r'''
+    (?P<string>
+        [rRbBuUfF]{0,2}
+        (?:
+            """[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""
+          | \'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*\'\'\'
+          | "[^"\\\n]*(?:\\.[^"\\\n]*)*"
+          | '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+        )
+    )
+  | (?P<comment>\#[^\n]*)
+  | (?P<stmt>^[ \t]*(?:import|from)(?=[ \t.\\]))
+  | (?P<inline>[;:][ \t]*(?:import|from)(?=[ \t.\\]))
+  | (?P<stray>["'])
+    ''',
+    re.MULTILINE | re.VERBOSE | re.DOTALL
+)
 
 
 class PythonParser(LanguageParser):
     """Python 语言解析器"""
 
+    def __init__(self, project_root: Optional[str] = None, scan_mode: Optional[str] = None):
+        super().__init__(project_root)
+        scan_mode = scan_mode or os.environ.get(SCAN_MODE_ENV, "ast")
+        self.scan_mode = scan_mode if scan_mode in SCAN_MODES else "ast"
+
     def get_file_extensions(self) -> List[str]:
         return ['.py']
 
+    @property
+    def cache_namespace(self) -> str:
+        """fast 与 ast 模式的结果可能不同，分开缓存（持久化缓存在切换模式后不会返回另一种模式的结果）"""
+        return f"{self.__class__.__name__}:{self.scan_mode}:imports"
+
     def find_project_root(self, start_path: str) -> str:
         """
         向上查找包含 __init__.py 的最顶层目录
+        结果按目录缓存，同一包内的文件不再重复逐级检查
         """
-        current = os.path.abspath(start_path)
-
-        while True:
-            parent = os.path.dirname(current)
-            if parent == current:
-                return start_path
+        return python_root_resolver.resolve(start_path)
 
-            parent_init = os.path.join(parent, "__init__.py")
-            if not os.path.exists(parent_init):
-                return parent
+    def parse_imports(self, filepath: str) -> List[ImportInfo]:
+        """
+        解析 Python 文件的 import 语句
+        构建了完整语法树时，顺便把符号定义写入分析缓存，之后的符号查询无需再次解析
+        """
+        # 在读取之前取指纹：读取期间文件若被修改，缓存的符号会因指纹不符而失效
+        fingerprint = file_fingerprint(filepath)
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
 
-            current = parent
+        if self.scan_mode == "fast":
+            nodes = self._fast_scan(content, filepath)
+            if nodes is not None:
+                return self._to_import_infos(nodes)
 
-        return start_path
+        tree = ast.parse(content, filename=filepath)
+        if fingerprint is not None:
+            get_analysis_cache().put(self.symbols_namespace, filepath, fingerprint, self._symbols_from_tree(tree))
+        return self._to_import_infos(
+            node for node in ast.walk(tree)
+            if isinstance(node, (ast.Import, ast.ImportFrom))
+        )
 
-    def parse_imports(self, filepath: str) -> List[ImportInfo]:
-        """解析 Python 文件的 import 语句"""
+    def parse_symbols(self, filepath: str) -> List[SymbolInfo]:
+        """解析模块级和类中定义的类与函数（函数内部的局部定义不计入）"""
         with open(filepath, "r", encoding="utf-8") as f:
             content = f.read()
+        return self._symbols_from_tree(ast.parse(content, filename=filepath))
 
-        tree = ast.parse(content, filename=filepath)
+    @staticmethod
+    def _symbols_from_tree(tree: ast.Module) -> List[SymbolInfo]:
+        symbols = []
+
+        def visit(body: List[ast.stmt], container: Optional[str]):
+            for node in body:
+                if isinstance(node, ast.ClassDef):
+                    symbols.append(SymbolInfo(node.name, "class", node.lineno, node.end_lineno, container))
+                    visit(node.body, f"{container}.{node.name}" if container else node.name)
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    kind = "method" if container else "function"
+                    symbols.append(SymbolInfo(node.name, kind, node.lineno, node.end_lineno, container))
+                elif isinstance(node, (ast.If, ast.Try)):
+                    # if TYPE_CHECKING / try-except ImportError 中的定义同样属于所在作用域
+                    for block in (node.body, node.orelse, getattr(node, "finalbody", [])):
+                        visit(block, container)
+                    for handler in getattr(node, "handlers", []):
+                        visit(handler.body, container)
+
+        visit(tree.body, None)
+        return symbols
+
+    def _fast_scan(self, content: str, filepath: str) -> Optional[List[ast.stmt]]:
+        """
+        快速扫描 import 语句，无需构建整个模块的语法树
+        用一个正则跳过字符串和注释，只收集行首（或分号、冒号后）的 import/from 语句，
+        再把这些语句拼在一起做一次小规模的 ast.parse。
+        try / if TYPE_CHECKING 等缩进块中的导入同样会被找到。
+        遇到无法确定的情况（未闭合的引号、解析失败等）返回 None，由调用方回退到完整 AST
+        """
+        snippets = []
+        covered_until = 0
+
+        for match in _FAST_SCAN_PATTERN.finditer(content):
+            kind = match.lastgroup
+            if kind in ("string", "comment"):
+                continue
+            if kind == "stray":
+                return None
+            if match.start() < covered_until:
+                # 已包含在上一条语句的逻辑行中（如 "import a; import b"）
+                continue
+
+            start = match.start() + (1 if kind == "inline" else 0)
+            while content[start] in " \t":
+                start += 1
+            end = self._logical_line_end(content, start)
+            if end is None:
+                return None
+            snippets.append(content[start:end])
+            covered_until = end
+
+        if not snippets:
+            return []
+
+        try:
+            tree = ast.parse("\n".join(snippets), filename=filepath)
+        except SyntaxError:
+            return None
+
+        return [
+            node for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))
+        ]
+
+    @staticmethod
+    def _logical_line_end(content: str, start: int) -> Optional[int]:
+        """计算从 start 开始的逻辑行结束位置（处理括号与反斜杠续行）"""
+        end = content.find("\n", start)
+        if end == -1:
+            end = len(content)
+
+        open_paren = content.find("(", start, end)
+        if open_paren != -1:
+            close_paren = content.find(")", open_paren)
+            if close_paren == -1:
+                return None
+            end = content.find("\n", close_paren)
+            return len(content) if end == -1 else end
+
+        while content[start:end].rstrip().endswith("\\"):
+            next_end = content.find("\n", end + 1)
+            if next_end == -1:
+                return None
+            end = next_end
+
+        return end
+
+    @staticmethod
+    def _to_import_infos(nodes: Iterable[ast.stmt]) -> List[ImportInfo]:
+        """将 Import / ImportFrom 节点转换为 ImportInfo 列表"""
         import_infos = []
 
-        for node in ast.walk(tree):
+        for node in nodes:
             if isinstance(node, ast.ImportFrom):
                 level = node.level or 0
                 module = node.module or ""
@@ -78,24 +224,40 @@ class PythonParser(LanguageParser):
 
         return import_infos
 
-    def resolve_import_path(
-            self,
-            import_info: ImportInfo,
-            current_file: str
-    ) -> Optional[str]:
-        """解析 Python 模块路径为文件路径"""
-        current_dir = os.path.dirname(current_file)
+    def _import_base_dir(self, import_info: ImportInfo, current_file: str) -> str:
+        """导入解析的起始目录：相对导入从当前文件所在目录逐级向上，绝对导入从项目根目录开始"""
         level = import_info.level
 
-        # 计算起始目录
         if level > 0:
             # 相对导入
-            parent_dir = current_dir
+            parent_dir = os.path.dirname(current_file)
             for _ in range(level - 1):
                 parent_dir = os.path.dirname(parent_dir)
-        else:
-            # 绝对导入
-            parent_dir = self.project_root
+            return parent_dir
+
+        # 绝对导入
+        return self.project_root
+
+    def resolution_key(self, import_info: ImportInfo, current_file: str) -> Optional[tuple]:
+        """解析结果只取决于起始目录和模块名"""
+        return self._import_base_dir(import_info, current_file), import_info.module
+
+    def is_known_external(self, import_info: ImportInfo, current_file: str) -> bool:
+        """标准库模块，且没有被项目根目录下的同名模块遮蔽"""
+        if import_info.level > 0 or self.project_root is None:
+            return False
+        top = import_info.module.split(".", 1)[0]
+        if top not in STDLIB_MODULES:
+            return False
+        return top not in get_unresolved_cache().top_level_names(self.project_root)
+
+    def resolve_import_path(
+            self,
+            import_info: ImportInfo,
+            current_file: str
+    ) -> Optional[str]:
+        """解析 Python 模块路径为文件路径"""
+        parent_dir = self._import_base_dir(import_info, current_file)
 
         # 构建模块路径
         module_parts = import_info.module.split(".")
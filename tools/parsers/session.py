@@ -0,0 +1,151 @@
+import os
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple, Type
+
+from ..watcher import watch_root_of
+from .base import ImportInfo, LanguageParser
+from .factory import ParserFactory
+
+# 会话中尚未解析过的键
+_MISSING = object()
+
+
+class ResolutionMemo:
+    """
+    导入解析结果的记录：(解析器类, 解析键) -> 文件路径，None 表示无法解析（外部模块）
+    解析结果只取决于文件是否存在，文件内容修改不影响，只有文件增删时需要清除
+    """
+
+    def __init__(self):
+        self._entries: Dict[tuple, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        return self._entries.get(key, _MISSING)
+
+    def put(self, key: tuple, path: Optional[str]):
+        with self._lock:
+            self._entries[key] = path
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ParserSession:
+    """
+    一次请求（一次依赖树展开或项目分析）内共享的解析上下文
+    按 (解析器类, 项目根目录) 复用解析器实例，按模块记录导入解析结果，并统计本次请求的情况；
+    传入共享的 ResolutionMemo 时解析结果可以跨请求复用
+    """
+
+    def __init__(self, memo: Optional[ResolutionMemo] = None):
+        self.memo = memo if memo is not None else ResolutionMemo()
+        self._parsers: Dict[Tuple[Type[LanguageParser], str], LanguageParser] = {}
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def get_parser(self, filepath: str, project_root: Optional[str] = None) -> Optional[LanguageParser]:
+        """
+        获取文件对应的解析器，同一项目根目录下的文件共用一个实例
+        未指定 project_root 时按文件所在目录检测，与单独创建解析器时的结果一致
+        """
+        parser_class = ParserFactory.get_parser_class(filepath)
+        if parser_class is None:
+            return None
+
+        if project_root is None:
+            detector = self._parsers.get((parser_class, None))
+            if detector is None:
+                detector = parser_class()
+                self._parsers[(parser_class, None)] = detector
+            project_root = detector.find_project_root(os.path.dirname(os.path.abspath(filepath)))
+
+        key = (parser_class, project_root)
+        parser = self._parsers.get(key)
+        if parser is None:
+            with self._lock:
+                parser = self._parsers.get(key)
+                if parser is None:
+                    parser = parser_class(project_root)
+                    parser.session = self
+                    self._parsers[key] = parser
+                    self._counters["parsers_created"] += 1
+        self._count("files_analyzed")
+        return parser
+
+    def resolve(self, parser: LanguageParser, import_info: ImportInfo, current_file: str) -> Optional[str]:
+        """解析导入路径，相同的解析键只解析一次"""
+        key = parser.resolution_key(import_info, current_file)
+        if key is None:
+            self._count("resolution_misses")
+            return parser.resolve_import_path(import_info, current_file)
+
+        key = (parser.__class__, key)
+        path = self.memo.get(key)
+        if path is not _MISSING:
+            self._count("resolution_hits")
+            if path is None:
+                self._count("unresolved_hits")
+            return path
+
+        self._count("resolution_misses")
+        path = parser.resolve_import_path(import_info, current_file)
+        self.memo.put(key, path)
+        return path
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters.get("resolution_hits", 0) + counters.get("resolution_misses", 0)
+        return {
+            "files_analyzed": counters.get("files_analyzed", 0),
+            "parsers_created": counters.get("parsers_created", 0),
+            "resolution_hits": counters.get("resolution_hits", 0),
+            "resolution_misses": counters.get("resolution_misses", 0),
+            "unresolved_hits": counters.get("unresolved_hits", 0),
+            "resolution_hit_rate": round(counters.get("resolution_hits", 0) / lookups, 4) if lookups else 0.0,
+            "memo_entries": len(self.memo)
+        }
+
+
+# 被监听目录的共享解析记录：监听目录 -> ResolutionMemo，文件增删时由监听事件清除
+_shared_memos: Dict[str, ResolutionMemo] = {}
+_shared_lock = threading.Lock()
+
+
+def new_session(path: Optional[str] = None) -> ParserSession:
+    """
+    为一次请求创建解析会话
+    path 位于被监听的目录下时，会话使用该目录的共享解析记录，跨请求复用
+    """
+    root = watch_root_of(path) if path else None
+    if root is None:
+        return ParserSession()
+    with _shared_lock:
+        memo = _shared_memos.get(root)
+        if memo is None:
+            memo = ResolutionMemo()
+            _shared_memos[root] = memo
+    return ParserSession(memo)
+
+
+def invalidate_sessions(path: Optional[str] = None):
+    """文件增删后清除包含该路径的共享解析记录；path 为 None 时全部清除"""
+    with _shared_lock:
+        memos = list(_shared_memos.items())
+    for root, memo in memos:
+        if path is None:
+            memo.clear()
+            continue
+        key = os.path.normcase(os.path.abspath(path))
+        if key == root or key.startswith(root.rstrip(os.sep) + os.sep):
+            memo.clear()
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+from ..watcher import is_watched
+from .project_root import UNWATCHED_TTL
+
+
+class UnresolvedImportCache:
+    """
+    无法解析的导入（外部模块）的负缓存，按解析所依赖的目录分组：
+    目录 -> {(解析器, 模块名, ...)}；同时缓存目录下的顶层名称，用于判断标准库模块是否被项目遮蔽
+    目录下新建或删除文件时整组失效；未被监听的目录只在短时间内有效
+    """
+
+    def __init__(self, ttl: float = UNWATCHED_TTL):
+        self.ttl = ttl
+        self._unresolved: Dict[str, Tuple[Optional[float], Set[tuple]]] = {}
+        self._names: Dict[str, Tuple[Optional[float], FrozenSet[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _expires_at(self, directory: str) -> Optional[float]:
+        return None if is_watched(directory) else time.monotonic() + self.ttl
+
+    @staticmethod
+    def _fresh(entry) -> bool:
+        return entry is not None and (entry[0] is None or entry[0] >= time.monotonic())
+
+    def contains(self, directory: str, key: tuple) -> bool:
+        """该导入最近是否已确认无法解析"""
+        with self._lock:
+            entry = self._unresolved.get(directory)
+            if self._fresh(entry) and key in entry[1]:
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, directory: str, key: tuple):
+        with self._lock:
+            entry = self._unresolved.get(directory)
+            if not self._fresh(entry):
+                entry = (self._expires_at(directory), set())
+                self._unresolved[directory] = entry
+            entry[1].add(key)
+
+    def top_level_names(self, directory: str) -> FrozenSet[str]:
+        """目录下可以作为顶层模块导入的名称（子目录名和 .py 文件名）"""
+        with self._lock:
+            entry = self._names.get(directory)
+            if self._fresh(entry):
+                return entry[1]
+
+        names = set()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".py"):
+                        names.add(entry.name[:-3])
+                    elif entry.is_dir():
+                        names.add(entry.name)
+        except OSError:
+            pass
+
+        names = frozenset(names)
+        with self._lock:
+            self._names[directory] = (self._expires_at(directory), names)
+        return names
+
+    def invalidate(self, path: str):
+        """文件或目录增删：它的每一级上层目录都可能因此解析出新的结果"""
+        path = os.path.abspath(path)
+        with self._lock:
+            directory = path
+            while True:
+                self._unresolved.pop(directory, None)
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+            self._names.pop(path, None)
+            self._names.pop(os.path.dirname(path), None)
+
+    def invalidate_tree(self, root: str):
+        """清除 root 及其下所有目录的记录（停止监听后，这些不设过期时间的记录不再可靠）"""
+        root = os.path.abspath(root)
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            for cache in (self._unresolved, self._names):
+                for directory in [d for d in cache if d == root or d.startswith(prefix)]:
+                    del cache[directory]
+
+    def clear(self):
+        with self._lock:
+            self._unresolved.clear()
+            self._names.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "directories": len(self._unresolved),
+                "entries": sum(len(entry[1]) for entry in self._unresolved.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+_unresolved_cache = UnresolvedImportCache()
+
+
+def get_unresolved_cache() -> UnresolvedImportCache:
+    """获取全局的无法解析导入缓存"""
+    return _unresolved_cache
@@ -0,0 +1,382 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .dependency_graph import DependencyGraph, ProgressCallback, analyze_batch, normalize_path
+from .directory_analyzer import find_source_files, is_discoverable, source_file_matcher
+from .parsers.cache import Fingerprint, file_fingerprint
+from .parsers.factory import ParserFactory
+from .parsers.project_root import UNWATCHED_TTL, invalidate_project_roots
+from .parsers.session import new_session
+from .parsers.unresolved import get_unresolved_cache
+from .usage import note_files_touched
+from .watcher import is_watched
+
+
+def discover_source_files(
+        dirpath: str,
+        exclude_patterns: Optional[List[str]] = None,
+        max_files: Optional[int] = None
+) -> Tuple[List[str], Dict[str, int], bool]:
+    """
+    找出目录中所有支持的源文件，并记录扫描过的目录的 mtime（用于发现增删）
+
+    Returns:
+        (文件列表, 目录 -> mtime_ns, 是否因 max_files 截断)
+    """
+    dirs: List[str] = []
+    files = find_source_files(
+        dirpath,
+        ParserFactory.get_supported_extensions(),
+        exclude_patterns,
+        visited_dirs=dirs
+    )
+    truncated = max_files is not None and len(files) > max_files
+    if truncated:
+        files = files[:max_files]
+
+    dir_mtimes = {}
+    for path in dirs:
+        try:
+            dir_mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+    return files, dir_mtimes, truncated
+
+
+def dirs_changed(dir_mtimes: Dict[str, int]) -> bool:
+    """目录 mtime 变化说明其中有条目增删（新建的文件只能通过重新扫描发现）"""
+    for path, mtime in dir_mtimes.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+class ProjectIndex:
+    """
+    项目级导入索引：整个项目的正向导入图及其反向边
+    建立后可以直接回答"谁导入了这个文件"，不需要重新解析；
+    被监听的项目按文件事件只更新变化的节点和边，不重新遍历目录；
+    其余项目每隔 UNWATCHED_TTL 秒按文件指纹和目录 mtime 校验一次
+    """
+
+    def __init__(
+            self,
+            dirpath: str,
+            project_root: Optional[str] = None,
+            exclude_patterns: Optional[List[str]] = None,
+            max_files: Optional[int] = None
+    ):
+        self.dirpath = os.path.abspath(dirpath)
+        self.project_root = project_root
+        self.exclude_patterns = exclude_patterns
+        self.max_files = max_files
+
+        self.graph = DependencyGraph(project_root)
+        self.files: List[str] = []
+        self.truncated = False
+        self.roots_by_ext: Dict[str, List[str]] = {}
+        self.built_at = 0.0
+
+        self._fingerprints: Dict[str, Optional[Fingerprint]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._events: List[Tuple[str, str, bool]] = []  # 监听到但尚未处理的变化
+        self._validated_at = 0.0
+        self._lock = threading.RLock()
+
+    def _discover(self):
+        files, dir_mtimes, self.truncated = discover_source_files(self.dirpath, self.exclude_patterns, self.max_files)
+        return files, dir_mtimes
+
+    def _detect_roots(self, files: List[str]) -> List[Optional[str]]:
+        """项目根目录按 (扩展名, 所在目录) 检测一次，同目录的同类文件共用，结果与逐个文件分析一致"""
+        root_memo: Dict[tuple, str] = {}
+        roots = []
+        for path in files:
+            key = (os.path.splitext(path)[1].lower(), os.path.dirname(path))
+            if key not in root_memo:
+                root_memo[key] = self.project_root or ParserFactory.get_parser(path).find_project_root(key[1])
+            roots.append(root_memo[key])
+
+        self.roots_by_ext = {}
+        for (ext, _), root in root_memo.items():
+            self.roots_by_ext.setdefault(ext, [])
+            if root not in self.roots_by_ext[ext]:
+                self.roots_by_ext[ext].append(root)
+        return roots
+
+    def build(
+            self,
+            workers: Optional[int] = None,
+            executor: str = "auto",
+            progress: Optional[ProgressCallback] = None,
+            known: Optional[Dict[str, Dict]] = None,
+            discovered: Optional[Tuple[List[str], Dict[str, int]]] = None
+    ):
+        """
+        扫描并分析整个项目
+
+        Args:
+            workers: 并行分析的工作者数量（None 表示 CPU 核数，1 表示串行）
+            executor: "thread"、"process" 或 "auto"（包含 Python 文件时用进程池）
+            progress: 每完成一批文件调用一次
+            known: 可直接复用的节点分析结果，增量重建时传入
+            discovered: refresh 中已经遍历得到的 (文件列表, 目录 mtime)，避免再遍历一次
+        """
+        with self._lock:
+            files, dir_mtimes = discovered or self._discover()
+            roots = self._detect_roots(files)
+            if executor == "auto":
+                executor = "process" if ".py" in self.roots_by_ext else "thread"
+
+            graph = DependencyGraph(self.project_root, session=new_session(self.dirpath))
+            graph.build_project(files, roots, workers=workers, executor=executor, progress=progress, known=known)
+
+            self.graph = graph
+            self.files = files
+            self._dir_mtimes = dir_mtimes
+            self._fingerprints = {path: file_fingerprint(path) for path in files}
+            self._events = []
+            self._validated_at = time.monotonic()
+            self.built_at = time.time()
+
+    # ---------- 保持最新 ----------
+
+    def mark_changed(self, kind: str, path: str, is_dir: bool = False):
+        """记录文件监听事件，下次查询前统一处理"""
+        if kind != "overflow" and not self.contains(path):
+            return
+        with self._lock:
+            self._events.append((kind, path, is_dir))
+
+    def contains(self, path: str) -> bool:
+        """路径是否位于项目目录之下"""
+        key = normalize_path(path)
+        root = normalize_path(self.dirpath)
+        return key == root or key.startswith(root.rstrip(os.sep) + os.sep)
+
+    def _detect_changes(self) -> List[Tuple[str, str, bool]]:
+        """未被监听的项目：比较文件指纹，找出建立索引之后被修改或删除的文件"""
+        changes = []
+        for path, fingerprint in self._fingerprints.items():
+            current = file_fingerprint(path)
+            if current is None:
+                changes.append(("deleted", path, False))
+            elif current != fingerprint:
+                changes.append(("modified", path, False))
+        return changes
+
+    def _root_of(self, path: str) -> Optional[str]:
+        root = self.project_root or ParserFactory.get_parser(path).find_project_root(os.path.dirname(path))
+        roots = self.roots_by_ext.setdefault(os.path.splitext(path)[1].lower(), [])
+        if root not in roots:
+            roots.append(root)
+        return root
+
+    def _rebuild_graph(self, known: Dict[str, Dict]):
+        """所有文件的分析结果都已知时，在内存中重新建立导入图（删除节点后需要重新编号）"""
+        graph = DependencyGraph(self.project_root)
+        graph.build_project(self.files, known=known)
+        self.graph = graph
+
+    def _apply_events(self, events: List[Tuple[str, str, bool]]) -> Optional[bool]:
+        """
+        被监听的项目：只按事件中的文件增删节点、重新分析变化的文件并替换它们的出边，不重新遍历目录，
+        返回是否有文件被重新分析或增删；
+        溢出、目录级变化或设置了 max_files（文件集合取决于完整的遍历顺序）时返回 None，由调用方完整重建
+        """
+        if self.max_files is not None or any(kind == "overflow" or is_dir for kind, _, is_dir in events):
+            return None
+
+        graph = self.graph
+        files = set(self.files)
+        matcher = None
+        added_or_removed = []
+        removed = False
+        for kind, path, _ in events:
+            graph.mark_changed(kind, path)
+            if kind == "deleted" and path in files:
+                files.discard(path)
+                removed = True
+                added_or_removed.append(path)
+            elif kind == "created" and path not in files:
+                if os.path.splitext(path)[1].lower() not in ParserFactory.get_supported_extensions():
+                    continue
+                if matcher is None:
+                    matcher = source_file_matcher(self.dirpath, self.exclude_patterns)
+                if is_discoverable(matcher, self.dirpath, path):
+                    files.add(path)
+                    added_or_removed.append(path)
+            if kind == "created" and path in files:
+                # 新文件需要分析；已有的文件被替换（如先写临时文件再改名）时内容可能已经变化
+                graph.dirty.add(normalize_path(path))
+
+        unresolved = get_unresolved_cache()
+        for path in added_or_removed:
+            unresolved.invalidate(path)
+            invalidate_project_roots(path)
+
+        self.files = sorted(files)
+        changed = [path for path in self.files if normalize_path(path) in graph.dirty]
+        infos = analyze_batch(changed, [self._root_of(path) for path in changed], new_session(self.dirpath))
+        note_files_touched(len(changed))
+        for path in added_or_removed:
+            self._fingerprints.pop(path, None)
+        for path in changed:
+            self._fingerprints[path] = file_fingerprint(path)
+
+        orphaned = False
+        if not removed:
+            for path, info in zip(changed, infos):
+                orphaned = graph.replace_node(graph.add_node(path, 0), info) or orphaned
+            graph.dirty.clear()
+        if removed or orphaned:
+            known = graph.known_nodes()
+            known.update((normalize_path(path), info) for path, info in zip(changed, infos))
+            self._rebuild_graph(known)
+        self.graph.reused_count = len(self.files) - len(changed)
+        self.built_at = time.time()
+        return bool(changed or added_or_removed)
+
+    def refresh(self, workers: Optional[int] = None) -> bool:
+        """
+        使索引与磁盘一致，返回是否进行了更新
+        只重新分析变化的文件及受影响的导入者，其余节点直接复用；
+        被监听的项目直接应用文件事件，溢出或目录级变化时与未被监听的项目一样重新遍历目录
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            watched = is_watched(self.dirpath)
+            applied = self._apply_events(events) if watched and events else None
+            if applied is not None:
+                return applied
+
+            changes = events
+            rediscover = False
+            now = time.monotonic()
+            if not watched and now - self._validated_at >= UNWATCHED_TTL:
+                changes += self._detect_changes()
+                rediscover = dirs_changed(self._dir_mtimes)
+                self._validated_at = now
+            if not changes and not rediscover:
+                return False
+
+            graph = self.graph
+            added_or_removed = []
+            for kind, path, is_dir in changes:
+                graph.mark_changed(kind, path, is_dir)
+                if kind != "modified":
+                    rediscover = True
+                    added_or_removed.append((path, is_dir))
+
+            # 只有文件被修改时文件集合不变，不需要重新遍历目录
+            discovered = (self.files, self._dir_mtimes)
+            if rediscover:
+                # 新建的文件可能使其他文件原本的外部导入变为本地导入
+                old_files = set(self.files)
+                discovered = self._discover()
+                files = discovered[0]
+                for path in files:
+                    if path not in old_files:
+                        graph.mark_changed("created", path)
+                        added_or_removed.append((path, False))
+
+            # 未被监听的项目不会收到文件事件：先清除受影响目录的负缓存和根目录缓存，
+            # 否则重新分析时新模块仍会命中"无法解析"的记录
+            unresolved = get_unresolved_cache()
+            for path, is_dir in added_or_removed:
+                unresolved.invalidate(path)
+                invalidate_project_roots(path, is_dir)
+
+            self.build(workers=workers, known=graph.known_nodes(), discovered=discovered)
+            return True
+
+    # ---------- 查询 ----------
+
+    def dependents(self, filepath: str, max_depth: Optional[int] = None) -> Optional[List[Dict]]:
+        """传递依赖该文件的所有文件，文件不在索引中时返回 None"""
+        graph = self.graph
+        node = graph.node_id(filepath)
+        if node is None:
+            return None
+        return [
+            {
+                "filepath": graph.paths[parent],
+                "depth": depth,
+                "via": graph.paths[child]
+            }
+            for parent, depth, child in graph.dependents(node, max_depth)
+        ]
+
+
+class ProjectIndexCache:
+    """已建立的项目索引（按目录和参数区分），LRU 淘汰"""
+
+    def __init__(self, max_indexes: int = 8):
+        self.max_indexes = max_indexes
+        self._indexes: "OrderedDict[tuple, ProjectIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(dirpath: str, project_root: Optional[str], exclude_patterns: Optional[List[str]],
+            max_files: Optional[int]) -> tuple:
+        return (normalize_path(dirpath), project_root, tuple(sorted(exclude_patterns or [])), max_files)
+
+    def get(self, key: tuple) -> Optional[ProjectIndex]:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            return index
+
+    def store(self, key: tuple, index: ProjectIndex):
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+
+    def find_containing(self, filepath: str) -> Optional[ProjectIndex]:
+        """包含该文件的索引中目录层级最深的一个（优先使用最近建立的）"""
+        key = normalize_path(filepath)
+        with self._lock:
+            candidates = [
+                index for index in reversed(self._indexes.values())
+                if index.contains(key)
+            ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda index: len(index.dirpath))
+
+    def indexes(self) -> List[ProjectIndex]:
+        with self._lock:
+            return list(self._indexes.values())
+
+    def mark_changed(self, kind: str, path: str, is_dir: bool = False):
+        for index in self.indexes():
+            index.mark_changed(kind, path, is_dir)
+
+    def invalidate_tree(self, root: str):
+        """丢弃 root 及其下目录的索引（停止监听后，这些依赖文件事件保持最新的索引不再可靠）"""
+        root = normalize_path(root)
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            for key in [key for key in self._indexes if key[0] == root or key[0].startswith(prefix)]:
+                del self._indexes[key]
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+_project_index_cache = ProjectIndexCache()
+
+
+def get_project_index_cache() -> ProjectIndexCache:
+    """获取全局项目索引缓存"""
+    return _project_index_cache
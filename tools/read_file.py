@@ -2,6 +2,8 @@ import ast
 import os
 from typing import List, Dict, Optional
 
+from .parsers.project_root import python_root_resolver
+
 
 def find_project_root(start_path):
     """
@@ -9,23 +11,7 @@ def find_project_root(start_path):
     策略：找到包含主包名的目录的父目录
     例如：/path/to/project/mmdet/datasets/ -> /path/to/project/
     """
-    current = os.path.abspath(start_path)
-
-    # 向上遍历，找到包含 __init__.py 的最顶层目录
-    while True:
-        parent = os.path.dirname(current)
-        if parent == current:  # 已到达根目录
-            return start_path
-
-        # 检查父目录是否还是 Python 包
-        parent_init = os.path.join(parent, "__init__.py")
-        if not os.path.exists(parent_init):
-            # 父目录不是包，当前目录是顶层包
-            return parent
-
-        current = parent
-
-    return start_path
+    return python_root_resolver.resolve(start_path)
 
 def get_file_content(filepath: str) -> Dict[str, str]:
     """
@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .dependency_graph import normalize_path
+from .parsers.base import LanguageParser, SymbolInfo
+from .parsers.cache import Fingerprint, file_fingerprint
+from .parsers.factory import ParserFactory
+from .project_index import ProjectIndexCache, dirs_changed, discover_source_files
+from .watcher import is_watched
+
+# find_symbol 的匹配方式
+MATCH_MODES = ("exact", "prefix", "contains")
+
+
+class SymbolIndex:
+    """
+    项目级符号索引：名称 -> 定义所在的文件和行范围
+    每个文件的符号保存在分析缓存中（按文件指纹校验，Python 文件在导入分析时已顺便写入），
+    索引只重新解析变化的文件；被监听的项目依靠文件事件保持最新，其余项目在查询前按文件指纹和目录 mtime 校验
+    """
+
+    def __init__(
+            self,
+            dirpath: str,
+            exclude_patterns: Optional[List[str]] = None,
+            max_files: Optional[int] = None
+    ):
+        self.dirpath = os.path.abspath(dirpath)
+        self.exclude_patterns = exclude_patterns
+        self.max_files = max_files
+
+        self.files: List[str] = []
+        self.truncated = False
+        self.failed: Set[str] = set()  # 无法解析的文件
+        self.built_at = 0.0
+
+        self._symbols: Dict[str, List[SymbolInfo]] = {}
+        self._by_name: Dict[str, List[Tuple[str, SymbolInfo]]] = {}
+        self._fingerprints: Dict[str, Optional[Fingerprint]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._events: List[Tuple[str, str, bool]] = []  # 监听到但尚未处理的变化
+        self._parsers: Dict[type, LanguageParser] = {}
+        self._lock = threading.RLock()
+
+    def _parse(self, path: str):
+        """解析（或从分析缓存取得）单个文件的符号"""
+        parser_class = ParserFactory.get_parser_class(path)
+        parser = self._parsers.get(parser_class)
+        if parser is None:
+            parser = self._parsers[parser_class] = parser_class()
+
+        self._fingerprints[path] = file_fingerprint(path)
+        try:
+            self._symbols[path] = parser.parse_symbols_cached(path)
+            self.failed.discard(path)
+        except Exception:
+            self._symbols[path] = []
+            self.failed.add(path)
+
+    def _forget(self, path: str):
+        self._symbols.pop(path, None)
+        self._fingerprints.pop(path, None)
+        self.failed.discard(path)
+
+    def _reindex(self):
+        by_name: Dict[str, List[Tuple[str, SymbolInfo]]] = {}
+        for path in self.files:
+            for symbol in self._symbols.get(path, []):
+                by_name.setdefault(symbol.name, []).append((path, symbol))
+        self._by_name = by_name
+        self.built_at = time.time()
+
+    def build(self) -> int:
+        """扫描整个项目，返回解析的文件数"""
+        with self._lock:
+            self.files, self._dir_mtimes, self.truncated = discover_source_files(
+                self.dirpath, self.exclude_patterns, self.max_files
+            )
+            self._symbols.clear()
+            self._fingerprints.clear()
+            self.failed.clear()
+            self._events = []
+            for path in self.files:
+                self._parse(path)
+            self._reindex()
+            return len(self.files)
+
+    # ---------- 保持最新 ----------
+
+    def mark_changed(self, kind: str, path: str, is_dir: bool = False):
+        """记录文件监听事件，下次查询前统一处理"""
+        if kind != "overflow" and not self.contains(path):
+            return
+        with self._lock:
+            self._events.append((kind, path, is_dir))
+
+    def contains(self, path: str) -> bool:
+        """路径是否位于项目目录之下"""
+        key = normalize_path(path)
+        root = normalize_path(self.dirpath)
+        return key == root or key.startswith(root.rstrip(os.sep) + os.sep)
+
+    def refresh(self) -> int:
+        """使索引与磁盘一致，返回重新解析的文件数"""
+        with self._lock:
+            changes = self._events
+            self._events = []
+            rediscover = False
+            if not is_watched(self.dirpath):
+                for path, fingerprint in self._fingerprints.items():
+                    if file_fingerprint(path) != fingerprint:
+                        changes.append(("modified", path, False))
+                rediscover = dirs_changed(self._dir_mtimes)
+            if not changes and not rediscover:
+                return 0
+
+            changed = set()
+            reparse_all = False
+            for kind, path, is_dir in changes:
+                if kind == "modified" and not is_dir:
+                    changed.add(path)
+                else:
+                    rediscover = True
+                    reparse_all = reparse_all or kind == "overflow"
+
+            if rediscover:
+                old_files = set(self.files)
+                self.files, self._dir_mtimes, self.truncated = discover_source_files(
+                    self.dirpath, self.exclude_patterns, self.max_files
+                )
+                current = set(self.files)
+                for path in old_files - current:
+                    self._forget(path)
+                changed |= current - old_files
+                if reparse_all:
+                    changed = current
+
+            changed &= set(self.files)
+            for path in changed:
+                self._parse(path)
+            self._reindex()
+            return len(changed)
+
+    # ---------- 查询 ----------
+
+    def search(
+            self,
+            name: str,
+            kind: Optional[str] = None,
+            match: str = "exact",
+            case_sensitive: bool = True
+    ) -> List[Tuple[str, SymbolInfo]]:
+        """
+        按名称查找符号定义，结果按文件和行号排序
+        名称中包含 "." 时与限定名称比较，exact 模式下按结尾的完整段匹配（如 "Parser.parse" 只匹配 Parser 类中的 parse）
+        """
+        qualified = "." in name
+        target = name if case_sensitive else name.lower()
+
+        def matches(value: str) -> bool:
+            if not case_sensitive:
+                value = value.lower()
+            if match == "prefix":
+                return value.startswith(target)
+            if match == "contains":
+                return target in value
+            return value == target or (qualified and value.endswith("." + target))
+
+        by_name = self._by_name
+        if qualified:
+            if case_sensitive and match == "exact":
+                candidates = by_name.get(name.rsplit(".", 1)[-1], [])
+            else:
+                candidates = [item for items in by_name.values() for item in items]
+            results = [(path, symbol) for path, symbol in candidates if matches(symbol.qualified_name)]
+        elif case_sensitive and match == "exact":
+            results = list(by_name.get(name, []))
+        else:
+            results = [item for key, items in by_name.items() if matches(key) for item in items]
+
+        if kind is not None:
+            results = [(path, symbol) for path, symbol in results if symbol.kind == kind]
+        results.sort(key=lambda item: (item[0], item[1].line))
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "files": len(self.files),
+                "symbols": sum(len(items) for items in self._by_name.values()),
+                "names": len(self._by_name),
+                "failed_files": len(self.failed),
+                "truncated": self.truncated
+            }
+
+
+_symbol_index_cache = ProjectIndexCache()
+
+
+def get_symbol_index_cache() -> ProjectIndexCache:
+    """获取全局符号索引缓存（与项目导入索引使用相同的 LRU 结构）"""
+    return _symbol_index_cache
@@ -0,0 +1,56 @@
+import contextlib
+import contextvars
+from typing import Optional
+
+
+class UsageCounter:
+    """一次工具调用的资源使用情况"""
+
+    __slots__ = ("files_touched", "response_bytes")
+
+    def __init__(self):
+        self.files_touched = 0  # 读取内容、解析或列出的文件系统条目数
+        self.response_bytes: Optional[int] = None  # 在工作线程中估算的返回结果大小
+
+
+# 当前工具调用的计数器；工具在线程池中执行时通过复制的上下文共享同一个对象
+_current_usage: contextvars.ContextVar[Optional[UsageCounter]] = contextvars.ContextVar(
+    "tool_usage", default=None
+)
+
+
+# 为 True 时当前工具调用在本线程中串行执行，不分发到线程池/进程池（性能剖析时使用）
+_serial: contextvars.ContextVar[bool] = contextvars.ContextVar("tool_serial", default=False)
+
+
+def start_usage() -> UsageCounter:
+    """为当前上下文（一次工具调用）开始计数"""
+    counter = UsageCounter()
+    _current_usage.set(counter)
+    return counter
+
+
+def current_usage() -> Optional[UsageCounter]:
+    """当前工具调用的计数器，不在工具调用中时返回 None"""
+    return _current_usage.get()
+
+
+def note_files_touched(count: int = 1):
+    """记录访问的文件数；不在工具调用中时忽略"""
+    counter = _current_usage.get()
+    if counter is not None:
+        counter.files_touched += count
+
+
+@contextlib.contextmanager
+def serial_execution():
+    """在该上下文中，原本并行的分析和读取都在当前线程中串行完成"""
+    token = _serial.set(True)
+    try:
+        yield
+    finally:
+        _serial.reset(token)
+
+
+def serial_requested() -> bool:
+    return _serial.get()
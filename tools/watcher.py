@@ -0,0 +1,331 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .exclusion import DEFAULT_EXCLUDES
+
+
+@dataclass(frozen=True)
+class FileEvent:
+    """文件系统变化事件"""
+    kind: str  # 'created', 'modified', 'deleted', 'overflow'（事件丢失，需要全部失效）
+    path: str
+    is_dir: bool = False
+
+
+Listener = Callable[[List[FileEvent]], None]
+
+
+def _is_pruned(name: str) -> bool:
+    return name in DEFAULT_EXCLUDES
+
+
+class _PollingBackend:
+    """轮询后端：定期扫描目录树并比较 (mtime, size)，不依赖任何系统服务"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int, bool]]:
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if _is_pruned(entry.name):
+                            continue
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size, is_dir)
+                        if is_dir:
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        return snapshot
+
+    def poll(self, timeout: float) -> List[FileEvent]:
+        time.sleep(timeout)
+
+        current = self._scan()
+        previous = self._snapshot
+        self._snapshot = current
+
+        events = []
+        for path, state in current.items():
+            old = previous.get(path)
+            if old is None:
+                events.append(FileEvent("created", path, state[2]))
+            elif old != state and not state[2]:
+                events.append(FileEvent("modified", path, False))
+        for path, state in previous.items():
+            if path not in current:
+                events.append(FileEvent("deleted", path, state[2]))
+        return events
+
+    def close(self):
+        self._snapshot = {}
+
+
+class _InotifyBackend:
+    """Linux inotify 后端（通过 ctypes 调用 libc，无需额外依赖）"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+        self.root = root
+        self._paths: Dict[int, str] = {}
+        try:
+            self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path: str) -> bool:
+        """
+        监听单个目录；目录已不存在时返回 False
+        其他失败（如达到 max_user_watches 上限）抛出 OSError：部分子树未被监听时不能再依赖事件
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            raise OSError(error, f"inotify_add_watch 失败: {path}")
+        self._paths[wd] = path
+        return True
+
+    def _forget_tree(self, root: str):
+        """目录被移走：移除它及其下所有目录的监听，移入的新位置会重新添加"""
+        prefix = root.rstrip(os.sep) + os.sep
+        for wd, path in list(self._paths.items()):
+            if path == root or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._paths[wd]
+
+    def _add_tree(self, root: str, events: Optional[List[FileEvent]] = None):
+        """为目录树中的所有目录添加监听；events 不为空时同时补发新目录中已有条目的创建事件"""
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            if not self._add_watch(path):
+                continue
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if _is_pruned(entry.name):
+                            continue
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if events is not None:
+                            events.append(FileEvent("created", entry.path, is_dir))
+                        if is_dir:
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def poll(self, timeout: float) -> List[FileEvent]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & self.IN_Q_OVERFLOW:
+                events.append(FileEvent("overflow", self.root, True))
+                continue
+            if mask & self.IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+
+            parent = self._paths.get(wd)
+            if parent is None:
+                continue
+            if not name:
+                if mask & self.IN_DELETE_SELF:
+                    events.append(FileEvent("deleted", parent, True))
+                continue
+
+            decoded = os.fsdecode(name)
+            if _is_pruned(decoded):
+                continue
+            path = os.path.join(parent, decoded)
+            is_dir = bool(mask & self.IN_ISDIR)
+
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                events.append(FileEvent("created", path, is_dir))
+                if is_dir:
+                    self._add_tree(path, events)
+            elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                events.append(FileEvent("deleted", path, is_dir))
+                if is_dir and mask & self.IN_MOVED_FROM:
+                    self._forget_tree(path)
+            elif mask & (self.IN_MODIFY | self.IN_CLOSE_WRITE):
+                events.append(FileEvent("modified", path, is_dir))
+
+        return events
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class FileWatcher:
+    """
+    在后台线程中监听目录树的变化，并把事件批量交给监听函数
+    Linux 上优先使用 inotify，不可用时回退为轮询；
+    运行中无法为新目录添加 inotify 监听时（degraded）也切换为轮询，保证整个目录树仍能产生事件
+    """
+
+    def __init__(self, root: str, listener: Listener, interval: float = 1.0, backend: str = "auto"):
+        self.root = os.path.abspath(root)
+        self.listener = listener
+        self.interval = interval
+
+        self._backend = None
+        if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                self._backend = _InotifyBackend(self.root)
+            except (OSError, AttributeError):
+                if backend == "inotify":
+                    raise
+        if self._backend is None:
+            self._backend = _PollingBackend(self.root)
+
+        self.backend_name = "inotify" if isinstance(self._backend, _InotifyBackend) else "polling"
+        self.degraded = False
+        self.events_seen = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"watcher:{self.root}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                events = self._backend.poll(self.interval)
+            except OSError:
+                # 事件可能已丢失，全部失效；inotify 无法覆盖整个目录树时改用轮询
+                events = [FileEvent("overflow", self.root, True)]
+                if isinstance(self._backend, _InotifyBackend):
+                    self._fallback_to_polling()
+            if events and not self._stop.is_set():
+                self.events_seen += len(events)
+                try:
+                    self.listener(events)
+                except Exception as e:
+                    print(f"文件监听回调异常: {e}")
+
+    def _fallback_to_polling(self):
+        self._backend.close()
+        self._backend = _PollingBackend(self.root)
+        self.backend_name = "polling"
+        self.degraded = True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._backend.close()
+
+
+_watchers: Dict[str, FileWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def watch(root: str, listener: Listener, interval: float = 1.0, backend: str = "auto") -> FileWatcher:
+    """开始监听目录（已在监听时直接返回原监听器）"""
+    key = _key(root)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            watcher = FileWatcher(root, listener, interval=interval, backend=backend)
+            watcher.start()
+            _watchers[key] = watcher
+        return watcher
+
+
+def unwatch(root: str) -> bool:
+    """停止监听目录，返回之前是否在监听"""
+    with _watchers_lock:
+        watcher = _watchers.pop(_key(root), None)
+    if watcher is None:
+        return False
+    watcher.stop()
+    return True
+
+
+def watch_root_of(path: str) -> Optional[str]:
+    """包含该路径的被监听目录，不在任何监听目录下时返回 None"""
+    if not _watchers:
+        return None
+    key = _key(path)
+    for root in list(_watchers):
+        if key == root or key.startswith(root.rstrip(os.sep) + os.sep):
+            return root
+    return None
+
+
+def is_watched(path: str) -> bool:
+    """路径是否位于某个被监听的目录之下（只有这样缓存才能依赖事件保持最新）"""
+    return watch_root_of(path) is not None
+
+
+def list_watchers() -> List[Dict]:
+    with _watchers_lock:
+        return [
+            {"root": w.root, "backend": w.backend_name, "degraded": w.degraded, "events_seen": w.events_seen}
+            for w in _watchers.values()
+        ]